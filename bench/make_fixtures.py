@@ -0,0 +1,327 @@
+"""
+make_fixtures.py — генерирует офлайн-фикстуры для бенчмарков.
+
+Размеры и форма ответов повторяют реальные (exchangeInfo Binance с
+permissionSets и фильтрами, instruments OKX/Bybit, products Bitget,
+CMS-ленты, HTML-страница OKX и тела статей, где ищется время старта
+торгов). Генерация детерминирована (seed),
+файлы кладутся в bench/fixtures/*.gz и коммитятся в репозиторий.
+
+    python bench/make_fixtures.py
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import random
+import string
+from pathlib import Path
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+# примерно как у бирж в 2025 году
+COUNTS = {
+    "binance_spot": 3000,
+    "binance_futures": 550,
+    "bybit_spot": 650,
+    "bybit_linear": 550,
+    "okx_spot": 700,
+    "okx_futures": 150,
+    "bitget_spot": 800,
+    "bitget_futures": 500,
+}
+QUOTES = ("USDT", "USDT", "USDT", "USDC", "BTC", "ETH", "FDUSD", "TRY", "EUR", "BNB")
+EXPIRIES = ("250627", "250926", "251226")
+
+
+def _bases(rng: random.Random, n: int) -> list[str]:
+    seen: set[str] = set()
+    while len(seen) < n:
+        seen.add("".join(rng.choices(string.ascii_uppercase, k=rng.randint(2, 6))))
+    return sorted(seen)
+
+
+def _binance_spot(rng, bases):
+    symbols = []
+    for base in bases:
+        quote = rng.choice(QUOTES)
+        symbols.append({
+            "symbol": base + quote,
+            "status": rng.choice(("TRADING",) * 9 + ("BREAK",)),
+            "baseAsset": base, "baseAssetPrecision": 8,
+            "quoteAsset": quote, "quotePrecision": 8, "quoteAssetPrecision": 8,
+            "baseCommissionPrecision": 8, "quoteCommissionPrecision": 8,
+            "orderTypes": ["LIMIT", "LIMIT_MAKER", "MARKET", "STOP_LOSS_LIMIT", "TAKE_PROFIT_LIMIT"],
+            "icebergAllowed": True, "ocoAllowed": True, "otoAllowed": True,
+            "quoteOrderQtyMarketAllowed": True, "allowTrailingStop": True,
+            "cancelReplaceAllowed": True, "isSpotTradingAllowed": True,
+            "isMarginTradingAllowed": rng.random() < 0.4,
+            "filters": [
+                {"filterType": "PRICE_FILTER", "minPrice": "0.00000100",
+                 "maxPrice": "100000.00000000", "tickSize": "0.00000100"},
+                {"filterType": "LOT_SIZE", "minQty": "0.10000000",
+                 "maxQty": "92141578.00000000", "stepSize": "0.10000000"},
+                {"filterType": "ICEBERG_PARTS", "limit": 10},
+                {"filterType": "MARKET_LOT_SIZE", "minQty": "0.00000000",
+                 "maxQty": "123456.78900000", "stepSize": "0.00000000"},
+                {"filterType": "TRAILING_DELTA", "minTrailingAboveDelta": 10,
+                 "maxTrailingAboveDelta": 2000, "minTrailingBelowDelta": 10,
+                 "maxTrailingBelowDelta": 2000},
+                {"filterType": "PERCENT_PRICE_BY_SIDE", "bidMultiplierUp": "5",
+                 "bidMultiplierDown": "0.2", "askMultiplierUp": "5", "askMultiplierDown": "0.2",
+                 "avgPriceMins": 5},
+                {"filterType": "NOTIONAL", "minNotional": "5.00000000", "applyMinToMarket": True,
+                 "maxNotional": "9000000.00000000", "applyMaxToMarket": False, "avgPriceMins": 5},
+                {"filterType": "MAX_NUM_ORDERS", "maxNumOrders": 200},
+                {"filterType": "MAX_NUM_ALGO_ORDERS", "maxNumAlgoOrders": 5},
+            ],
+            "permissions": [],
+            "permissionSets": [["SPOT", "MARGIN"] + [f"TRD_GRP_{i:03d}" for i in range(4, 60)]],
+            "defaultSelfTradePreventionMode": "EXPIRE_MAKER",
+            "allowedSelfTradePreventionModes": ["EXPIRE_TAKER", "EXPIRE_MAKER", "EXPIRE_BOTH"],
+        })
+    return {"timezone": "UTC", "serverTime": 1750000000000, "rateLimits": [],
+            "exchangeFilters": [], "symbols": symbols}
+
+
+def _binance_futures(rng, bases):
+    symbols = []
+    for base in bases:
+        symbols.append({
+            "symbol": base + "USDT", "pair": base + "USDT", "contractType": "PERPETUAL",
+            "deliveryDate": 4133404800000, "onboardDate": 1569398400000, "status": "TRADING",
+            "maintMarginPercent": "2.5000", "requiredMarginPercent": "5.0000",
+            "baseAsset": base, "quoteAsset": "USDT", "marginAsset": "USDT",
+            "pricePrecision": 2, "quantityPrecision": 3, "baseAssetPrecision": 8,
+            "quotePrecision": 8, "underlyingType": "COIN", "underlyingSubType": ["Layer-1"],
+            "triggerProtect": "0.0500", "liquidationFee": "0.012500", "marketTakeBound": "0.05",
+            "maxMoveOrderLimit": 10000,
+            "filters": [
+                {"filterType": "PRICE_FILTER", "minPrice": "556.80", "maxPrice": "4529764",
+                 "tickSize": "0.10"},
+                {"filterType": "LOT_SIZE", "minQty": "0.001", "maxQty": "1000", "stepSize": "0.001"},
+                {"filterType": "MARKET_LOT_SIZE", "minQty": "0.001", "maxQty": "120",
+                 "stepSize": "0.001"},
+                {"filterType": "MAX_NUM_ORDERS", "limit": 200},
+                {"filterType": "MIN_NOTIONAL", "notional": "100"},
+                {"filterType": "PERCENT_PRICE", "multiplierUp": "1.0500",
+                 "multiplierDown": "0.9500", "multiplierDecimal": "4"},
+            ],
+            "orderTypes": ["LIMIT", "MARKET", "STOP", "STOP_MARKET", "TAKE_PROFIT",
+                           "TAKE_PROFIT_MARKET", "TRAILING_STOP_MARKET"],
+            "timeInForce": ["GTC", "IOC", "FOK", "GTX", "GTD"],
+        })
+    for exp in EXPIRIES:  # квартальные контракты — их отсекает is_dated_symbol
+        symbols.append({"symbol": f"BTCUSDT_{exp}", "pair": "BTCUSDT",
+                        "contractType": "CURRENT_QUARTER", "status": "TRADING"})
+    return {"timezone": "UTC", "serverTime": 1750000000000, "futuresType": "U_MARGINED",
+            "rateLimits": [], "exchangeFilters": [], "assets": [], "symbols": symbols}
+
+
+def _bybit(rng, bases, category):
+    items = []
+    for base in bases:
+        item = {"symbol": base + "USDT", "baseCoin": base, "quoteCoin": "USDT",
+                "status": "Trading",
+                "lotSizeFilter": {"basePrecision": "0.000001", "quotePrecision": "0.00000001",
+                                  "minOrderQty": "0.000048", "maxOrderQty": "71.73956243",
+                                  "minOrderAmt": "1", "maxOrderAmt": "2000000"},
+                "priceFilter": {"tickSize": "0.01"}}
+        if category == "spot":
+            item.update({"innovation": "0", "marginTrading": "both",
+                         "riskParameters": {"limitParameter": "0.03", "marketParameter": "0.03"}})
+        else:
+            item.update({"contractType": "LinearPerpetual", "launchTime": "1585526400000",
+                         "deliveryTime": "0", "deliveryFeeRate": "", "priceScale": "2",
+                         "leverageFilter": {"minLeverage": "1", "maxLeverage": "100.00",
+                                            "leverageStep": "0.01"},
+                         "unifiedMarginTrade": True, "fundingInterval": 480,
+                         "settleCoin": "USDT", "copyTrading": "both",
+                         "upperFundingRate": "0.00375", "lowerFundingRate": "-0.00375"})
+        items.append(item)
+    return {"retCode": 0, "retMsg": "OK",
+            "result": {"category": category, "list": items, "nextPageCursor": ""},
+            "retExtInfo": {}, "time": 1750000000000}
+
+
+def _okx(rng, bases, inst_type):
+    data = []
+    for base in bases:
+        if inst_type == "SPOT":
+            inst_id, uly = f"{base}-USDT", ""
+        else:
+            inst_id, uly = f"{base}-USD-{rng.choice(EXPIRIES)}", f"{base}-USD"
+        data.append({"instType": inst_type, "instId": inst_id, "uly": uly,
+                     "instFamily": uly, "baseCcy": base if inst_type == "SPOT" else "",
+                     "quoteCcy": "USDT" if inst_type == "SPOT" else "",
+                     "settleCcy": "" if inst_type == "SPOT" else base,
+                     "ctVal": "" if inst_type == "SPOT" else "100", "ctMult": "",
+                     "ctValCcy": "" if inst_type == "SPOT" else "USD", "optType": "", "stk": "",
+                     "listTime": "1606468572000", "expTime": "", "lever": "10",
+                     "tickSz": "0.0001", "lotSz": "0.000001", "minSz": "0.1", "ctType": "",
+                     "alias": "", "state": "live", "ruleType": "normal",
+                     "maxLmtSz": "10000000", "maxMktSz": "1000000", "maxLmtAmt": "20000000",
+                     "maxMktAmt": "1000000", "maxTwapSz": "", "maxIcebergSz": "",
+                     "maxTriggerSz": "", "maxStopSz": ""})
+    return {"code": "0", "msg": "", "data": data}
+
+
+def _bitget(rng, bases, kind):
+    data = []
+    for base in bases:
+        if kind == "spot":
+            data.append({"symbol": f"{base}USDT_SPBL", "symbolName": f"{base}USDT",
+                         "baseCoin": base, "quoteCoin": "USDT", "minTradeAmount": "0.0001",
+                         "maxTradeAmount": "10000", "takerFeeRate": "0.001",
+                         "makerFeeRate": "0.001", "priceScale": "4", "quantityScale": "8",
+                         "minTradeUSDT": "5", "status": "online", "buyLimitPriceRatio": "0.05",
+                         "sellLimitPriceRatio": "0.05"})
+        else:
+            data.append({"symbol": f"{base}USDT_UMCBL", "makerFeeRate": "0.0002",
+                         "takerFeeRate": "0.0006", "feeRateUpRatio": "0.005",
+                         "openCostUpRatio": "0.01", "quoteCoin": "USDT", "baseCoin": base,
+                         "buyLimitPriceRatio": "0.01", "sellLimitPriceRatio": "0.01",
+                         "supportMarginCoins": ["USDT"], "minTradeNum": "0.001",
+                         "priceEndStep": "5", "volumePlace": "3", "pricePlace": "1",
+                         "sizeMultiplier": "0.001", "symbolType": "perpetual",
+                         "symbolStatus": "normal", "offTime": "-1", "limitOpenTime": "-1",
+                         "maintainTime": "", "symbolName": f"{base}USDT"})
+    return {"code": "00000", "msg": "success", "requestTime": 1750000000000, "data": data}
+
+
+def _title(rng, exchange: str, base: str) -> str:
+    return rng.choice((
+        f"{exchange} Will List {base.title()} Protocol ({base}) with Seed Tag Applied",
+        f"{exchange} Will Add {base.title()} ({base}) on Earn, Convert & Margin",
+        f"New Listing: {base}USDT Perpetual Contract, with up to 50x leverage",
+        f"{exchange} Will List {base.title()} ({base}) and {base[::-1].title()} ({base[::-1]})",
+        f"Notice on Removal of Spot Trading Pairs - {base}/BTC",
+        f"{exchange} Futures Will Launch USDⓈ-Margined {base}USDT Perpetual Contract",
+        f"Initial Listing: {base} ({base}) — Innovation Zone",
+    ))
+
+
+def _cms_binance(rng, bases):
+    arts = [{"id": 200000 + i, "code": f"{rng.getrandbits(128):032x}",
+             "title": _title(rng, "Binance", b), "type": 1,
+             "releaseDate": 1750000000000 - i * 3_600_000} for i, b in enumerate(bases)]
+    return {"code": "000000", "message": None,
+            "data": {"catalogs": [], "articles": arts, "total": 1200}, "success": True}
+
+
+def _cms_bybit(rng, bases):
+    items = [{"title": _title(rng, "Bybit", b),
+              "description": "Bybit is excited to announce a new listing " * 4,
+              "type": {"title": "New Listings", "key": "new_crypto"},
+              "tags": ["Spot", "Spot Listings"],
+              "url": f"https://announcements.bybit.com/en-US/article/new-listing-{b.lower()}-blt{i}/",
+              "dateTimestamp": 1750000000000 - i * 3_600_000,
+              "startDateTimestamp": 1750000000000 - i * 3_600_000 + 7_200_000,
+              "endDateTimestamp": 1750000000000 - i * 3_600_000 + 86_400_000,
+              "publishTime": 1750000000000 - i * 3_600_000}
+             for i, b in enumerate(bases)]
+    return {"retCode": 0, "retMsg": "OK", "result": {"total": 900, "list": items},
+            "retExtInfo": {}, "time": 1750000000000}
+
+
+def _cms_bitget(rng, bases):
+    data = [{"annId": str(500000 + i), "annTitle": _title(rng, "Bitget", b),
+             "annDesc": "Bitget will list the token in the Innovation and Meme Zone.",
+             "cTime": str(1750000000000 - i * 3_600_000), "language": "en_US",
+             "annUrl": f"https://www.bitget.com/support/articles/{500000 + i}",
+             "annType": "coin_listings", "annSubType": "spot"}
+            for i, b in enumerate(bases)]
+    return {"code": "00000", "msg": "success", "requestTime": 1750000000000, "data": data}
+
+
+def _okx_html(rng, bases) -> str:
+    nav = "".join(f'<li class="nav-item"><a href="/help/section/s{i}">Section {i}</a></li>'
+                  for i in range(120))
+    head = ("<!DOCTYPE html><html lang=\"en\"><head><meta charset=\"utf-8\"><title>"
+            "New listings | OKX Help</title>"
+            + "".join(f'<link rel="preload" href="/cdn/assets/okfe/chunk-{i}.js" as="script">'
+                      for i in range(60))
+            + "<script>window.__app_data_for_ssr__ = " + json.dumps({"k": "v" * 20000})
+            + "</script></head>")
+    cards = "".join(
+        f'<li><a class="article-item" href="/help/okx-will-list-{b.lower()}-{i}">'
+        f'<div class="article-item-title">{_title(rng, "OKX", b).replace("&", "&amp;")}</div>'
+        f'<div class="article-item-date">Published on Jun {1 + i % 28}, 2025</div></a></li>'
+        for i, b in enumerate(bases)
+    )
+    footer = "".join(f'<a class="footer-link" href="/about/{i}">Footer {i}</a>' for i in range(200))
+    return (head + f'<body><header><ul class="nav">{nav}</ul></header>'
+            f'<main><section class="article-list"><ul>{cards}</ul>'
+            f'<div class="pagination"><a href="?page=2">2</a></div></section></main>'
+            f"<footer>{footer}</footer></body></html>")
+
+
+# тело статьи: депозиты, торги, выводы — время старта торгов не первое в тексте
+_ARTICLE_TEXT = (
+    "Fellow users, {exchange} will list {base} ({base}). "
+    "Deposits for {base} will open at 2025-06-03 08:00 (UTC). "
+    "Spot trading for the {base}/USDT pair will open at 2025-06-03 10:00 (UTC). "
+    "Withdrawals will open at 2025-06-04 10:00 (UTC). "
+)
+
+
+def _okx_article(rng, base: str) -> str:
+    paragraphs = "".join(f"<p>{_ARTICLE_TEXT.format(exchange='OKX', base=base)}</p>" for _ in range(3))
+    filler = "".join(f'<div class="related"><a href="/help/r{i}">Related {i}</a></div>' for i in range(80))
+    return (f"<!DOCTYPE html><html><head><title>OKX Will List {base}</title></head><body><main>"
+            f"<article><h1>OKX Will List {base.title()} ({base})</h1>{paragraphs}</article>"
+            f"{filler}</main></body></html>")
+
+
+def _cms_binance_detail(rng, base: str):
+    # Binance отдаёт тело статьи JSON-деревом, сериализованным в строку
+    nodes = [{"node": "element", "tag": "p",
+              "child": [{"node": "text", "text": _ARTICLE_TEXT.format(exchange="Binance", base=base)}]}
+             for _ in range(3)]
+    return {"code": "000000", "message": None, "success": True,
+            "data": {"id": 200000, "code": f"{rng.getrandbits(128):032x}",
+                     "title": f"Binance Will List {base.title()} ({base})",
+                     "body": json.dumps({"node": "root", "child": nodes})}}
+
+
+def build() -> dict[str, bytes]:
+    rng = random.Random(20250603)
+    pool = _bases(rng, 4000)
+    pick = lambda n: rng.sample(pool, n)  # noqa: E731
+    c = COUNTS
+    spot = pick(c["binance_spot"])
+    out = {
+        "binance_spot.json": _binance_spot(rng, spot),
+        "binance_futures.json": _binance_futures(rng, rng.sample(spot, c["binance_futures"])),
+        "bybit_spot.json": _bybit(rng, pick(c["bybit_spot"]), "spot"),
+        "bybit_linear.json": _bybit(rng, pick(c["bybit_linear"]), "linear"),
+        "okx_spot.json": _okx(rng, pick(c["okx_spot"]), "SPOT"),
+        "okx_futures.json": _okx(rng, pick(c["okx_futures"]), "FUTURES"),
+        "bitget_spot.json": _bitget(rng, pick(c["bitget_spot"]), "spot"),
+        "bitget_futures.json": _bitget(rng, pick(c["bitget_futures"]), "futures"),
+        "cms_binance.json": _cms_binance(rng, pick(40)),
+        "cms_bybit.json": _cms_bybit(rng, pick(50)),
+        "cms_bitget.json": _cms_bitget(rng, pick(10)),
+    }
+    blobs = {name: json.dumps(doc, separators=(",", ":")).encode() for name, doc in out.items()}
+    blobs["okx_listings.html"] = _okx_html(rng, pick(20)).encode()
+    # добавлены позже — в конце, чтобы не сдвигать генератор для остальных файлов
+    blobs["okx_article.html"] = _okx_article(rng, pick(1)[0]).encode()
+    blobs["cms_binance_detail.json"] = json.dumps(
+        _cms_binance_detail(rng, pick(1)[0]), separators=(",", ":")).encode()
+    return blobs
+
+
+def main() -> None:
+    FIXTURES.mkdir(exist_ok=True)
+    for name, blob in build().items():
+        path = FIXTURES / f"{name}.gz"
+        # mtime=0 — байт-в-байт одинаковый результат при перегенерации
+        with open(path, "wb") as fh, gzip.GzipFile(fileobj=fh, mode="wb", mtime=0) as gz:
+            gz.write(blob)
+        print(f"{path.name:28} {len(blob) / 1e6:7.2f} MB raw, {path.stat().st_size / 1e3:8.1f} KB gz")
+
+
+if __name__ == "__main__":
+    main()
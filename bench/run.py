@@ -0,0 +1,319 @@
+"""
+run.py — офлайн-бенчмарки: разбор ответов бирж, индекс БД, bootstrap
+и цикл REST-опроса. Сеть не нужна: все запросы обслуживает
+httpx.MockTransport из bench/fixtures (см. make_fixtures.py), тело
+отдаётся кусками по 64 КБ — как при реальной потоковой загрузке.
+
+    python bench/run.py                         # таблица + JSON в stdout
+    python bench/run.py --out bench/last.json
+    python bench/run.py --baseline bench/last.json --threshold 0.15
+
+С --baseline каждая метрика сравнивается с прошлым прогоном; если
+хоть одна ухудшилась больше чем на --threshold, код выхода — 1.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import os
+import platform
+import re
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Awaitable, Callable
+
+ROOT = Path(__file__).resolve().parent.parent
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+# bot.core/bot.telegram требуют токен и чат при импорте; в Telegram
+# бенчмарки не ходят — send подменяется заглушкой ниже
+os.environ.setdefault("TG_TOKEN", "123456:BENCHMARK")
+os.environ.setdefault("CHAT_ID", "0")
+os.environ.setdefault("METRICS_PORT", "0")
+
+import httpx  # noqa: E402
+
+import main as app  # noqa: E402
+from bot import db as dbmod  # noqa: E402
+from bot.ann_api.symbol import Market  # noqa: E402
+from bot.ann_cms import binance as cms_binance, bitget as cms_bitget  # noqa: E402
+from bot.ann_cms import bybit as cms_bybit, okx as cms_okx  # noqa: E402
+from bot.ann_cms import cursor, http_cache  # noqa: E402
+
+CHUNK = 64 * 1024
+
+# (host+path, параметр-селектор) → фикстура
+ROUTES = {
+    ("api.binance.com/api/v3/exchangeInfo", None): "binance_spot.json",
+    ("fapi.binance.com/fapi/v1/exchangeInfo", None): "binance_futures.json",
+    ("api.bybit.com/v5/market/instruments-info", "spot"): "bybit_spot.json",
+    ("api.bybit.com/v5/market/instruments-info", "linear"): "bybit_linear.json",
+    ("www.okx.com/api/v5/public/instruments", "SPOT"): "okx_spot.json",
+    ("www.okx.com/api/v5/public/instruments", "FUTURES"): "okx_futures.json",
+    ("api.bitget.com/api/spot/v1/public/products", None): "bitget_spot.json",
+    ("api.bitget.com/api/mix/v1/market/contracts", "umcbl"): "bitget_futures.json",
+    ("www.binance.com/bapi/composite/v1/public/cms/article/catalog/list/query", None): "cms_binance.json",
+    ("api.bybit.com/v5/announcements/index", None): "cms_bybit.json",
+    ("api.bitget.com/api/v2/public/annoucements", None): "cms_bitget.json",
+    ("www.okx.com/help/section/announcements-new-listings", None): "okx_listings.html",
+    ("www.binance.com/bapi/composite/v1/public/cms/article/detail/query", None): "cms_binance_detail.json",
+}
+# статьи с адресом на каждую — по префиксу пути (время старта торгов из тела)
+PREFIX_ROUTES = (
+    ("www.okx.com/help/", "okx_article.html"),
+)
+SELECTORS = ("category", "instType", "productType")
+
+
+def load_fixtures() -> dict[str, bytes]:
+    if not FIXTURES.is_dir():
+        raise SystemExit("bench/fixtures не найдены — запустите python bench/make_fixtures.py")
+    return {p.name[:-3]: gzip.decompress(p.read_bytes()) for p in FIXTURES.glob("*.gz")}
+
+
+class _Chunked(httpx.AsyncByteStream):
+    def __init__(self, body: bytes) -> None:
+        self.body = body
+
+    async def __aiter__(self):
+        for i in range(0, len(self.body), CHUNK):
+            yield self.body[i:i + CHUNK]
+
+
+def make_client(blobs: dict[str, bytes]) -> httpx.AsyncClient:
+    def handler(request: httpx.Request) -> httpx.Response:
+        url = request.url
+        selector = next((url.params[k] for k in SELECTORS if k in url.params), None)
+        name = ROUTES.get((url.host + url.path, selector)) or ROUTES.get((url.host + url.path, None))
+        if name is None:
+            name = next((n for prefix, n in PREFIX_ROUTES if (url.host + url.path).startswith(prefix)), None)
+        if name is None:
+            return httpx.Response(404, request=request)
+        ctype = "text/html" if name.endswith(".html") else "application/json"
+        return httpx.Response(200, headers={"content-type": ctype},
+                              stream=_Chunked(blobs[name]), request=request)
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+async def _noop_send(text: str, **route) -> None:
+    return None
+
+
+# ───────────────────────────── замеры ─────────────────────────────
+async def timeit(fn: Callable[[], Awaitable], repeat: int) -> float:
+    """Медиана из repeat прогонов (после одного прогревочного), секунды."""
+    await fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def ops_per_sec(fn: Callable, items: list, repeat: int) -> float:
+    """Лучший из repeat проходов fn по items, вызовов в секунду."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - start)
+    return len(items) / best
+
+
+class Results:
+    def __init__(self) -> None:
+        self.data: dict[str, dict] = {}
+
+    def add(self, name: str, value: float, unit: str, better: str) -> None:
+        self.data[name] = {"value": round(value, 6), "unit": unit, "better": better}
+        print(f"  {name:44} {value:14.4f} {unit}", file=sys.stderr)
+
+
+def bench_helpers(blobs: dict[str, bytes], res: Results, repeat: int) -> None:
+    symbols = [m.decode() for m in re.findall(rb'"symbol":"([^"]+)"', blobs["binance_spot.json"])]
+    symbols += [m.decode() for m in re.findall(rb'"instId":"([^"]+)"', blobs["okx_futures.json"])]
+    res.add("helpers.norm_ops_per_sec", ops_per_sec(dbmod.norm, symbols, repeat), "op/s", "higher")
+    res.add("helpers.is_dated_symbol_ops_per_sec",
+            ops_per_sec(app.is_dated_symbol, symbols, repeat), "op/s", "higher")
+
+    titles = [t for name in ("cms_binance.json", "cms_bybit.json", "cms_bitget.json")
+              for t in re.findall(r'"(?:title|annTitle)":"([^"]+)"', blobs[name].decode())]
+    titles += re.findall(r'article-item-title">([^<]+)<', blobs["okx_listings.html"].decode())
+    for mod in (cms_binance, cms_bybit, cms_okx, cms_bitget):
+        name = mod.__name__.rsplit(".", 1)[-1]
+        res.add(f"helpers.titles.{name}_ops_per_sec",
+                ops_per_sec(mod.RULES.tickers, titles * 20, repeat), "op/s", "higher")
+
+
+def bench_okx_extract(blobs: dict[str, bytes], res: Results, repeat: int) -> None:
+    page = blobs["okx_listings.html"].decode()
+    for name, fn in (("fast", cms_okx.extract_fast), ("soup", cms_okx.extract_soup)):
+        res.add(f"helpers.okx_extract.{name}_ops_per_sec",
+                ops_per_sec(fn, [page] * 5, repeat), "op/s", "higher")
+
+
+async def bench_announcers(client, res: Results, repeat: int) -> None:
+    for cls in app.API_ANNOUNCERS:
+        api = cls(client)
+        sizes = []
+
+        async def run(api=api, sizes=sizes):
+            sizes.append(len([s async for s in api.fetch()]))
+
+        sec = await timeit(run, repeat)
+        res.add(f"api.{api.exchange}.fetch_seconds", sec, "s", "lower")
+        res.add(f"api.{api.exchange}.symbols_per_sec", sizes[-1] / sec, "sym/s", "higher")
+
+    for cls in app.CMS_ANNOUNCERS:
+        async def cold(cls=cls):
+            # свежий анонсер без кеша и курсора: загрузка и разбор всей ленты
+            http_cache.reset()
+            cursor.reset()
+            await app._collect(cls(client))
+
+        cms = cls(client)
+        res.add(f"cms.{cms.name}.fetch_seconds", await timeit(cold, repeat), "s", "lower")
+        # тот же анонсер повторно: валидаторы, хеш тела, курсор — «ничего нового»
+        res.add(f"cms.{cms.name}.unchanged_seconds",
+                await timeit(lambda cms=cms: app._collect(cms), repeat), "s", "lower")
+
+
+async def bench_db(res: Results, n: int) -> None:
+    keys = [("Bench", f"SYM{i}USDT", Market.SPOT if i % 2 else Market.FUTURES) for i in range(n)]
+    db = await dbmod.connect()
+    try:
+        start = time.perf_counter()
+        for exch, sym, mkt in keys:
+            await dbmod.observe(db, exch, sym, mkt)
+        await dbmod.flush(db)
+        res.add("db.observe_ops_per_sec", n / (time.perf_counter() - start), "op/s", "higher")
+
+        start = time.perf_counter()
+        for exch, sym, _ in keys:
+            dbmod.listing_markets(exch, sym)
+        res.add("db.listing_markets_ops_per_sec", n / (time.perf_counter() - start), "op/s", "higher")
+
+        # переход рынка (Spot → Both, анонс → торги) — тот же UPSERT
+        start = time.perf_counter()
+        for exch, sym, _ in keys:
+            await dbmod.observe(db, exch, sym, Market.SPOT | Market.FUTURES)
+        await dbmod.flush(db)
+        res.add("db.transition_ops_per_sec", n / (time.perf_counter() - start), "op/s", "higher")
+    finally:
+        await dbmod.close(db)
+
+
+async def bench_bootstrap(client, res: Results, repeat: int) -> None:
+    samples = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)  # DB_PATH относительный — каждая попытка на пустой БД
+            db = await dbmod.connect()
+            try:
+                start = time.perf_counter()
+                await app.bootstrap(db, client)
+                samples.append(time.perf_counter() - start)
+            finally:
+                await dbmod.close(db)
+                os.chdir(ROOT)
+    res.add("bootstrap.wall_seconds", statistics.median(samples), "s", "lower")
+
+
+async def bench_poll_cycle(client, res: Results, repeat: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        db = await dbmod.connect()
+        try:
+            await app.bootstrap(db, client)
+            for cls in app.API_ANNOUNCERS:
+                api = cls(client)
+                # первый опрос свежего анонсера: весь снимок «новый», но уже в БД
+                res.add(f"poll.{api.exchange}.first_seconds",
+                        await timeit(lambda cls=cls: app._poll_api(cls(client), db), repeat), "s", "lower")
+                # установившийся режим: ответ не изменился
+                res.add(f"poll.{api.exchange}.steady_seconds",
+                        await timeit(lambda api=api: app._poll_api(api, db), repeat), "s", "lower")
+        finally:
+            await dbmod.close(db)
+            os.chdir(ROOT)
+
+
+# ─────────────────────────── сравнение ────────────────────────────
+def compare(current: dict, baseline: dict, threshold: float) -> bool:
+    """Печатает дельты; False, если что-то ухудшилось сильнее threshold."""
+    ok = True
+    print(f"\n  {'metric':44} {'baseline':>12} {'current':>12} {'delta':>8}", file=sys.stderr)
+    for name, cur in current.items():
+        base = baseline.get(name)
+        if not base or not base["value"]:
+            continue
+        delta = cur["value"] / base["value"] - 1
+        worse = delta > threshold if cur["better"] == "lower" else delta < -threshold
+        ok &= not worse
+        print(f"  {name:44} {base['value']:12.4f} {cur['value']:12.4f} {delta:+8.1%}"
+              f"{'  REGRESSION' if worse else ''}", file=sys.stderr)
+    return ok
+
+
+async def run(args) -> dict:
+    blobs = load_fixtures()
+    app.send = _noop_send
+    logging.disable(logging.INFO)  # логи каждого запроса искажают замеры
+    res = Results()
+    bench_helpers(blobs, res, args.repeat)
+    bench_okx_extract(blobs, res, args.repeat)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        await bench_db(res, args.db_ops)
+        os.chdir(ROOT)
+    async with make_client(blobs) as client:
+        await bench_announcers(client, res, args.repeat)
+        await bench_bootstrap(client, res, max(3, args.repeat // 3))
+        await bench_poll_cycle(client, res, args.repeat)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "repeat": args.repeat,
+        },
+        "results": res.data,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=10, help="прогонов на метрику (медиана)")
+    ap.add_argument("--db-ops", type=int, default=20000, help="ключей для замеров БД")
+    ap.add_argument("--out", type=Path, help="куда записать JSON (по умолчанию stdout)")
+    ap.add_argument("--baseline", type=Path, help="JSON прошлого прогона для сравнения")
+    ap.add_argument("--threshold", type=float, default=0.10, help="допустимое ухудшение, доля")
+    args = ap.parse_args()
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        args.out.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))["results"]
+        if not compare(report["results"], baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,25 @@
 import httpx
-from .symbol import Symbol
 
-async def get_new_symbols():
-    spot_url = "https://api.binance.com/api/v3/exchangeInfo"
-    futures_url = "https://fapi.binance.com/fapi/v1/exchangeInfo"
+from .engine import Endpoint, classify, probe
+from .symbol import Market
 
-    async with httpx.AsyncClient() as client:
-        spot_resp, fut_resp = await client.get(spot_url), await client.get(futures_url)
+ENDPOINTS = (
+    Endpoint("https://api.binance.com/api/v3/exchangeInfo", "symbol", Market.SPOT,
+             probe="https://api.binance.com/api/v3/exchangeInfo?symbol={base}USDT"),
+    # у fapi exchangeInfo нет фильтра по символу — цена есть только у торгуемого
+    Endpoint("https://fapi.binance.com/fapi/v1/exchangeInfo", "symbol", Market.FUTURES,
+             probe="https://fapi.binance.com/fapi/v1/ticker/price?symbol={base}USDT"),
+    # BTCUSD_PERP / BTCUSD_250627 → BTCUSD
+    Endpoint("https://dapi.binance.com/dapi/v1/exchangeInfo", "symbol", Market.INVERSE,
+             clean=lambda s: s.split("_", 1)[0]),
+    # у опционов интересен базовый актив, а не каждый страйк
+    Endpoint("https://eapi.binance.com/eapi/v1/exchangeInfo", "underlying", Market.OPTIONS),
+)
 
-    spot_symbols = {s["symbol"] for s in spot_resp.json().get("symbols", [])}
-    futures_symbols = {s["symbol"] for s in fut_resp.json().get("symbols", [])}
 
-    all_symbols = spot_symbols | futures_symbols
-    result = []
+async def get_new_symbols(client: httpx.AsyncClient):
+    return await classify(client, ENDPOINTS)
 
-    for symbol in all_symbols:
-        if symbol in spot_symbols and symbol in futures_symbols:
-            result.append(Symbol(symbol, "Both"))
-        elif symbol in spot_symbols:
-            result.append(Symbol(symbol, "Spot"))
-        else:
-            result.append(Symbol(symbol, "Futures"))
 
-    return result
+async def probe_symbol(client: httpx.AsyncClient, base: str):
+    return await probe(client, ENDPOINTS, base)
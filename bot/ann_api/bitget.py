@@ -1,5 +1,9 @@
 import httpx
-from .symbol import Symbol
+
+from .engine import Endpoint, classify, probe
+from .symbol import Market
+
+_CONTRACTS = "https://api.bitget.com/api/mix/v1/market/contracts?productType="
 
 
 def _clean(ticker: str) -> str:
@@ -7,25 +11,19 @@ def _clean(ticker: str) -> str:
     return ticker.split("_", 1)[0].replace("-", "")
 
 
-async def get_new_symbols():
-    spot_url = "https://api.bitget.com/api/spot/v1/public/products"
-    fut_url  = "https://api.bitget.com/api/mix/v1/market/contracts?productType=umcbl"
-
-    async with httpx.AsyncClient() as client:
-        spot_r, fut_r = await client.get(spot_url), await client.get(fut_url)
+ENDPOINTS = (
+    Endpoint("https://api.bitget.com/api/spot/v1/public/products", "symbol", Market.SPOT, clean=_clean,
+             probe="https://api.bitget.com/api/spot/v1/public/product?symbol={base}USDT_SPBL"),
+    Endpoint(_CONTRACTS + "umcbl", "symbol", Market.FUTURES, clean=_clean,
+             probe="https://api.bitget.com/api/mix/v1/market/ticker?symbol={base}USDT_UMCBL"),
+    Endpoint(_CONTRACTS + "dmcbl", "symbol", Market.INVERSE, clean=_clean),
+    Endpoint(_CONTRACTS + "cmcbl", "symbol", Market.USDC, clean=_clean),
+)
 
-    spot = {_clean(s["symbol"]) for s in spot_r.json().get("data", [])}
-    fut  = {_clean(s["symbol"]) for s in fut_r.json().get("data", [])}
 
-    symbols = []
+async def get_new_symbols(client: httpx.AsyncClient):
+    return await classify(client, ENDPOINTS)
 
-    for sym in spot | fut:
-        if sym in spot and sym in fut:
-            mkt = "Both"
-        elif sym in spot:
-            mkt = "Spot"
-        else:
-            mkt = "Futures"
-        symbols.append(Symbol(sym, mkt))
 
-    return symbols
+async def probe_symbol(client: httpx.AsyncClient, base: str):
+    return await probe(client, ENDPOINTS, base)
@@ -1,29 +1,24 @@
 import httpx
-from .symbol import Symbol
 
-async def get_new_symbols():
-    spot_url = "https://api.bybit.com/v5/market/instruments-info?category=spot"
-    futures_url = "https://api.bybit.com/v5/market/instruments-info?category=linear"
+from .engine import Endpoint, classify, probe
+from .symbol import Market
 
-    async with httpx.AsyncClient() as client:
-        spot_resp = await client.get(spot_url)
-        futures_resp = await client.get(futures_url)
+_INSTRUMENTS = "https://api.bybit.com/v5/market/instruments-info?category="
 
-    spot_data = spot_resp.json().get("result", {}).get("list", [])
-    futures_data = futures_resp.json().get("result", {}).get("list", [])
+ENDPOINTS = (
+    Endpoint(_INSTRUMENTS + "spot", "symbol", Market.SPOT,
+             probe=_INSTRUMENTS + "spot&symbol={base}USDT"),
+    Endpoint(_INSTRUMENTS + "linear", "symbol", Market.FUTURES,
+             probe=_INSTRUMENTS + "linear&symbol={base}USDT"),
+    Endpoint(_INSTRUMENTS + "inverse", "symbol", Market.INVERSE),
+    # опционы: BTC → BTCUSDT, чтобы совпасть с именем спота
+    Endpoint(_INSTRUMENTS + "option", "baseCoin", Market.OPTIONS, clean=lambda s: s + "USDT"),
+)
 
-    spot_symbols = {s["symbol"] for s in spot_data}
-    futures_symbols = {s["symbol"] for s in futures_data}
 
-    all_symbols = spot_symbols | futures_symbols
-    result = []
+async def get_new_symbols(client: httpx.AsyncClient):
+    return await classify(client, ENDPOINTS)
 
-    for symbol in all_symbols:
-        if symbol in spot_symbols and symbol in futures_symbols:
-            result.append(Symbol(symbol, "Both"))
-        elif symbol in spot_symbols:
-            result.append(Symbol(symbol, "Spot"))
-        else:
-            result.append(Symbol(symbol, "Futures"))
 
-    return result
+async def probe_symbol(client: httpx.AsyncClient, base: str):
+    return await probe(client, ENDPOINTS, base)
@@ -0,0 +1,130 @@
+"""
+engine.py — общий классификатор инструментов для REST-анонсеров.
+
+Биржа только объявляет свои эндпоинты: URL, поле с именем инструмента,
+рынок и (при необходимости) нормализацию имени. Движок скачивает всё
+параллельно и за один проход собирает битовую маску рынков на каждое
+имя, из которой получается Spot / Futures / Both.
+
+Какие рынки реально опрашивать, задаёт API_MARKETS (по умолчанию
+spot,futures); остальные объявления не стоят ни одного запроса.
+
+probe() — тот же разбор, но по одному базовому активу: эндпоинты с
+адресом probe спрашивают биржу только о нём (учащённый опрос вокруг
+объявленного листинга, см. bot/burst.py).
+
+Каждый эндпоинт сверяется со своим прошлым ответом: рынок, который был
+непуст, а теперь пуст или потерял больше API_MAX_SHRINK доли имён, —
+это тело с ошибкой (Bybit retCode 10006, Binance {}) или техработы,
+а не массовый делистинг. Такой опрос падает целиком и снимок не
+меняется; поредевший, но непустой список принимается, только если
+API_SHRINK_CONFIRM опросов подряд он ниже порога (сам размер может
+меняться — имена уходят постепенно).
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Callable, Dict, List, Optional, Sequence, Set
+
+import httpx
+
+from bot.fetch import gather_all
+from .stream import collect_field, fields_in
+from .symbol import Market, Symbol
+
+
+def _parse_markets(value: str) -> Market:
+    flags = Market(0)
+    for name in filter(None, (p.strip().upper() for p in value.split(","))):
+        try:
+            flags |= Market[name]
+        except KeyError:
+            raise RuntimeError(
+                f"API_MARKETS: неизвестный рынок {name.lower()!r} "
+                "(spot, futures, inverse, usdc, options)"
+            ) from None
+    return flags
+
+
+API_MARKETS: Market = _parse_markets(os.getenv("API_MARKETS", "spot,futures"))
+API_MAX_SHRINK = float(os.getenv("API_MAX_SHRINK", "0.5"))      # доля имён, потеря которой — сбой
+API_SHRINK_CONFIRM = int(os.getenv("API_SHRINK_CONFIRM", "3"))  # опросов подряд, чтобы поверить
+
+
+class Endpoint:
+    """
+    Один список инструментов: откуда, какое поле, какой рынок.
+    probe — адрес запроса одного инструмента, {base} — базовый актив;
+    None — биржа так не умеет (или имя не вывести из базового актива).
+    """
+
+    __slots__ = ("url", "field", "market", "clean", "probe", "seen", "shrunk")
+
+    def __init__(
+        self,
+        url: str,
+        field: str,
+        market: Market,
+        clean: Optional[Callable[[str], str]] = None,
+        probe: Optional[str] = None,
+    ) -> None:
+        self.url = url
+        self.field = field
+        self.market = market
+        self.clean = clean
+        self.probe = probe
+        self.seen = 0            # имён в последнем принятом ответе
+        self.shrunk = 0          # опросов подряд ниже порога — поредевший ответ ждёт подтверждения
+
+
+async def classify(client: httpx.AsyncClient, endpoints: Sequence[Endpoint]) -> List[Symbol]:
+    """Все включённые эндпоинты → список Symbol с маской рынков."""
+    active = [ep for ep in endpoints if ep.market & API_MARKETS]
+    results = await gather_all(*(collect_field(client, ep.url, ep.field) for ep in active))
+    for ep, names in zip(active, results):
+        _check(ep, len(names))
+    for ep, names in zip(active, results):
+        ep.seen = len(names)
+    return _merge(active, results)
+
+
+def _check(ep: Endpoint, count: int) -> None:
+    """Рынок опустел или резко поредел — бросить, а не отдавать «делистинг»."""
+    if not ep.seen or count >= ep.seen * (1 - API_MAX_SHRINK):
+        ep.shrunk = 0
+        return
+    # порог — от последнего принятого ответа (ep.seen), пока не поверили
+    ep.shrunk = ep.shrunk + 1 if count else 0
+    if ep.shrunk >= API_SHRINK_CONFIRM:
+        ep.shrunk = 0
+        return  # держится несколько опросов подряд — рынок и правда поредел
+    raise RuntimeError(f"{ep.url}: {count} instruments instead of {ep.seen}, treating as an exchange error")
+
+
+async def _probe_one(client: httpx.AsyncClient, ep: Endpoint, base: str) -> Set[str]:
+    resp = await client.get(ep.probe.format(base=base))
+    if resp.status_code in (400, 404):
+        return set()  # так биржи отвечают на ещё не существующий символ
+    resp.raise_for_status()
+    return fields_in(resp.content, ep.field)
+
+
+async def probe(client: httpx.AsyncClient, endpoints: Sequence[Endpoint], base: str) -> List[Symbol]:
+    """Инструменты одного базового актива — пусто, пока торги не открыты."""
+    active = [ep for ep in endpoints if ep.probe and ep.market & API_MARKETS]
+    results = await gather_all(*(_probe_one(client, ep, base) for ep in active))
+    return _merge(active, results)
+
+
+def _merge(active: Sequence[Endpoint], results: Sequence[Set[str]]) -> List[Symbol]:
+    flags: Dict[str, int] = {}
+    get = flags.get
+    for ep, names in zip(active, results):
+        bit = int(ep.market)
+        clean = ep.clean
+        for name in names:
+            if clean is not None:
+                name = clean(name)
+            flags[name] = get(name, 0) | bit
+    return [Symbol(name, bits) for name, bits in flags.items()]
@@ -1,26 +1,28 @@
 import httpx
-from .symbol import Symbol
 
-async def get_new_symbols():
-    spot_url = "https://www.okx.com/api/v5/public/instruments?instType=SPOT"
-    futures_url = "https://www.okx.com/api/v5/public/instruments?instType=FUTURES"
+from .engine import Endpoint, classify, probe
+from .symbol import Market
 
-    async with httpx.AsyncClient() as client:
-        spot_resp = await client.get(spot_url)
-        futures_resp = await client.get(futures_url)
+_INSTRUMENTS = "https://www.okx.com/api/v5/public/instruments?instType="
 
-    spot_symbols = {s["instId"].replace("-", "") for s in spot_resp.json().get("data", [])}
-    futures_symbols = {s["instId"].replace("-", "") for s in futures_resp.json().get("data", [])}
 
-    all_symbols = spot_symbols | futures_symbols
-    result = []
+def _clean(inst_id: str) -> str:
+    return inst_id.replace("-", "")
 
-    for symbol in all_symbols:
-        if symbol in spot_symbols and symbol in futures_symbols:
-            result.append(Symbol(symbol, "Both"))
-        elif symbol in spot_symbols:
-            result.append(Symbol(symbol, "Spot"))
-        else:
-            result.append(Symbol(symbol, "Futures"))
 
-    return result
+ENDPOINTS = (
+    Endpoint(_INSTRUMENTS + "SPOT", "instId", Market.SPOT, clean=_clean,
+             probe=_INSTRUMENTS + "SPOT&instId={base}-USDT"),
+    # у FUTURES в instId дата экспирации — по базовому активу не угадать
+    Endpoint(_INSTRUMENTS + "FUTURES", "instId", Market.FUTURES, clean=_clean),
+    # SWAP смешивает USDT- и coin-margined, а OPTION требует uly на каждый
+    # базовый актив — поштучно поле не различить, поэтому не объявлены
+)
+
+
+async def get_new_symbols(client: httpx.AsyncClient):
+    return await classify(client, ENDPOINTS)
+
+
+async def probe_symbol(client: httpx.AsyncClient, base: str):
+    return await probe(client, ENDPOINTS, base)
@@ -0,0 +1,58 @@
+"""
+stream.py — потоковое извлечение одного поля из больших JSON-ответов.
+
+exchangeInfo / instruments весят мегабайты, а нужно нам только поле
+"symbol" / "instId". Вместо resp.json() читаем тело по чанкам и
+вытаскиваем значения регуляркой по байтам: документ целиком в памяти
+не собирается, а event loop отпускается между чанками.
+"""
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Optional, Set
+
+import httpx
+
+# сколько байт хвоста чанка переносить в следующий — с запасом
+# больше любой пары "field": "value"
+_TAIL = 256
+
+
+@lru_cache(maxsize=None)
+def _field_rx(field: str) -> re.Pattern[bytes]:
+    return re.compile(rb'"' + re.escape(field.encode()) + rb'"\s*:\s*"([^"\\]*)"')
+
+
+async def collect_field(
+    client: httpx.AsyncClient,
+    url: str,
+    field: str,
+    *,
+    params: Optional[dict] = None,
+) -> Set[str]:
+    """
+    GET url и собрать все строковые значения ключа `field` в set.
+    Имя ключа должно быть уникальным в документе — вложенность
+    не отслеживается (для instrument-списков бирж это так).
+    """
+    rx = _field_rx(field)
+    found: Set[str] = set()
+    tail = b""
+    async with client.stream("GET", url, params=params) as resp:
+        resp.raise_for_status()
+        async for chunk in resp.aiter_bytes():
+            buf = tail + chunk
+            end = 0
+            for m in rx.finditer(buf):
+                found.add(m.group(1).decode())
+                end = m.end()
+            # незакрытая пара могла разрезаться на границе чанка
+            tail = buf[max(end, len(buf) - _TAIL):]
+    return found
+
+
+def fields_in(body: bytes, field: str) -> Set[str]:
+    """То же для уже скачанного (маленького) тела."""
+    return {m.group(1).decode() for m in _field_rx(field).finditer(body)}
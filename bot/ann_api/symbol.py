@@ -1,4 +1,58 @@
+from __future__ import annotations
+
+import sys
+import weakref
+from enum import IntFlag
+from typing import ClassVar, Tuple
+
+
+class Market(IntFlag):
+    SPOT = 1
+    FUTURES = 2   # USDT-маржинальные perpetual / квартальные
+    INVERSE = 4   # coin-margined
+    USDC = 8      # USDC-маржинальные
+    OPTIONS = 16
+    ANNOUNCED = 64  # не рынок: CMS-анонс (бит строки listings, см. bot/db.py)
+
+    DERIVATIVES = FUTURES | INVERSE | USDC | OPTIONS
+    TRADED = SPOT | DERIVATIVES
+
+
+def market_label(flags: int) -> str:
+    """Spot, Futures или Both — так рынок пишется в чат и в фильтры подписок."""
+    if flags & Market.SPOT:
+        return "Both" if flags & Market.DERIVATIVES else "Spot"
+    return "Futures"
+
+
 class Symbol:
-    def __init__(self, name: str, market_type: str):
-        self.name = name
-        self.market_type = market_type  # Spot, Futures или Both
+    """
+    Инструмент биржи: имя + набор рынков, где он торгуется.
+    Экземпляры интернируются: один и тот же (name, markets) между
+    опросами — один и тот же объект, поэтому неизменившийся снимок
+    не порождает новых аллокаций, а сравнение идёт по `is`.
+    Таблица держит экземпляры слабо: живут, пока они в чьём-то снимке,
+    делистинги и старые наборы рынков из неё уходят сами.
+    """
+
+    __slots__ = ("name", "markets", "market_type", "__weakref__")
+
+    _interned: ClassVar["weakref.WeakValueDictionary[Tuple[str, int], Symbol]"] = weakref.WeakValueDictionary()
+
+    name: str
+    markets: Market
+    market_type: str  # Spot, Futures или Both
+
+    def __new__(cls, name: str, markets: int) -> "Symbol":
+        key = (name, int(markets))
+        sym = cls._interned.get(key)
+        if sym is None:
+            sym = object.__new__(cls)
+            sym.name = sys.intern(name)
+            sym.markets = Market(markets)
+            sym.market_type = market_label(markets)
+            cls._interned[key] = sym
+        return sym
+
+    def __repr__(self) -> str:
+        return f"Symbol({self.name!r}, {self.markets!r})"
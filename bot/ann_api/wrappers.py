@@ -1,43 +1,120 @@
-from typing import AsyncIterator, List
+import logging
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
-from bot.ann_api.binance import get_new_symbols as _binance
-from bot.ann_api.bybit import get_new_symbols as _bybit
-from bot.ann_api.okx import get_new_symbols as _okx
-from bot.ann_api.bitget import get_new_symbols as _bitget
+import httpx
+
+from bot.metrics import PARSE_SECONDS
+from bot.ann_api.binance import get_new_symbols as _binance, probe_symbol as _binance_probe
+from bot.ann_api.bybit import get_new_symbols as _bybit, probe_symbol as _bybit_probe
+from bot.ann_api.okx import get_new_symbols as _okx, probe_symbol as _okx_probe
+from bot.ann_api.bitget import get_new_symbols as _bitget, probe_symbol as _bitget_probe
 from bot.ann_api.symbol import Symbol
 
 
 class _BaseApiAnnouncer:
     exchange: str
 
-    async def _fetch_raw(self) -> List[Symbol]: ...
+    def __init__(self, client: httpx.AsyncClient) -> None:
+        self.client = client  # общий клиент из bot.http.make_client()
+        # прошлый снимок инструментов: name -> Symbol (интернированный)
+        self._snapshot: Optional[Dict[str, Symbol]] = None
+
+    async def _fetch_raw(self, client: httpx.AsyncClient) -> List[Symbol]: ...
+
+    async def _probe_raw(self, client: httpx.AsyncClient, base: str) -> List[Symbol]: ...
 
     async def fetch(self) -> AsyncIterator[Symbol]:
         """
         yield Symbol(...) один за другим
         """
-        for sym in await self._fetch_raw():
+        for sym in await self._fetch_raw(self.client):
             yield sym
 
+    async def probe(self, base: str) -> List[Symbol]:
+        """
+        Инструменты одного базового актива ("FOO" → FOOUSDT …) — пара
+        маленьких запросов вместо полного списка; пусто, пока не торгуется.
+        Снимок не трогает: полный опрос потом сам увидит пару в диффе.
+        """
+        return await self._probe_raw(self.client, base)
+
+    def knows(self, name: str, market: str) -> bool:
+        """
+        Есть ли name на рынке market (Spot/Futures) в последнем снимке.
+        Пока снимка нет — считаем, что есть: первый REST-опрос всё равно
+        отдаст полный список.
+        """
+        if self._snapshot is None:
+            return True
+        have = self._snapshot.get(name)
+        return have is not None and have.market_type in (market, "Both")
+
+    def forget(self, sym: Symbol, gone: bool = False) -> None:
+        """
+        Откатить sym в снимке — уведомление о нём не ушло: следующий
+        опрос снова отдаст его в added (или в removed, если gone).
+        """
+        if self._snapshot is None:
+            return
+        if gone:
+            self._snapshot.setdefault(sym.name, sym)
+        elif self._snapshot.get(sym.name) is sym:
+            del self._snapshot[sym.name]
+
+    async def poll(self) -> Tuple[List[Symbol], List[Symbol]]:
+        """
+        Опрос с диффом против прошлого снимка: (added, removed).
+        added   — пары (name, market), которых не было в прошлом снимке
+                  (в т.ч. переход Spot -> Both);
+        removed — имена, полностью пропавшие из ответа (делистинг).
+        Первый опрос отдаёт всё в added. Неизменённый ответ — ([], []).
+        """
+        symbols = await self._fetch_raw(self.client)
+        with PARSE_SECONDS.time():
+            return self._diff(symbols)
+
+    def _diff(self, symbols: List[Symbol]) -> Tuple[List[Symbol], List[Symbol]]:
+        snapshot = {s.name: s for s in symbols}
+        prev = self._snapshot
+
+        if not snapshot:
+            # пустой ответ — скорее техработы, чем делистинг всего рынка
+            logging.warning("%s: empty instrument list, keeping previous snapshot", self.exchange)
+            return [], []
+        if snapshot == prev:
+            return [], []
+        self._snapshot = snapshot
+        if prev is None:
+            return list(symbols), []
+
+        # Symbol интернирован: тот же инструмент на тех же рынках — тот же объект
+        added = [s for n, s in snapshot.items() if prev.get(n) is not s]
+        removed = [s for n, s in prev.items() if n not in snapshot]
+        return added, removed
+
 
 class BinanceApiAnnouncer(_BaseApiAnnouncer):
     exchange = "Binance"
     _fetch_raw = staticmethod(_binance)
+    _probe_raw = staticmethod(_binance_probe)
 
 
 class BybitApiAnnouncer(_BaseApiAnnouncer):
     exchange = "Bybit"
     _fetch_raw = staticmethod(_bybit)
+    _probe_raw = staticmethod(_bybit_probe)
 
 
 class OkxApiAnnouncer(_BaseApiAnnouncer):
     exchange = "OKX"
     _fetch_raw = staticmethod(_okx)
+    _probe_raw = staticmethod(_okx_probe)
 
 
 class BitgetApiAnnouncer(_BaseApiAnnouncer):
     exchange = "Bitget"
     _fetch_raw = staticmethod(_bitget)
+    _probe_raw = staticmethod(_bitget_probe)
 
 
 API_ANNOUNCERS = (
@@ -0,0 +1,170 @@
+"""
+ws.py — push-детекция новых инструментов через публичные WebSocket-каналы.
+
+WS-поток не заменяет REST, а будит его: увидели символ, которого нет в
+последнем REST-снимке анонсера, — немедленный внеочередной опрос через
+тот же _poll_api. После каждого (пере)подключения — тоже REST-ресинк,
+чтобы закрыть пропущенное за время разрыва.
+
+Каналы «весь рынок» есть только у Binance (!miniTicker@arr) и OKX
+(instruments); Bybit и Bitget подписываются на тикеры поштучно,
+поэтому они остаются на REST-опросе.
+
+Для отладки: WS_URL_<FEED> подменяет адрес (например, на локальный
+tools/ws_replay.py), WS_RECORD_DIR — пишет принятые фреймы в jsonl.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+
+WS_RECORD_DIR = os.getenv("WS_RECORD_DIR")
+WS_MAX_BACKOFF = 60.0
+# не дёргать REST чаще раза в N секунд из-за одного и того же символа
+WS_RESYNC_COOLDOWN = float(os.getenv("WS_RESYNC_COOLDOWN", "30"))
+
+
+class WsFeed:
+    """Описание одного WS-потока биржи."""
+
+    name: str                      # BINANCE_SPOT, OKX …
+    url: str
+    subscribe: List[dict] = []     # сообщения сразу после подключения
+    keepalive: Optional[str] = None  # текстовый ping, если биржа его требует
+
+    def __init__(self) -> None:
+        self.url = os.getenv(f"WS_URL_{self.name}", self.url)
+
+    def parse(self, frame) -> Iterable[Tuple[str, str]]:
+        """(symbol, market) из одного фрейма; market — Spot / Futures."""
+        raise NotImplementedError
+
+
+class _BinanceMiniTicker(WsFeed):
+    market: str
+
+    def parse(self, frame):
+        if isinstance(frame, list):
+            for t in frame:
+                yield t.get("s", ""), self.market
+
+
+class BinanceSpotFeed(_BinanceMiniTicker):
+    name = "BINANCE_SPOT"
+    url = "wss://stream.binance.com:9443/ws/!miniTicker@arr"
+    market = "Spot"
+
+
+class BinanceFuturesFeed(_BinanceMiniTicker):
+    name = "BINANCE_FUTURES"
+    url = "wss://fstream.binance.com/ws/!miniTicker@arr"
+    market = "Futures"
+
+
+class OkxInstrumentsFeed(WsFeed):
+    name = "OKX"
+    url = "wss://ws.okx.com:8443/ws/v5/public"
+    subscribe = [{
+        "op": "subscribe",
+        "args": [
+            {"channel": "instruments", "instType": "SPOT"},
+            {"channel": "instruments", "instType": "FUTURES"},
+        ],
+    }]
+    keepalive = "ping"  # OKX рвёт соединение после 30 с тишины
+
+    def parse(self, frame):
+        if not isinstance(frame, dict) or "data" not in frame:
+            return
+        market = "Spot" if frame.get("arg", {}).get("instType") == "SPOT" else "Futures"
+        for inst in frame["data"]:
+            yield inst.get("instId", "").replace("-", ""), market
+
+
+WS_FEEDS: Dict[str, Tuple[type, ...]] = {
+    "Binance": (BinanceSpotFeed, BinanceFuturesFeed),
+    "OKX": (OkxInstrumentsFeed,),
+}
+
+
+def _recorder(feed: WsFeed):
+    if not WS_RECORD_DIR:
+        return None
+    path = Path(WS_RECORD_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return open(path / f"{feed.name.lower()}.jsonl", "a", encoding="utf-8", buffering=1)
+
+
+async def run_feed(
+    feed: WsFeed,
+    knows: Callable[[str, str], bool],
+    resync: Callable[[], None],
+) -> None:
+    """
+    Держит подключение к feed вечно: переподключение с backoff,
+    REST-ресинк после каждого подключения и на каждый незнакомый символ.
+    """
+    backoff = 1.0
+    record = _recorder(feed)
+    started = time.monotonic()
+    try:
+        async with aiohttp.ClientSession() as session:
+            while True:
+                try:
+                    async with session.ws_connect(feed.url, heartbeat=20) as ws:
+                        for msg in feed.subscribe:
+                            await ws.send_json(msg)
+                        logging.info("WS %s connected", feed.name)
+                        resync()  # закрываем окно, пока нас не было
+                        backoff = 1.0
+                        await _consume(ws, feed, knows, resync, record, started)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                    logging.warning("WS %s: %s", feed.name, exc)
+                except Exception:
+                    # битый фрейм, ошибка parse() или resync() — поток не должен умирать молча
+                    logging.exception("WS %s failed", feed.name)
+                logging.info("WS %s disconnected, reconnect in %.0fs", feed.name, backoff)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, WS_MAX_BACKOFF)
+    finally:
+        if record is not None:
+            record.close()
+
+
+async def _consume(ws, feed, knows, resync, record, started) -> None:
+    triggered: Dict[str, float] = {}
+    while True:
+        try:
+            msg = await ws.receive(timeout=20 if feed.keepalive else None)
+        except asyncio.TimeoutError:
+            await ws.send_str(feed.keepalive)
+            continue
+        if msg.type != aiohttp.WSMsgType.TEXT:
+            if msg.type in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSED,
+                            aiohttp.WSMsgType.ERROR):
+                return
+            continue
+        if record is not None:
+            record.write(json.dumps({"t": round(time.monotonic() - started, 3),
+                                     "frame": msg.data}) + "\n")
+        try:
+            frame = json.loads(msg.data)
+        except ValueError:
+            continue  # "pong" и прочие служебные строки
+        now = time.monotonic()
+        for sym, market in feed.parse(frame):
+            if not sym or knows(sym, market):
+                continue
+            if now - triggered.get(sym, -WS_RESYNC_COOLDOWN) < WS_RESYNC_COOLDOWN:
+                continue  # REST уже будили — ждём, пока снимок догонит
+            triggered[sym] = now
+            logging.info("WS %s: unknown %s (%s) → REST resync", feed.name, sym, market)
+            resync()
@@ -1,7 +1,23 @@
 from __future__ import annotations
 
+import asyncio
 from dataclasses import dataclass
-from typing import AsyncIterator, Protocol
+from datetime import datetime, timedelta, timezone
+import logging
+import os
+import re
+from typing import AsyncIterator, Awaitable, Callable, Hashable, List, Optional, Protocol, Tuple
+
+import httpx
+
+from . import cursor, http_cache
+from .titles import TitleCache, TitleRules, listing_time
+
+# догонка ленты после простоя: сколько страниц максимум и сколько параллельно
+CMS_BACKFILL_PAGES = int(os.getenv("CMS_BACKFILL_PAGES", "20"))
+CMS_BACKFILL_CONCURRENCY = int(os.getenv("CMS_BACKFILL_CONCURRENCY", "4"))
+# время старта торгов ищем в теле статьи, только если она свежее N часов
+CMS_DETAIL_MAX_AGE = timedelta(hours=float(os.getenv("CMS_DETAIL_MAX_AGE_H", "48")))
 
 @dataclass(frozen=True, slots=True)
 class Announcement:
@@ -9,17 +25,212 @@ class Announcement:
     exchange: str
     symbol: str
     details_url: str
+    published: Optional[datetime] = None  # время публикации анонса биржей
+    starts: Optional[datetime] = None     # объявленный старт торгов
 
     def key(self) -> str:  # уникальный идентификатор для дедупликации
         return f"{self.exchange}:{self.symbol}"
 
+@dataclass(frozen=True, slots=True)
+class Article:
+    """Статья из ленты биржи, до разбора заголовка."""
+    id: Hashable                          # code / annId / url — что стабильно у биржи
+    title: str
+    url: str
+    published: Optional[datetime] = None
+    starts: Optional[datetime] = None     # старт торгов, если лента его отдаёт
+
+def from_ms(value) -> Optional[datetime]:
+    """Unix-время в миллисекундах (число или строка) → aware datetime."""
+    try:
+        return datetime.fromtimestamp(int(value) / 1000, tz=timezone.utc)
+    except (TypeError, ValueError, OverflowError, OSError):
+        return None
+
+def _ms(dt: datetime) -> int:
+    return int(dt.timestamp() * 1000)
+
+def newer_than(articles: List[Article], mark: cursor.Mark) -> Tuple[List[Article], bool]:
+    """
+    Статьи, которых метка ещё не видела, и признак «метка достигнута» —
+    на странице есть уже виденная (или более старая) статья.
+    Сравнение по набору id, а не по позиции: закреплённая наверху статья
+    не прячет те, что под ней, удалённая — не запускает догонку. Есть
+    время публикации — статья старше метки тоже виденная; в ту же
+    миллисекунду (>=) новая, если её id ещё не встречался.
+    """
+    seen = set(mark.article_ids)
+    fresh = [
+        art for art in articles
+        if str(art.id) not in seen
+        and (mark.published is None or art.published is None or _ms(art.published) >= mark.published)
+    ]
+    return fresh, len(fresh) < len(articles)
+
+def _mark(articles: List[Article], prev: Optional[cursor.Mark]) -> cursor.Mark:
+    """Метка после опроса: id статей страницы (свежие первыми) + прежние, время — самое позднее."""
+    ids = dict.fromkeys([*(str(art.id) for art in articles), *(prev.article_ids if prev else ())])
+    times = [_ms(art.published) for art in articles if art.published is not None]
+    if prev is not None and prev.published is not None:
+        times.append(prev.published)
+    return cursor.Mark(tuple(ids)[:cursor.CMS_CURSOR_IDS], max(times, default=None))
+
+# подтверждение потребителя: всё отданное обработано (True) или нет
+Ack = Callable[[], Awaitable[bool]]
+
 class AnnouncerProto(Protocol):
     name: str
-    async def fetch(self) -> AsyncIterator[Announcement]:
+    client: httpx.AsyncClient
+    async def fetch(self, ack: Optional[Ack] = None) -> AsyncIterator[Announcement]:
         """Асинхронно генерирует анонсы."""
 
 class AbstractAnnouncer:
-    """Базовый класс-заглушка для IDE/типизации."""
+    """
+    Общий fetch() для CMS-анонсеров: биржа отдаёт страницы ленты (_page)
+    и правила разбора заголовков (rules), остальное здесь.
+    Из ленты берётся только то, что новее high-water mark биржи (cursor);
+    не нашлась метка на первой странице — листаем назад (_backfill).
+    Статья, уже обработанная ранее, не разбирается и не отдаётся повторно;
+    неизменившийся ответ (304 / тот же хеш) не разбирается вовсе.
+    """
     name: str = "abstract"
-    async def fetch(self) -> AsyncIterator[Announcement]:  # pragma: no cover – заглушка
-        raise NotImplementedError
\ No newline at end of file
+    rules: TitleRules
+    # поля ответа, которые меняются на каждом запросе (серверное время)
+    volatile: Optional[re.Pattern[bytes]] = None
+
+    def __init__(self, client: httpx.AsyncClient) -> None:
+        self.client = client  # общий клиент из bot.http.make_client()
+        self._done = TitleCache()
+        self._pending: Optional[Tuple[str, http_cache.Entry]] = None
+
+    def _changed(self, key: str, entry: http_cache.Entry) -> bool:
+        """False — ответ тот же, что в прошлый раз. Запись сохранится в конце fetch()."""
+        self._pending = (key, entry)  # store() сам пропустит неизменившуюся
+        return not http_cache.unchanged(key, entry)
+
+    async def _get(
+        self, url: str, *, params=None, headers=None, conditional: bool = True, **kwargs
+    ) -> Optional[httpx.Response]:
+        """
+        Условный GET: None — ответ не изменился с прошлой обработки.
+        conditional=False — обычный GET (страницы догонки кешем не покрываются).
+        """
+        if not conditional:
+            resp = await self.client.get(url, params=params, headers=headers, **kwargs)
+            resp.raise_for_status()
+            return resp
+        key = str(httpx.URL(url, params=params))
+        headers = {**(headers or {}), **http_cache.request_headers(key)}
+        resp = await self.client.get(url, params=params, headers=headers, **kwargs)
+        if resp.status_code == 304:
+            return None
+        resp.raise_for_status()
+        entry = http_cache.Entry(
+            resp.headers.get("etag"),
+            resp.headers.get("last-modified"),
+            http_cache.body_hash(resp.content, self.volatile),
+        )
+        return resp if self._changed(key, entry) else None
+
+    async def _page(self, n: int) -> Optional[List[Article]]:  # pragma: no cover – заглушка
+        """Страница n ленты, новые сверху; None — первая страница не изменилась."""
+        raise NotImplementedError
+
+    async def _detail_time(self, art: Article) -> Optional[datetime]:  # pragma: no cover – заглушка
+        """Старт торгов из тела статьи (отдельный запрос); None — не умеем или не указан."""
+        return None
+
+    async def _starts(self, art: Article, detail: bool) -> Optional[datetime]:
+        """
+        Объявленный старт торгов: из ленты, из заголовка, иначе из тела
+        статьи. За телом ходим, только если detail (статья новее
+        high-water mark, а не первое чтение всей ленты), статья не старше
+        CMS_DETAIL_MAX_AGE и в заголовке нашлись тикеры.
+        """
+        if art.starts is not None:
+            return art.starts
+        if (when := listing_time(art.title)) is not None:
+            return when
+        if not detail:
+            return None
+        if art.published is not None and datetime.now(timezone.utc) - art.published > CMS_DETAIL_MAX_AGE:
+            return None
+        try:
+            return await self._detail_time(art)
+        except Exception as exc:  # не нашли время — анонс всё равно уйдёт
+            logging.warning("%s: listing time lookup failed for %s: %s", self.name, art.url, exc)
+            return None
+
+    async def _backfill(self, mark: cursor.Mark, first: List[Article]) -> List[Article]:
+        """
+        Страницы 2, 3, … пачками по CMS_BACKFILL_CONCURRENCY параллельно,
+        пока не встретится метка, пустая страница или CMS_BACKFILL_PAGES.
+        """
+        found: List[Article] = []
+        seen = {art.id for art in first}  # лента могла сдвинуться, пока листали
+        n = 2
+        while n <= CMS_BACKFILL_PAGES:
+            batch = range(n, min(n + CMS_BACKFILL_CONCURRENCY, CMS_BACKFILL_PAGES + 1))
+            for page in await asyncio.gather(*(self._page(i) for i in batch)):
+                page = [art for art in page or () if art.id not in seen]
+                if not page:
+                    return found  # лента кончилась (или страницы не поддерживаются)
+                seen.update(art.id for art in page)
+                fresh, reached = newer_than(page, mark)
+                found += fresh
+                if reached:
+                    return found
+            n = batch.stop
+        logging.warning("%s: high-water mark not found within %d pages, older articles skipped",
+                        self.name, CMS_BACKFILL_PAGES)
+        return found
+
+    async def fetch(self, ack: Optional[Ack] = None) -> AsyncIterator[Announcement]:
+        """
+        Анонсы новее метки. Статьи помечаются обработанными, а метка и
+        кеш сдвигаются в конце: когда потребитель забрал всё и, если
+        передан ack, подтвердил обработку. ack() → False — ничего не
+        двигаем, следующий опрос отдаст те же статьи.
+        """
+        first = articles = await self._page(1) or []
+        complete = True
+        mark = cursor.get(self.name)
+        if articles and mark is not None:
+            articles, reached = newer_than(first, mark)
+            if not reached:
+                try:
+                    older = await self._backfill(mark, first)
+                except Exception as exc:
+                    # первую страницу отдаём, а метку и кеш не двигаем —
+                    # следующий опрос повторит догонку
+                    logging.warning("%s: backfill failed: %s", self.name, exc)
+                    complete = False
+                else:
+                    if older:
+                        logging.info("%s: backfilled %d articles", self.name, len(older))
+                    articles += older
+
+        done: List[Hashable] = []
+        for art in articles:
+            key = (art.id, art.title)
+            if key in self._done:
+                continue
+            tickers = self.rules.tickers(art.title)
+            # без метки (bootstrap, первый опрос) «новое» — вся лента:
+            # по запросу на статью задержали бы весь опрос
+            starts = await self._starts(art, detail=mark is not None) if tickers else None
+            for symbol in tickers:
+                yield Announcement(self.name, symbol, art.url, art.published, starts)
+            done.append(key)
+
+        if ack is not None and not await ack():
+            self._pending = None
+            return
+        for key in done:
+            self._done.add(key)
+        # весь ответ обработан — можно запомнить (и виденные, но не новые id страницы)
+        if complete and first:
+            await cursor.store(self.name, _mark([*first, *articles], mark))
+        if complete and self._pending is not None:
+            await http_cache.store(*self._pending)
+        self._pending = None
@@ -1,17 +1,21 @@
 from __future__ import annotations
 
 import os
-import re
-from typing import AsyncIterator
+from datetime import datetime
+from typing import List, Optional
 
-import httpx
-
-from ann_cms.base import AbstractAnnouncer, Announcement
+from ann_cms.base import AbstractAnnouncer, Article, from_ms
+from bot.ann_cms.titles import TitleRules, listing_time
+from bot.metrics import PARSE_SECONDS
 
 URL = (
     "https://www.binance.com/bapi/composite/v1/public/cms/article/"
     "catalog/list/query"
 )
+DETAIL_URL = (
+    "https://www.binance.com/bapi/composite/v1/public/cms/article/"
+    "detail/query"
+)
 PARAMS = {
     "catalogId": 48,
     "pageNo": 1,
@@ -29,46 +33,38 @@ HEADERS = {
 if api_key := os.getenv("BINANCE_API_KEY"):
     HEADERS["X-MBX-APIKEY"] = api_key
 
-# regex to capture ticker inside parentheses OR before USDT/USDC pair suffix
-TICKER_RX = re.compile(
-    r"\((?P<sym>[A-Z0-9_-]{2,15})\)"  # (ALT)
-    r"|"
-    r"(?P<pair>[A-Z0-9_-]{2,15})(?:USDT|USDC)",
-    re.IGNORECASE,
-)
-SUFFIXES = ("USDT", "USDC")
-# regex to filter only future listing announcements
-UPCOMING_RX = re.compile(r"\bWill\s+(List|Add)\b", re.IGNORECASE)
+# future listing announcements; tickers from (ALT) or ALTUSDT/ALTUSDC
+RULES = TitleRules(r"\bWill\s+(List|Add)\b", ("USDT", "USDC"))
 
 class BinanceAnnouncer(AbstractAnnouncer):
     name = "Binance"
+    rules = RULES
 
-    async def fetch(self) -> AsyncIterator[Announcement]:
-        async with httpx.AsyncClient(timeout=15, headers=HEADERS) as client:
-            resp = await client.get(URL, params=PARAMS)
-            resp.raise_for_status()
+    async def _page(self, n: int) -> Optional[List[Article]]:
+        resp = await self._get(URL, params={**PARAMS, "pageNo": n}, headers=HEADERS,
+                               timeout=15, conditional=n == 1)
+        if resp is None:
+            return None  # 304 или то же тело
+        with PARSE_SECONDS.time():
             data = resp.json().get("data", {})
 
         articles = data.get("articles", []) or data.get("articleList", [])
+        result = []
         for art in articles:
-            title: str = art.get("title", "")
-            # step 1 – keep only upcoming listings
-            if not UPCOMING_RX.search(title):
-                continue
-            # step 2 – extract ticker
-            m = TICKER_RX.search(title)
-            if not m:
-                continue
-            raw = (m.group("sym") or m.group("pair") or "").upper()
-            for suf in SUFFIXES:
-                if raw.endswith(suf):
-                    raw = raw[: -len(suf)]
-                    break
-            symbol = raw
-
             code = art.get("code") or art.get("id")
             url = (
                 f"https://www.binance.com/en/support/announcement/detail/{code}"
                 if code else art.get("url")
             )
-            yield Announcement(self.name, symbol, url)
+            result.append(Article(code or url, art.get("title", ""), url,
+                                  from_ms(art.get("releaseDate"))))
+        return result
+
+    async def _detail_time(self, art: Article) -> Optional[datetime]:
+        """Тело статьи — JSON-дерево текста; время ищем прямо в сыром ответе."""
+        if not isinstance(art.id, str) or art.id.startswith("http"):
+            return None
+        resp = await self.client.get(DETAIL_URL, params={"articleCode": art.id},
+                                     headers=HEADERS, timeout=15)
+        resp.raise_for_status()
+        return listing_time(resp.text)
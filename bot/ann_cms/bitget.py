@@ -1,11 +1,13 @@
 from __future__ import annotations
 
+import logging
 import re
-from typing import AsyncIterator
+from typing import List, Optional
 
-import httpx
-
-from ann_cms.base import AbstractAnnouncer, Announcement
+from ann_cms.base import CMS_BACKFILL_PAGES, AbstractAnnouncer, Article, from_ms, newer_than
+from bot.ann_cms import cursor
+from bot.ann_cms.titles import TitleRules, listing_time
+from bot.metrics import PARSE_SECONDS
 
 API_URL = "https://api.bitget.com/api/v2/public/annoucements"
 PARAMS = {
@@ -21,38 +23,54 @@ HEADERS = {
     "Accept": "application/json",
 }
 
-TICKER_RX = re.compile(
-    r"\((?P<sym>[A-Z0-9_-]{2,15})\)|(?P<pair>[A-Z0-9_-]{2,15})(?:USDT|USDC|PERP)",
-    re.IGNORECASE,
-)
-SUFFIXES = ("USDT", "USDC", "PERP")
-UPCOMING_RX = re.compile(r"Will\s+List|New Listing|Initial Listing|Launch", re.IGNORECASE)
+RULES = TitleRules(r"Will\s+List|New Listing|Initial Listing|Launch", ("USDT", "USDC", "PERP"))
 
 class BitgetAnnouncer(AbstractAnnouncer):
     name = "Bitget"
+    rules = RULES
+    volatile = re.compile(rb'"requestTime"\s*:\s*"?\d+"?')
 
-    async def fetch(self) -> AsyncIterator[Announcement]:
-        async with httpx.AsyncClient(timeout=15, headers=HEADERS) as client:
-            resp = await client.get(API_URL, params=PARAMS)
-            resp.raise_for_status()
+    async def _list(self, params: dict, conditional: bool) -> Optional[List[Article]]:
+        resp = await self._get(API_URL, params=params, headers=HEADERS,
+                               timeout=15, conditional=conditional)
+        if resp is None:
+            return None  # 304 или то же тело
+        with PARSE_SECONDS.time():
             data = resp.json()
 
         if str(data.get("code")) != "00000":
-            return
-
-        for art in data.get("data", []):
-            title: str = art.get("annTitle", "")
-            if not UPCOMING_RX.search(title):
-                continue
-            m = TICKER_RX.search(title)
-            if not m:
-                continue
-            raw = (m.group("sym") or m.group("pair") or "").upper()
-            for suf in SUFFIXES:
-                if raw.endswith(suf):
-                    raw = raw[: -len(suf)]
-                    break
-            symbol = raw
-            url = art.get("annUrl")
-            if url:
-                yield Announcement(self.name, symbol, url)
+            return []
+
+        # в annDesc (первые строки статьи) обычно есть время старта торгов
+        return [
+            Article(art.get("annId") or art["annUrl"], art.get("annTitle", ""), art["annUrl"],
+                    from_ms(art.get("cTime")), listing_time(art.get("annDesc") or ""))
+            for art in data.get("data", [])
+            if art.get("annUrl")
+        ]
+
+    async def _page(self, n: int) -> Optional[List[Article]]:
+        return await self._list(PARAMS, conditional=True)  # дальше — курсором, см. _backfill
+
+    async def _backfill(self, mark: cursor.Mark, first: List[Article]) -> List[Article]:
+        """
+        Bitget листает не номерами страниц, а курсором (annId последней
+        статьи предыдущей страницы) — поэтому догонка последовательная.
+        """
+        found: List[Article] = []
+        seen = {art.id for art in first}
+        after = first[-1].id
+        for _ in range(CMS_BACKFILL_PAGES - 1):
+            page = await self._list({**PARAMS, "cursor": after}, conditional=False)
+            page = [art for art in page or () if art.id not in seen]
+            if not page:
+                return found
+            seen.update(art.id for art in page)
+            fresh, reached = newer_than(page, mark)
+            found += fresh
+            if reached:
+                return found
+            after = page[-1].id
+        logging.warning("%s: high-water mark not found within %d pages, older articles skipped",
+                        self.name, CMS_BACKFILL_PAGES)
+        return found
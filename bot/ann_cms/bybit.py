@@ -1,11 +1,11 @@
 from __future__ import annotations
 
 import re
-from typing import AsyncIterator
+from typing import List, Optional
 
-import httpx
-
-from ann_cms.base import AbstractAnnouncer, Announcement
+from ann_cms.base import AbstractAnnouncer, Article, from_ms
+from bot.ann_cms.titles import TitleRules
+from bot.metrics import PARSE_SECONDS
 
 API_URL = "https://api.bybit.com/v5/announcements/index"
 PARAMS = {
@@ -22,43 +22,28 @@ HEADERS = {
     "Accept": "application/json",
 }
 
-# Extract ticker from (TICKER) or TICKERUSDT/USDC
-TICKER_RX = re.compile(
-    r"\((?P<sym>[A-Z0-9_-]{2,15})\)"  # (ARB)
-    r"|"
-    r"(?P<pair>[A-Z0-9_-]{2,15})(?:USDT|USDC)",
-    re.IGNORECASE,
-)
-SUFFIXES = ("USDT", "USDC")
-UPCOMING_RX = re.compile(r"New Listing", re.IGNORECASE)
+# tickers from (TICKER) or TICKERUSDT/USDC
+RULES = TitleRules(r"\bNew Listing\b", ("USDT", "USDC"))
 
 class BybitAnnouncer(AbstractAnnouncer):
     name = "Bybit"
-
-    async def fetch(self) -> AsyncIterator[Announcement]:
-        async with httpx.AsyncClient(timeout=15, headers=HEADERS) as client:
-            resp = await client.get(API_URL, params=PARAMS)
-            resp.raise_for_status()
+    rules = RULES
+    volatile = re.compile(rb'"time"\s*:\s*\d+')
+
+    async def _page(self, n: int) -> Optional[List[Article]]:
+        resp = await self._get(API_URL, params={**PARAMS, "page": n}, headers=HEADERS,
+                               timeout=15, conditional=n == 1)
+        if resp is None:
+            return None  # 304 или то же тело
+        with PARSE_SECONDS.time():
             data = resp.json()
 
         if data.get("retCode") != 0:
-            return  # maintenance or error
-
-        articles = data.get("result", {}).get("list", [])
-        for art in articles:
-            title: str = art.get("title", "")
-            if not UPCOMING_RX.search(title):
-                continue  # skip non-listing news
-
-            m = TICKER_RX.search(title)
-            if not m:
-                continue
-            raw = (m.group("sym") or m.group("pair") or "").upper()
-            for suf in SUFFIXES:
-                if raw.endswith(suf):
-                    raw = raw[: -len(suf)]
-                    break
-            symbol = raw
-
-            url = art.get("url")
-            yield Announcement(self.name, symbol, url)
+            return []  # maintenance or error
+
+        # startDateTimestamp у new_crypto — объявленный старт торгов
+        return [
+            Article(art.get("url"), art.get("title", ""), art.get("url"),
+                    from_ms(art.get("publishTime")), from_ms(art.get("startDateTimestamp")))
+            for art in data.get("result", {}).get("list", [])
+        ]
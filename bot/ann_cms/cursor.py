@@ -0,0 +1,59 @@
+"""
+cursor.py — high-water mark CMS-лент
+• Mark — id последних CMS_CURSOR_IDS уже обработанных статей биржи
+  (свежие первыми) и самое позднее время публикации (ms; у OKX времени
+  в ленте нет — только id). Набор, а не одна статья: удалённая или
+  закреплённая наверху статья не сбивает метку;
+• обычный опрос берёт из первой страницы только то, чего метка не видела;
+• метки не нашлось на первой странице (бот лежал, лента убежала) —
+  announcer листает назад, пока не дойдёт до неё (см. AbstractAnnouncer);
+• записи лежат в SQLite (таблица cms_cursor) и переживают рестарт.
+Как и http_cache, метка двигается только после того, как все новые
+статьи обработаны потребителем.
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from bot.db import cms_cursor_load, cms_cursor_put
+
+CMS_CURSOR_IDS = int(os.getenv("CMS_CURSOR_IDS", "50"))  # сколько последних id помнить
+
+
+@dataclass(frozen=True, slots=True)
+class Mark:
+    article_ids: Tuple[str, ...]  # свежие первыми
+    published: Optional[int]      # unix ms
+
+
+_MARKS: Dict[str, Mark] = {}
+_DB = None  # без load() метки живут только в памяти (bench, soak)
+
+
+async def load_cursors(db) -> None:
+    global _DB
+    _DB = db
+    _MARKS.clear()
+    # id через пробел; старые записи — один id
+    for exchange, article_ids, published in await cms_cursor_load(db):
+        _MARKS[exchange] = Mark(tuple(article_ids.split()), published)
+
+
+def reset() -> None:
+    """Забыть метки в памяти — лента снова читается целиком (bench, тесты)."""
+    _MARKS.clear()
+
+
+def get(exchange: str) -> Optional[Mark]:
+    return _MARKS.get(exchange)
+
+
+async def store(exchange: str, mark: Mark) -> None:
+    if _MARKS.get(exchange) == mark:
+        return
+    _MARKS[exchange] = mark
+    if _DB is not None:
+        await cms_cursor_put(_DB, exchange, " ".join(mark.article_ids), mark.published)
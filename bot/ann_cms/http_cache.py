@@ -0,0 +1,72 @@
+"""
+http_cache.py — условные запросы для CMS-лент
+• ETag / Last-Modified → If-None-Match / If-Modified-Since, 304 = «без изменений»;
+• биржа валидаторов не шлёт — сравниваем хеш тела (изменчивые поля
+  вроде серверного "time" вырезаются перед хешированием);
+• записи лежат в SQLite (таблица http_cache) и переживают рестарт.
+Запись обновляет announcer — и только после того, как все статьи
+ответа обработаны (см. AbstractAnnouncer.fetch).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from bot.db import http_cache_load, http_cache_put
+
+
+@dataclass(frozen=True, slots=True)
+class Entry:
+    etag: Optional[str]
+    last_modified: Optional[str]
+    body_hash: str
+
+
+_ENTRIES: Dict[str, Entry] = {}
+_DB = None  # без load() кеш живёт только в памяти (bench, soak)
+
+
+async def load_http_cache(db) -> None:
+    global _DB
+    _DB = db
+    _ENTRIES.clear()
+    for url, etag, last_modified, body_hash in await http_cache_load(db):
+        _ENTRIES[url] = Entry(etag, last_modified, body_hash)
+
+
+def reset() -> None:
+    """Забыть всё в памяти — следующий опрос как с чистого листа (bench, тесты)."""
+    _ENTRIES.clear()
+
+
+def request_headers(key: str) -> Dict[str, str]:
+    entry = _ENTRIES.get(key)
+    headers: Dict[str, str] = {}
+    if entry is not None:
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+    return headers
+
+
+def body_hash(body: bytes, volatile: Optional[re.Pattern[bytes]] = None) -> str:
+    if volatile is not None:
+        body = volatile.sub(b"", body)
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def unchanged(key: str, entry: Entry) -> bool:
+    old = _ENTRIES.get(key)
+    return old is not None and old.body_hash == entry.body_hash
+
+
+async def store(key: str, entry: Entry) -> None:
+    if _ENTRIES.get(key) == entry:
+        return
+    _ENTRIES[key] = entry
+    if _DB is not None:
+        await http_cache_put(_DB, key, entry.etag, entry.last_modified, entry.body_hash)
@@ -1,12 +1,18 @@
 from __future__ import annotations
 
+import asyncio
+import html
+import logging
 import re
-from typing import AsyncIterator
+from datetime import datetime
+from typing import List, Optional, Tuple
 
-import httpx
 from bs4 import BeautifulSoup
 
-from ann_cms.base import AbstractAnnouncer, Announcement
+from ann_cms.base import AbstractAnnouncer, Article
+from bot.ann_cms import http_cache
+from bot.ann_cms.titles import TitleRules, listing_time
+from bot.metrics import PARSE_SECONDS
 
 URL = "https://www.okx.com/help/section/announcements-new-listings"
 HEADERS = {
@@ -18,40 +24,106 @@ HEADERS = {
     "Accept-Language": "en-US,en;q=0.9",
 }
 
-TICKER_RX = re.compile(
-    r"\((?P<sym>[A-Z0-9_-]{2,15})\)"          # (ALT)
-    r"|"
-    r"(?P<pair>[A-Z0-9_-]{2,15})(?:USDT|USDC)",  # ALTUSDT
-    re.IGNORECASE,
-)
-UPCOMING_RX = re.compile(r"Will\s+List|Token Listing", re.IGNORECASE)
-SUFFIXES = ("USDT", "USDC")
+RULES = TitleRules(r"Will\s+List|Token Listing", ("USDT", "USDC"))
+
+# ───────────── быстрый разбор: только <a class="article-item"> ─────────────
+_A_RX = re.compile(r"<a\b([^>]*)>(.*?)</a\s*>", re.IGNORECASE | re.DOTALL)
+_TAG_RX = re.compile(r"<[^>]*>")
+# что идёт сразу после списка статей — дальше страницу можно не качать
+_END_RX = re.compile(r"""class\s*=\s*["'][^"']*\bpagination\b|<footer\b""", re.IGNORECASE)
+
+
+def _attr(attrs: str, name: str) -> Optional[str]:
+    m = re.search(
+        rf"""\b{name}\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""", attrs, re.IGNORECASE
+    )
+    if m is None:
+        return None
+    return html.unescape(next(g for g in m.groups() if g is not None))
+
+
+def _text(body: str) -> str:
+    """Как bs4 get_text(" ", strip=True): куски текста без тегов через пробел."""
+    parts = (html.unescape(t).strip() for t in _TAG_RX.split(body))
+    return " ".join(p for p in parts if p)
+
+
+def _scan(buf: str, pos: int, out: List[Tuple[str, str]]) -> int:
+    """Дописывает в out (href, title) всех полных карточек после pos."""
+    for m in _A_RX.finditer(buf, pos):
+        classes = _attr(m.group(1), "class")
+        if classes and "article-item" in classes.split():
+            out.append((_attr(m.group(1), "href") or "", _text(m.group(2))))
+        pos = m.end()
+    return pos
+
+
+def extract_fast(page: str) -> List[Tuple[str, str]]:
+    items: List[Tuple[str, str]] = []
+    _scan(page, 0, items)
+    return items
+
+
+def extract_soup(page: str) -> List[Tuple[str, str]]:
+    """Эталонный (медленный) разбор — запасной путь при смене вёрстки."""
+    soup = BeautifulSoup(page, "html.parser")
+    # карточки списка: <a class="article-item" href="/help/article/...">
+    return [(a.get("href", ""), a.get_text(" ", strip=True)) for a in soup.select("a.article-item")]
+
 
 class OkxAnnouncer(AbstractAnnouncer):
     name = "OKX"
+    rules = RULES
 
-    async def fetch(self) -> AsyncIterator[Announcement]:
-        async with httpx.AsyncClient(timeout=20, headers=HEADERS) as client:
-            r = await client.get(URL, follow_redirects=True)
+    async def _page(self, n: int) -> Optional[List[Article]]:
+        """
+        Страница читается потоком: карточки вынимаются регуляркой по мере
+        прихода чанков, после конца списка загрузка обрывается. Не нашли
+        ни одной карточки — вёрстка сменилась, разбираем BeautifulSoup
+        в отдельном потоке, чтобы не держать event loop.
+        Страница полна одноразовых токенов, поэтому «не изменилось»
+        проверяется по хешу найденных карточек, а не всего тела.
+        Догонка (n > 1) идёт по /page/N без условных заголовков.
+        """
+        items: List[Tuple[str, str]] = []
+        buf, pos = "", 0
+        page_url = URL if n == 1 else f"{URL}/page/{n}"
+        headers = {**HEADERS, **http_cache.request_headers(URL)} if n == 1 else HEADERS
+        async with self.client.stream(
+            "GET", page_url, headers=headers, timeout=20, follow_redirects=True
+        ) as r:
+            if r.status_code == 304:
+                return None
+            if r.status_code == 404 and n > 1:
+                return []  # страницы за концом ленты нет
             r.raise_for_status()
-            soup = BeautifulSoup(r.text, "html.parser")
-
-        # карточки списка: <a class="article-item" href="/help/article/...">
-        for a in soup.select("a.article-item"):
-            title = a.get_text(" ", strip=True)
-            if not UPCOMING_RX.search(title):
-                continue  # не будущий листинг
-
-            m = TICKER_RX.search(title)
-            if not m:
-                continue
-            raw = (m.group("sym") or m.group("pair") or "").upper()
-            for suf in SUFFIXES:
-                if raw.endswith(suf):
-                    raw = raw[: -len(suf)]
-                    break
-            symbol = raw
-
-            href = a.get("href", "")
+            etag, last_modified = r.headers.get("etag"), r.headers.get("last-modified")
+            async for chunk in r.aiter_text():
+                buf += chunk
+                with PARSE_SECONDS.time():
+                    pos = _scan(buf, pos, items)
+                    if items and _END_RX.search(buf, pos):
+                        break
+
+        if not items and "article-item" in buf:
+            logging.warning("OKX: no a.article-item found by fast scan, falling back to BeautifulSoup")
+            with PARSE_SECONDS.time():
+                items = await asyncio.to_thread(extract_soup, buf)
+
+        cards = "\n".join(f"{href}\t{title}" for href, title in items).encode()
+        if n == 1 and not self._changed(URL, http_cache.Entry(etag, last_modified, http_cache.body_hash(cards))):
+            return None
+
+        result = []
+        for href, title in items:
+            if not href:
+                continue  # карточка без ссылки: ни id, ни статьи
             url = href if href.startswith("http") else f"https://www.okx.com{href}"
-            yield Announcement(self.name, symbol, url)
+            result.append(Article(href, title, url))
+        return result
+
+    async def _detail_time(self, art: Article) -> Optional[datetime]:
+        """Время старта торгов — из текста самой статьи (в ленте его нет)."""
+        resp = await self.client.get(art.url, headers=HEADERS, timeout=20, follow_redirects=True)
+        resp.raise_for_status()
+        return listing_time(_text(resp.text))
@@ -0,0 +1,144 @@
+"""
+titles.py — общий разбор заголовков CMS-анонсов.
+
+TitleRules   — правила биржи: какие заголовки считать будущим листингом
+               и какие суффиксы пар срезать; tickers() возвращает ВСЕ
+               тикеры заголовка ("Will List A (A), B (B) and C (C)"),
+               а без скобок — голый перечень сразу после «Will List»
+               ("Will List A, B and C"). Скобки без буквы — даты, числа —
+               и служебные слова ("(Spot)", "(Updated)") тикерами не считаются.
+TitleCache   — ограниченный LRU уже обработанных статей: ключ —
+               (id статьи, заголовок), поэтому правка заголовка биржей
+               снова отправит статью в разбор.
+listing_time — время старта торгов из текста анонса (заголовка,
+               описания или тела статьи), если оно там указано.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Hashable, Optional, Sequence, Tuple
+
+from dateutil import parser as dtparse
+
+CMS_TITLE_CACHE = int(os.getenv("CMS_TITLE_CACHE", "512"))
+
+# "2025-06-03 10:00 (UTC)", "Jun 3, 2025, 10:00 (UTC)", "3 June 2025 10:00 UTC"
+_MONTHS = r"(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)"
+_MONTH = _MONTHS + r"[a-z]*\.?"
+_CLOCK = r"\d{1,2}:\d{2}(?::\d{2})?(?:\s*[AP]M)?"
+_WHEN_RX = re.compile(
+    r"(?P<when>"
+    r"\d{4}[-/.]\d{1,2}[-/.]\d{1,2}[\sT,]+(?:at\s+)?" + _CLOCK +
+    r"|" + _MONTH + r"\s+\d{1,2}(?:st|nd|rd|th)?,?\s+\d{4},?\s+(?:at\s+)?" + _CLOCK +
+    r"|\d{1,2}(?:st|nd|rd|th)?\s+" + _MONTH + r",?\s+\d{4},?\s+(?:at\s+)?" + _CLOCK +
+    r")\s*\(?UTC\)?",
+    re.IGNORECASE,
+)
+# в статье несколько времён (депозиты, торги, выводы) — нужно то, что про торги
+_TRADING_RX = re.compile(r"\btrad(?:e|ing)\b", re.IGNORECASE)
+_CONTEXT = 120  # сколько символов перед датой искать слово-подсказку
+
+# то, что биржи пишут в скобках или капсом рядом с тикерами, но тикером не является
+_NOT_TICKERS = frozenset({
+    "SPOT", "FUTURES", "FUTURE", "PERP", "PERPETUAL", "PERPETUALS", "MARGIN", "OPTIONS",
+    "CONTRACT", "CONTRACTS", "USDT", "USDC", "USD", "USDT-M", "COIN-M",
+    "UTC", "GMT", "TBA", "TBD", "UPDATE", "UPDATED", "NEW",
+})
+_HAS_LETTER = re.compile(r"[A-Z]", re.IGNORECASE)
+# 13JUN25, JUN2025 — дата контракта, а не тикер
+_DATE_WORD = re.compile(r"\d{0,2}" + _MONTHS + r"\d{2,4}", re.IGNORECASE)
+_BARE = r"[A-Z][A-Z0-9]{1,14}"  # голый тикер перечня — только капсом, как пишут биржи
+_BARE_LIST = re.compile(
+    r"[\s:]*(?P<list>" + _BARE + r"(?:\s*(?:,|&|\band\b)\s*" + _BARE + r")*)\b"
+)
+_BARE_SPLIT = re.compile(r"\s*(?:,|&|\band\b)\s*")
+
+
+def _is_ticker(raw: str) -> bool:
+    return bool(_HAS_LETTER.search(raw)) and raw not in _NOT_TICKERS and not _DATE_WORD.fullmatch(raw)
+
+
+def listing_time(text: str) -> Optional[datetime]:
+    """
+    Время старта торгов (aware, UTC) из текста; None — не указано.
+    Берётся первое время в UTC, перед которым упомянуты торги; время
+    без такой подсказки (депозиты, выводы) — не старт торгов, и по нему
+    учащённый опрос не планируется.
+    """
+    for m in _WHEN_RX.finditer(text):
+        try:
+            when = dtparse.parse(re.sub(r"\bat\b|(?<=\d)(?:st|nd|rd|th)\b", " ", m.group("when")))
+        except (ValueError, OverflowError):
+            continue
+        when = when.replace(tzinfo=timezone.utc)
+        if _TRADING_RX.search(text, max(0, m.start() - _CONTEXT), m.start()):
+            return when
+    return None
+
+
+class TitleRules:
+    def __init__(self, upcoming: str, suffixes: Sequence[str] = ("USDT", "USDC")) -> None:
+        self.upcoming = re.compile(upcoming, re.IGNORECASE)
+        self.suffixes = tuple(suffixes)
+        # (ALT) или ALTUSDT / ALTUSDC / …
+        self.ticker = re.compile(
+            r"\((?P<sym>[A-Z0-9_-]{2,15})\)"
+            r"|"
+            r"(?P<pair>[A-Z0-9_-]{2,15})(?:" + "|".join(map(re.escape, self.suffixes)) + ")",
+            re.IGNORECASE,
+        )
+
+    def tickers(self, title: str) -> Tuple[str, ...]:
+        """Тикеры из заголовка будущего листинга, без повторов; иначе ()."""
+        if not self.upcoming.search(title):
+            return ()
+        found: dict[str, None] = {}  # упорядоченное множество
+        for m in self.ticker.finditer(title):
+            raw = (m.group("sym") or m.group("pair")).upper()
+            if m.group("sym") is not None and not _is_ticker(raw):
+                continue  # (2025-06-03), (Spot), (Updated)
+            raw = self._strip(raw)
+            if raw and _is_ticker(raw):
+                found[raw] = None
+        if not found:
+            for raw in self._bare(title):
+                found[raw] = None
+        return tuple(found)
+
+    def _strip(self, raw: str) -> str:
+        for suf in self.suffixes:
+            if raw.endswith(suf):
+                return raw[: -len(suf)]
+        return raw
+
+    def _bare(self, title: str) -> Tuple[str, ...]:
+        """Перечень без скобок сразу после слов листинга: "Will List A, B and C for …"."""
+        m = _BARE_LIST.match(title, self.upcoming.search(title).end())
+        if m is None:
+            return ()
+        items = (self._strip(raw) for raw in _BARE_SPLIT.split(m.group("list")))
+        return tuple(raw for raw in items if _is_ticker(raw))
+
+
+class TitleCache:
+    """LRU-множество ключей статей, уже разобранных и обработанных."""
+
+    def __init__(self, maxsize: int = CMS_TITLE_CACHE) -> None:
+        self.maxsize = maxsize
+        self._keys: OrderedDict[Hashable, None] = OrderedDict()
+
+    def __contains__(self, key: Hashable) -> bool:
+        if key in self._keys:
+            self._keys.move_to_end(key)
+            return True
+        return False
+
+    def add(self, key: Hashable) -> None:
+        self._keys[key] = None
+        self._keys.move_to_end(key)
+        if len(self._keys) > self.maxsize:
+            self._keys.popitem(last=False)
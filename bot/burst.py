@@ -0,0 +1,112 @@
+"""
+burst.py — учащённый опрос вокруг объявленного времени листинга
+• CMS-анонс со временем старта торгов → plan(): запись в таблицу bursts
+  (её видят и воркеры других процессов) и пробуждение своего раннера;
+• REST-раннер биржи держит BurstWatch: с BURST_LEAD секунд до старта и
+  до BURST_WINDOW после он раз в BURST_INTERVAL спрашивает биржу только
+  об этом символе (api.probe) — не о всём списке инструментов;
+• появился новый рынок символа — алерт сразу, план снят; нашлись только
+  уже известные инструменты (спот давно торгуется, ждём фьючерс) —
+  опрос продолжается; окно закрылось — план снят, пару (если она
+  всё-таки появится) увидит обычный опрос.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List
+
+from bot.db import burst_done, burst_load, burst_put
+
+BURST_LEAD = float(os.getenv("BURST_LEAD", "30"))          # начать за N сек до старта
+BURST_WINDOW = float(os.getenv("BURST_WINDOW", "300"))     # держать N сек после старта
+BURST_INTERVAL = float(os.getenv("BURST_INTERVAL", "2"))   # шаг учащённого опроса, сек
+BURST_REFRESH = float(os.getenv("BURST_REFRESH", "60"))    # перечитать планы из БД, сек
+
+# биржа → наблюдатель в этом процессе (будим, когда план добавлен здесь же)
+_WATCHES: Dict[str, "BurstWatch"] = {}
+
+
+async def plan(db, exchange: str, symbol: str, starts: datetime) -> None:
+    await burst_put(db, exchange, symbol, starts.timestamp())
+    logging.info("Burst planned: %s %s at %s", exchange, symbol, starts.isoformat())
+    watch = _WATCHES.get(exchange)
+    if watch is not None:
+        watch.wake()
+
+
+class BurstWatch:
+    """
+    Учащённый опрос одной биржи. probe(базовый актив) → найденные
+    инструменты; on_found(инструменты, объявленный старт) — алерт,
+    True — среди них был рынок, которого раньше не было.
+    """
+
+    def __init__(
+        self,
+        exchange: str,
+        db,
+        probe: Callable[[str], Awaitable[list]],
+        on_found: Callable[[list, float], Awaitable[bool]],
+    ) -> None:
+        self.exchange = exchange
+        self.db = db
+        self.probe = probe
+        self.on_found = on_found
+        self._wake = asyncio.Event()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    async def run(self) -> None:
+        _WATCHES[self.exchange] = self
+        try:
+            while True:
+                started = time.monotonic()
+                try:
+                    delay = await self._step()
+                except Exception as exc:  # БД занята и т.п. — не роняем REST-раннер
+                    logging.error("Burst %s failed: %s", self.exchange, exc)
+                    delay = BURST_INTERVAL
+                delay -= time.monotonic() - started
+                if delay > 0:
+                    try:
+                        await asyncio.wait_for(self._wake.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+                self._wake.clear()
+        finally:
+            if _WATCHES.get(self.exchange) is self:
+                del _WATCHES[self.exchange]
+
+    async def _step(self) -> float:
+        """Один проход по планам биржи; результат — сколько спать до следующего."""
+        now = time.time()
+        active: List[tuple[str, float]] = []
+        sleep = BURST_REFRESH
+        for symbol, starts in await burst_load(self.db, self.exchange):
+            if now > starts + BURST_WINDOW:
+                logging.warning("Burst %s %s: not trading %ds after announced start, back to normal polling",
+                                self.exchange, symbol, BURST_WINDOW)
+                await burst_done(self.db, self.exchange, symbol)
+            elif now >= starts - BURST_LEAD:
+                active.append((symbol, starts))
+            else:
+                sleep = min(sleep, starts - BURST_LEAD - now)
+        if not active:
+            return sleep
+
+        results = await asyncio.gather(*(self.probe(s) for s, _ in active), return_exceptions=True)
+        for (symbol, starts), found in zip(active, results):
+            if isinstance(found, BaseException):
+                logging.warning("Burst %s %s: probe failed: %s", self.exchange, symbol, found)
+            elif found and await self.on_found(found, starts):
+                await burst_done(self.db, self.exchange, symbol)
+                lag = time.time() - starts
+                logging.info("Burst %s %s: trading %+.1fs from announced start", self.exchange, symbol, lag,
+                             extra={"exchange": self.exchange, "symbol": symbol, "latency": round(lag, 3)})
+        return BURST_INTERVAL
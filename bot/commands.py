@@ -0,0 +1,152 @@
+"""
+commands.py — команды бота для подписчиков
+/subscribe [биржи] [рынки] — подписать чат (без аргументов — на всё);
+/unsubscribe               — отписать;
+/filters                   — показать текущую подписку.
+Биржи: Binance Bybit OKX Bitget; рынки: spot futures cms (анонсы).
+В группах подписку меняют только администраторы чата.
+Соединение с БД приходит из dp.start_polling(..., db=db).
+Для админов (TG_ADMINS — id пользователей через запятую):
+/profile [сек] | stop       — сэмплирующий профайлер процесса с
+                              командами (bot/profiler.py); воркеры
+                              шардированного режима — через SIGUSR1.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from html import escape
+
+from aiogram import Router
+from aiogram.enums import ChatMemberStatus, ChatType
+from aiogram.exceptions import TelegramAPIError
+from aiogram.filters import Command, CommandObject, CommandStart
+from aiogram.types import FSInputFile, Message
+
+from bot.profiler import PROFILE_MAX_SECONDS, PROFILE_SECONDS, SAMPLER, top_frames
+from bot.subscribers import (
+    EXCHANGES,
+    INDEX,
+    MARKETS,
+    Subscription,
+    parse_filters,
+    subscribe,
+    unsubscribe,
+)
+from bot.telegram import CHAT_ID
+
+router = Router(name="subscriptions")
+
+TG_ADMINS = frozenset(filter(None, (a.strip() for a in os.getenv("TG_ADMINS", "").split(","))))
+
+HELP = (
+    "Подписка на новые листинги:\n"
+    "<code>/subscribe</code> — всё подряд\n"
+    "<code>/subscribe binance okx spot</code> — только эти биржи и рынки\n"
+    "<code>/unsubscribe</code> — отписаться, <code>/filters</code> — текущие фильтры\n\n"
+    f"Биржи: {', '.join(EXCHANGES)}\n"
+    f"Рынки: {', '.join(MARKETS)} (cms — анонсы бирж)"
+)
+
+
+async def _can_manage(message: Message) -> bool:
+    """
+    Менять подписку чата: в личке — всегда, в группе — администратор
+    чата (или анонимный админ, пишущий от имени группы). Канал и так
+    пишут только админы.
+    """
+    chat = message.chat
+    if chat.type in (ChatType.PRIVATE, ChatType.CHANNEL):
+        return True
+    if message.sender_chat is not None:
+        return message.sender_chat.id == chat.id
+    if message.from_user is None:
+        return False
+    try:
+        member = await message.bot.get_chat_member(chat.id, message.from_user.id)
+    except TelegramAPIError as exc:
+        logging.warning("Can't check admin rights in %s: %s", chat.id, exc)
+        return False
+    return member.status in (ChatMemberStatus.CREATOR, ChatMemberStatus.ADMINISTRATOR)
+
+
+@router.message(CommandStart())
+async def cmd_start(message: Message) -> None:
+    await message.answer(HELP)
+
+
+@router.message(Command("subscribe"))
+async def cmd_subscribe(message: Message, command: CommandObject, db) -> None:
+    chat_id = str(message.chat.id)
+    if chat_id == CHAT_ID:
+        await message.answer("Это основной чат бота — сюда и так приходит всё.")
+        return
+    if not await _can_manage(message):
+        await message.answer("Менять подписку группы могут только её администраторы.")
+        return
+    exchanges, markets, unknown = parse_filters((command.args or "").split())
+    if unknown:
+        await message.answer(f"Не понял: {' '.join(unknown)}\n\n{HELP}")
+        return
+    sub = Subscription(chat_id, exchanges, markets)
+    await subscribe(db, sub)
+    logging.info("Subscribed %s: %s", chat_id, sub.describe())
+    await message.answer(f"Готово: {sub.describe()}")
+
+
+@router.message(Command("unsubscribe"))
+async def cmd_unsubscribe(message: Message, db) -> None:
+    chat_id = str(message.chat.id)
+    if chat_id == CHAT_ID:
+        await message.answer("Основной чат задан в .env (CHAT_ID) и не отписывается.")
+        return
+    if not await _can_manage(message):
+        await message.answer("Менять подписку группы могут только её администраторы.")
+        return
+    if await unsubscribe(db, chat_id):
+        logging.info("Unsubscribed %s", chat_id)
+        await message.answer("Подписка отменена.")
+    else:
+        await message.answer("Чат и не был подписан.")
+
+
+@router.message(Command("filters"))
+async def cmd_filters(message: Message) -> None:
+    sub = INDEX.get(str(message.chat.id))
+    if sub is None:
+        await message.answer("Подписки нет. /subscribe — подписаться.")
+    else:
+        await message.answer(f"Подписка: {sub.describe()}")
+
+
+# ───────────────────────────── админам ─────────────────────────────
+def _is_admin(message: Message) -> bool:
+    return message.from_user is not None and str(message.from_user.id) in TG_ADMINS
+
+
+@router.message(Command("profile"))
+async def cmd_profile(message: Message, command: CommandObject) -> None:
+    if not _is_admin(message):
+        await message.answer("Команда только для админов (TG_ADMINS в .env).")
+        return
+    arg = (command.args or "").strip().lower()
+    if arg == "stop":
+        if SAMPLER.running:
+            SAMPLER.stop()  # файл пришлёт тот /profile, что профайлер запустил
+        else:
+            await message.answer("Профайлер не запущен.")
+        return
+    try:
+        seconds = float(arg) if arg else PROFILE_SECONDS
+    except ValueError:
+        await message.answer("Использование: <code>/profile [секунды]</code> или <code>/profile stop</code>")
+        return
+    if not SAMPLER.start(seconds):
+        await message.answer("Профайлер уже работает; <code>/profile stop</code> — остановить.")
+        return
+    await message.answer(f"Профилирую до {min(max(seconds, 1.0), PROFILE_MAX_SECONDS):.0f} с…")
+
+    path = await SAMPLER.wait()
+    hot = "\n".join(f"{share:4.0%}  <code>{escape(name)}</code>" for name, share in top_frames(path))
+    await message.answer_document(FSInputFile(path), caption=f"Горячие места:\n{hot}"[:1024])
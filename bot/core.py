@@ -1,19 +1,30 @@
 """
 core.py — инициализация бота и логирования
 Совместимо с aiogram ≥ 3.7.0
+Логирование не пишет в файл из event loop: корневой логгер отдаёт
+записи в очередь (QueueHandler), а форматирование, вывод в консоль и
+запись/ротацию файла делает фоновый поток QueueListener.
+LOG_JSON=1 — файл в формате JSON lines (logs/criptabot.jsonl) с полями
+source (api:Binance, cms:OKX …) и extra= вызова: exchange, symbol, latency…
 """
 
 from __future__ import annotations
 
+import atexit
+import json
 import logging
 import os
+import queue
+from datetime import datetime, timezone
 from pathlib import Path
-from logging.handlers import RotatingFileHandler   #  <<< NEW
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler   #  <<< NEW
 
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from dotenv import load_dotenv
 
+from bot.metrics import SOURCE
+
 # ─────────────────────────── env & dirs ────────────────────────────
 BASE_DIR = Path(__file__).resolve().parent.parent
 load_dotenv(BASE_DIR / ".env")
@@ -24,12 +35,57 @@ if not BOT_TOKEN:
 
 LOG_DIR = BASE_DIR / "logs"                       #  <<< NEW
 LOG_DIR.mkdir(exist_ok=True)                      #  <<< NEW
-LOG_FILE = LOG_DIR / "criptabot.log"              #  <<< NEW
+LOG_JSON = os.getenv("LOG_JSON", "0").lower() in ("1", "true", "yes", "on")
+LOG_NAME = os.getenv("LOG_NAME", "criptabot")    # воркеры шардов — criptabot-wN
+LOG_FILE = LOG_DIR / f"{LOG_NAME}.{'jsonl' if LOG_JSON else 'log'}"
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 
 # ────────────────────────── logging setup ──────────────────────────
 LOG_FMT = "[%(asctime)s] %(levelname)s:%(name)s — %(message)s"
 DATE_FMT = "%Y-%m-%d %H:%M:%S"
 
+# атрибуты любой LogRecord — всё остальное пришло через extra=
+_RECORD_FIELDS = frozenset(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна запись — одна строка JSON: ts, level, logger, msg, source и поля extra=."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update((k, v) for k, v in record.__dict__.items() if k not in _RECORD_FIELDS)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _AsyncQueueHandler(QueueHandler):
+    """
+    В вызывающем потоке — только дешёвое: подставить аргументы в текст
+    (они могут измениться, пока запись в очереди) и запомнить источник.
+    Трейсбек форматирует уже поток-слушатель.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if not hasattr(record, "source"):
+            source = SOURCE.get()
+            if source != "-":
+                record.source = source
+        return record
+
+
 # 1) console
 console_handler = logging.StreamHandler()
 console_handler.setFormatter(logging.Formatter(LOG_FMT, DATE_FMT))
@@ -41,12 +97,18 @@ file_handler = RotatingFileHandler(
     backupCount=5,              # scriptabot.log.1 … .5
     encoding="utf-8",
 )
-file_handler.setFormatter(logging.Formatter(LOG_FMT, DATE_FMT))
+file_handler.setFormatter(JsonFormatter() if LOG_JSON else logging.Formatter(LOG_FMT, DATE_FMT))
+
+# 3) event loop → очередь → фоновый поток → console + file
+log_queue: queue.SimpleQueue = queue.SimpleQueue()
+log_listener = QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
 
 logging.basicConfig(
-    level=logging.INFO,
-    handlers=[console_handler, file_handler],     #  <<< NEW
+    level=LOG_LEVEL,
+    handlers=[_AsyncQueueHandler(log_queue)],
 )
+log_listener.start()
+atexit.register(log_listener.stop)  # дописать очередь до выхода процесса
 
 # ────────────────────────── aiogram objects ────────────────────────
 bot = Bot(
@@ -1,23 +1,103 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+import os
 import pathlib
 import re
+import time
 from typing import Final
 
 import aiosqlite
 
+from bot.ann_api.symbol import Market
+from bot.metrics import DB_SECONDS
+
 # ────────────────────── path & schema ──────────────────────
 DB_PATH: Final[pathlib.Path] = pathlib.Path("data") / "listings.db"
 
-SCHEMA_SQL: Final[str] = """
+# сколько дней помнить ключи отправленных уведомлений (защита от дублей)
+NOTIFIED_TTL_DAYS: Final[int] = int(os.getenv("NOTIFIED_TTL_DAYS", "7"))
+
+# group commit: как часто и какими пачками писатель сбрасывает listings
+FLUSH_INTERVAL: Final[float] = int(os.getenv("DB_FLUSH_MS", "200")) / 1000
+FLUSH_BATCH: Final[int] = int(os.getenv("DB_FLUSH_BATCH", "1000"))
+# неудачная пачка повторяется с паузой до FLUSH_RETRY_MAX сек; при закрытии
+# ждём её не дольше FLUSH_CLOSE_TIMEOUT — остаток теряется (и будет замечен заново)
+FLUSH_RETRY_MAX: Final[float] = float(os.getenv("DB_FLUSH_RETRY_MAX", "30"))
+FLUSH_CLOSE_TIMEOUT: Final[float] = float(os.getenv("DB_FLUSH_CLOSE_TIMEOUT", "10"))
+
+LISTINGS_SQL: Final[str] = """
+-- одна строка на (биржа, базовый актив): рынки — битовая маска Market,
+-- у каждого рынка и у CMS-анонса — время, когда его увидели впервые
 CREATE TABLE IF NOT EXISTS listings (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    exchange   TEXT NOT NULL,
+    symbol     TEXT NOT NULL,           -- listing_key(): FOOUSDT, FOO → FOO
+    markets    INTEGER NOT NULL DEFAULT 0,
+    announced  TIMESTAMP,               -- CMS
+    spot       TIMESTAMP,               -- API, спот
+    futures    TIMESTAMP,               -- API, любые деривативы
+    created    TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(exchange, symbol)
+);
+"""
+
+SCHEMA_SQL: Final[str] = LISTINGS_SQL + """
+-- исходящие сообщения Telegram: строка живёт, пока не доставлена
+CREATE TABLE IF NOT EXISTS outbox (
     id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id   TEXT NOT NULL,
+    text      TEXT NOT NULL,
+    source    TEXT NOT NULL DEFAULT '',  -- api:Binance, cms:OKX … — метка метрик отправки
+    created   TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- валидаторы CMS-ответов: ETag / Last-Modified / хеш тела
+CREATE TABLE IF NOT EXISTS http_cache (
+    url            TEXT PRIMARY KEY,
+    etag           TEXT,
+    last_modified  TEXT,
+    body_hash      TEXT NOT NULL,
+    updated        TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- high-water mark CMS-лент: последняя обработанная статья биржи
+CREATE TABLE IF NOT EXISTS cms_cursor (
+    exchange    TEXT PRIMARY KEY,
+    article_id  TEXT NOT NULL,          -- id последних статей через пробел
+    published   INTEGER,                -- unix ms, NULL если лента без времени
+    updated     TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- подписчики рассылки: фильтры — списки через запятую, '' = все
+CREATE TABLE IF NOT EXISTS subscribers (
+    chat_id    TEXT PRIMARY KEY,
+    exchanges  TEXT NOT NULL DEFAULT '',
+    markets    TEXT NOT NULL DEFAULT '',
+    created    TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- ключи идемпотентности: одно событие — одна рассылка, даже если его
+-- одновременно заметили два процесса (шардированный режим)
+CREATE TABLE IF NOT EXISTS notified (
+    key       TEXT PRIMARY KEY,
+    created   TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- объявленные листинги: вокруг starts REST-раннер биржи опрашивает символ чаще
+CREATE TABLE IF NOT EXISTS bursts (
     exchange  TEXT NOT NULL,
-    symbol    TEXT NOT NULL,
-    market    TEXT NOT NULL,            -- spot / perp / Unknown
-    source    TEXT NOT NULL,            -- api | cms
-    created   TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    UNIQUE(exchange, symbol, market)
+    symbol    TEXT NOT NULL,            -- базовый актив из CMS-анонса
+    starts    REAL NOT NULL,            -- unix time старта торгов
+    PRIMARY KEY(exchange, symbol)
+);
+
+-- аренда источников воркерами: кто опрашивает api:Binance, cms:OKX …
+CREATE TABLE IF NOT EXISTS leases (
+    source    TEXT PRIMARY KEY,
+    owner     TEXT NOT NULL,
+    expires   REAL NOT NULL             -- unix time
 );
 """
 
@@ -31,51 +111,477 @@ def norm(sym: str) -> str:
     return _RX_CLEAN.sub("", sym.upper())
 
 
+# котировки, которые срезаются с имени пары: FOOUSDT и анонс «FOO» — одна строка
+# (длинные раньше коротких: FDUSD до USD)
+QUOTES: Final[tuple[str, ...]] = ("FDUSD", "USDT", "USDC", "BUSD", "TUSD", "USD")
+_RX_PAIR = re.compile(r"[/_-]")
+
+
+def listing_key(sym: str, pair: bool = True) -> str:
+    """
+    Пара: FOO/USDT, FOOUSDT → FOO; с иной котировкой (FOOBTC) — как есть.
+    Голый тикер из анонса (pair=False) котировку не теряет: SUSD, BUSD —
+    свои активы, а не S и B; срезается только из «FOO/USD» в тексте.
+    """
+    if not pair and not _RX_PAIR.search(sym):
+        return norm(sym)
+    sym = norm(sym)
+    for quote in QUOTES:
+        if sym.endswith(quote) and len(sym) > len(quote):
+            return sym[: -len(quote)]
+    return sym
+
+
+# ────────────────────── in-memory индекс ───────────────────
+# Зеркало таблицы listings: грузится в connect(), пополняется в observe().
+# listing_markets() отвечает отсюда — одно обращение к dict, без SQLite.
+_LISTINGS: dict[tuple[str, str], int] = {}   # (exchange, listing_key) → Market
+
+
+def _index(exch: str, key: str, markets: int) -> None:
+    _LISTINGS[(exch, key)] = _LISTINGS.get((exch, key), 0) | markets
+
+
+# ────────────────────── write-behind писатель ──────────────
+# Один UPSERT на наблюдение: новые биты OR-ятся в маску, время рынка
+# ставится, только если его ещё не было. ?3 — новые биты, ?4 — время.
+_UPSERT_SQL: Final[str] = f"""
+INSERT INTO listings(exchange, symbol, markets, announced, spot, futures)
+VALUES(?1, ?2, ?3,
+       CASE WHEN ?3 & {int(Market.ANNOUNCED)} THEN ?4 END,
+       CASE WHEN ?3 & {int(Market.SPOT)} THEN ?4 END,
+       CASE WHEN ?3 & {int(Market.DERIVATIVES)} THEN ?4 END)
+ON CONFLICT(exchange, symbol) DO UPDATE SET
+    markets   = listings.markets | excluded.markets,
+    announced = COALESCE(listings.announced, excluded.announced),
+    spot      = COALESCE(listings.spot, excluded.spot),
+    futures   = COALESCE(listings.futures, excluded.futures)
+"""
+
+# listings до битовой маски: строка на (биржа, символ, рынок-строка)
+_MIGRATE_SQL: Final[str] = f"""
+BEGIN;
+ALTER TABLE listings RENAME TO listings_v1;
+{LISTINGS_SQL}
+INSERT INTO listings(exchange, symbol, markets, announced, spot, futures, created)
+SELECT exchange, listing_key(symbol, NOT (source = 'cms' OR market = 'Unknown')) AS key,
+       MAX(CASE WHEN market IN ('Spot', 'Both') THEN {int(Market.SPOT)} ELSE 0 END)
+     | MAX(CASE WHEN market IN ('Futures', 'Both') THEN {int(Market.FUTURES)} ELSE 0 END)
+     | MAX(CASE WHEN source = 'cms' OR market = 'Unknown' THEN {int(Market.ANNOUNCED)} ELSE 0 END),
+       MIN(CASE WHEN source = 'cms' OR market = 'Unknown' THEN created END),
+       MIN(CASE WHEN market IN ('Spot', 'Both') THEN created END),
+       MIN(CASE WHEN market IN ('Futures', 'Both') THEN created END),
+       MIN(created)
+FROM listings_v1
+GROUP BY exchange, key;
+DROP TABLE listings_v1;
+COMMIT;
+"""
+
+
+class _ListingWriter:
+    """
+    Единственный писатель таблицы listings.
+    Копит строки от всех раннеров и раз в FLUSH_INTERVAL (или по
+    достижении FLUSH_BATCH) пишет их одним executemany + одним commit.
+    Все строки одной пачки делят общий future — его можно дождаться.
+    Пачка, которую не удалось записать, не выбрасывается: строки
+    возвращаются в очередь (UPSERT идемпотентен) и повторяются с
+    растущей паузой, а future пачки ждёт успешного commit.
+    """
+
+    def __init__(self, db: aiosqlite.Connection) -> None:
+        self.db = db
+        self._rows: list[tuple[str, str, int, str]] = []
+        self._batch: asyncio.Future[None] | None = None
+        self._has_rows = asyncio.Event()
+        self._full = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="listings-writer")
+
+    def put(self, row: tuple[str, str, int, str]) -> asyncio.Future[None]:
+        if self._batch is None:
+            self._batch = asyncio.get_running_loop().create_future()
+        self._rows.append(row)
+        self._has_rows.set()
+        if len(self._rows) >= FLUSH_BATCH:
+            self._full.set()
+        return self._batch
+
+    async def flush(self) -> None:
+        """Сбросить накопленное прямо сейчас и дождаться commit."""
+        if self._batch is None:
+            return
+        batch = self._batch
+        self._full.set()
+        await asyncio.shield(batch)
+
+    async def _run(self) -> None:
+        delay = FLUSH_INTERVAL
+        while True:
+            await self._has_rows.wait()
+            try:
+                await asyncio.wait_for(self._full.wait(), FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            rows, batch = self._rows, self._batch
+            self._rows, self._batch = [], None
+            self._has_rows.clear()
+            self._full.clear()
+            try:
+                with DB_SECONDS.time(op="flush"):
+                    await self.db.executemany(_UPSERT_SQL, rows)
+                    await self.db.commit()
+            except Exception as exc:
+                delay = min(delay * 2, FLUSH_RETRY_MAX)
+                logging.error("listings writer: failed to store %d rows, retry in %.1fs: %s",
+                              len(rows), delay, exc)
+                await self._requeue(rows, batch)
+                await asyncio.sleep(delay)
+            else:
+                delay = FLUSH_INTERVAL
+                batch.set_result(None)
+
+    async def _requeue(self, rows: list[tuple[str, str, int, str]], batch: asyncio.Future[None]) -> None:
+        try:
+            await self.db.rollback()
+        except Exception as exc:
+            logging.error("listings writer: rollback failed: %s", exc)
+        self._rows = rows + self._rows
+        if self._batch is None:
+            self._batch = batch
+        else:
+            # за время попытки пришли новые строки — старый future ждёт общую пачку
+            self._batch.add_done_callback(lambda done: _settle(batch, done))
+        self._has_rows.set()
+
+    async def close(self) -> None:
+        try:
+            await asyncio.wait_for(self.flush(), FLUSH_CLOSE_TIMEOUT)
+        except asyncio.TimeoutError:
+            logging.error("listings writer: %d rows not stored on close", len(self._rows))
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        if self._batch is not None:  # ждущие persist(wait=True) не должны висеть
+            _settle(self._batch, None)
+
+
+def _settle(batch: asyncio.Future[None], done: asyncio.Future[None] | None) -> None:
+    """Завершить future пачки как done (None — ошибкой: строки не записаны)."""
+    if batch.done():
+        return
+    if done is not None and not done.cancelled() and done.exception() is None:
+        batch.set_result(None)
+    else:
+        batch.set_exception(RuntimeError("listings rows were not stored"))
+        batch.exception()  # уже залогировано — не шумим «never retrieved»
+
+
+_WRITER: _ListingWriter | None = None
+
+
 async def connect() -> aiosqlite.Connection:
     DB_PATH.parent.mkdir(exist_ok=True)
     db = await aiosqlite.connect(DB_PATH)
     await db.execute("PRAGMA journal_mode=WAL;")
     await db.execute("PRAGMA foreign_keys=ON;")
-    await db.execute(SCHEMA_SQL)
+    await db.executescript(SCHEMA_SQL)
     await db.commit()
+    await _migrate(db)
+
+    _LISTINGS.clear()
+    with DB_SECONDS.time(op="load_index"):
+        async with db.execute("SELECT exchange, symbol, markets FROM listings") as cur:
+            async for exch, key, markets in cur:
+                _index(exch, key, markets)
+
+    await db.execute(
+        "DELETE FROM notified WHERE created < datetime('now', ?)", (f"-{NOTIFIED_TTL_DAYS} days",)
+    )
+    await db.commit()
+
+    global _WRITER
+    _WRITER = _ListingWriter(db)
     return db
 
 
+async def _migrate(db) -> None:
+    """Схема старых баз — на месте: outbox без source, listings со строкой на рынок."""
+    async with db.execute("PRAGMA table_info(outbox)") as cur:
+        if "source" not in {row[1] async for row in cur}:
+            await db.execute("ALTER TABLE outbox ADD COLUMN source TEXT NOT NULL DEFAULT ''")
+            await db.commit()
+    await _migrate_listings(db)
+
+
+async def _migrate_listings(db) -> None:
+    """Старая listings (строка на рынок) → строка на актив с маской; на месте, одной транзакцией."""
+    async with db.execute("PRAGMA table_info(listings)") as cur:
+        columns = {row[1] async for row in cur}
+    if "market" not in columns:
+        return
+    await db.create_function("listing_key", 2, listing_key, deterministic=True)
+    with DB_SECONDS.time(op="migrate"):
+        await db.executescript(_MIGRATE_SQL)
+    async with db.execute("SELECT COUNT(*) FROM listings") as cur:
+        (rows,) = await cur.fetchone()
+    logging.info("DB: listings migrated to one row per symbol (%d rows)", rows)
+
+
+async def reload_exchange(db, exch: str) -> None:
+    """
+    Дочитать в индекс строки биржи, записанные другими процессами —
+    воркер, перехвативший источник, не должен считать их новыми.
+    """
+    with DB_SECONDS.time(op="load_index"):
+        async with db.execute(
+            "SELECT symbol, markets FROM listings WHERE exchange=?", (exch,)
+        ) as cur:
+            async for key, markets in cur:
+                _index(exch, key, markets)
+
+
+async def close(db) -> None:
+    """Дописывает очередь и закрывает соединение."""
+    global _WRITER
+    if _WRITER is not None:
+        await _WRITER.close()
+        _WRITER = None
+    await db.close()
+
+
+async def flush(db) -> None:
+    """Дождаться, пока всё поставленное в observe() окажется на диске."""
+    if _WRITER is not None:
+        await _WRITER.flush()
+
+
 async def db_is_empty(db) -> bool:
-    async with db.execute("SELECT 1 FROM listings LIMIT 1;") as cur:
-        return (await cur.fetchone()) is None
+    return not _LISTINGS
 
 
-async def already_seen(db, exch: str, sym: str, mkt: str) -> bool:
-    sym = norm(sym)
-    q = "SELECT 1 FROM listings WHERE exchange=? AND symbol=? AND market=? LIMIT 1"
-    async with db.execute(q, (exch, sym, mkt)) as cur:
-        return (await cur.fetchone()) is not None
+def exchange_seeded(exch: str) -> bool:
+    """Есть ли у биржи хоть одна торгуемая пара (из bootstrap или опросов); анонсы CMS не в счёт."""
+    return any(markets & Market.TRADED for (e, _), markets in _LISTINGS.items() if e == exch)
+
 
+# pair=False у функций ниже — sym это тикер из CMS-анонса (см. listing_key)
+def listing_markets(exch: str, sym: str, *, pair: bool = True) -> int:
+    """Рынки (Market), на которых пара/актив уже встречались; 0 — ни на одном."""
+    return _LISTINGS.get((exch, listing_key(sym, pair)), 0)
 
-async def symbol_exists(db, exch: str, sym: str) -> bool:
+
+def claim(exch: str, sym: str, markets: int, *, pair: bool = True) -> int:
     """
-    Есть ли символ на бирже exch в ЛЮБОМ рынке?
-    Используется CMS-раннером, чтобы понять, торгуется ли пара.
+    Отметить пару/актив в индексе; результат — биты, которых раньше не
+    было (0 — ничего нового). Без await: проверка и отметка атомарны и
+    при нескольких воркерах. В БД не пишет — это persist().
     """
-    sym = norm(sym)
+    key = listing_key(sym, pair)
+    new = markets & ~_LISTINGS.get((exch, key), 0)
+    if new:
+        _index(exch, key, new)
+    return new
+
+
+def release(exch: str, sym: str, markets: int, *, pair: bool = True) -> None:
+    """
+    Откатить claim(): уведомление не ушло — биты markets снова новые,
+    и следующее наблюдение пары даст событие заново.
+    """
+    key = (exch, listing_key(sym, pair))
+    left = _LISTINGS.get(key, 0) & ~markets
+    if left:
+        _LISTINGS[key] = left
+    else:
+        _LISTINGS.pop(key, None)
+
+
+async def persist(db, exch: str, sym: str, markets: int, *, pair: bool = True, wait: bool = False) -> None:
+    """
+    Один UPSERT в очередь писателя: биты markets OR-ятся в строку.
+    wait=True — дождаться commit этой пачки.
+    """
+    batch = _WRITER.put((exch, listing_key(sym, pair), markets, time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())))
+    if wait:
+        await asyncio.shield(batch)
+
+
+async def observe(db, exch: str, sym: str, markets: int, *, pair: bool = True, wait: bool = False) -> int:
+    """
+    Пара/актив замечены на рынках markets: claim() + persist() новых
+    битов. Возвращает новые биты (0 — ничего нового).
+    """
+    new = claim(exch, sym, markets, pair=pair)
+    if new:
+        await persist(db, exch, sym, new, pair=pair, wait=wait)
+    return new
+
+
+# ────────────────────── outbox (Telegram) ──────────────────
+async def outbox_put(db, chat_id: str, text: str, source: str = "") -> int:
+    """Сохраняет сообщение до отправки; возвращает id строки."""
+    with DB_SECONDS.time(op="outbox_put"):
+        cur = await db.execute(
+            "INSERT INTO outbox(chat_id,text,source) VALUES(?,?,?)",
+            (chat_id, text, source),
+        )
+        await db.commit()
+    return cur.lastrowid
+
+
+async def outbox_put_many(
+    db, rows: list[tuple[str, str]], key: str | None = None, source: str = ""
+) -> list[int]:
+    """
+    Пачка (chat_id, text) одной транзакцией — для рассылки подписчикам.
+    key — ключ идемпотентности события: если он уже был, ничего не
+    пишется и возвращается []. source — источник события (для метрик).
+    """
+    ids = []
+    with DB_SECONDS.time(op="outbox_put"):
+        if key is not None:
+            cur = await db.execute("INSERT OR IGNORE INTO notified(key) VALUES(?)", (key,))
+            if cur.rowcount == 0:
+                await db.commit()  # закрыть неявную транзакцию — не держать блокировку
+                return ids
+        for row in rows:
+            cur = await db.execute("INSERT INTO outbox(chat_id,text,source) VALUES(?,?,?)", (*row, source))
+            ids.append(cur.lastrowid)
+        await db.commit()
+    return ids
+
+
+async def outbox_pending(db) -> list[tuple[int, str, str, str]]:
+    """Недоставленные сообщения (после падения) в порядке поступления."""
+    async with db.execute("SELECT id, chat_id, text, source FROM outbox ORDER BY id") as cur:
+        return list(await cur.fetchall())
+
+
+async def outbox_after(db, last_id: int) -> list[tuple[int, str, str, str]]:
+    """Строки, записанные после last_id (в т.ч. другими процессами)."""
     async with db.execute(
-        "SELECT 1 FROM listings WHERE exchange=? AND symbol=? LIMIT 1",
-        (exch, sym),
+        "SELECT id, chat_id, text, source FROM outbox WHERE id>? ORDER BY id", (last_id,)
     ) as cur:
-        return (await cur.fetchone()) is not None
+        return list(await cur.fetchall())
 
 
-async def mark_seen(
-    db,
-    exch: str,
-    sym: str,
-    mkt: str,
-    src: str,  # api | cms
-) -> None:
-    sym = norm(sym)
-    await db.execute(
-        "INSERT OR IGNORE INTO listings(exchange,symbol,market,source) VALUES(?,?,?,?)",
-        (exch, sym, mkt, src),
-    )
-    await db.commit()
+async def outbox_done(db, ids: list[int]) -> None:
+    with DB_SECONDS.time(op="outbox_done"):
+        await db.executemany("DELETE FROM outbox WHERE id=?", [(i,) for i in ids])
+        await db.commit()
+
+
+# ────────────────────── HTTP-кеш CMS ───────────────────────
+async def http_cache_load(db) -> list[tuple[str, str | None, str | None, str]]:
+    async with db.execute("SELECT url, etag, last_modified, body_hash FROM http_cache") as cur:
+        return list(await cur.fetchall())
+
+
+async def http_cache_put(db, url: str, etag: str | None, last_modified: str | None, body_hash: str) -> None:
+    with DB_SECONDS.time(op="http_cache"):
+        await db.execute(
+            "INSERT OR REPLACE INTO http_cache(url,etag,last_modified,body_hash) VALUES(?,?,?,?)",
+            (url, etag, last_modified, body_hash),
+        )
+        await db.commit()
+
+
+# ────────────────────── курсоры CMS ────────────────────────
+async def cms_cursor_load(db) -> list[tuple[str, str, int | None]]:
+    async with db.execute("SELECT exchange, article_id, published FROM cms_cursor") as cur:
+        return list(await cur.fetchall())
+
+
+async def cms_cursor_put(db, exchange: str, article_id: str, published: int | None) -> None:
+    with DB_SECONDS.time(op="cms_cursor"):
+        await db.execute(
+            "INSERT OR REPLACE INTO cms_cursor(exchange,article_id,published) VALUES(?,?,?)",
+            (exchange, article_id, published),
+        )
+        await db.commit()
+
+
+# ────────────────────── подписчики ─────────────────────────
+async def subscribers_load(db) -> list[tuple[str, str, str]]:
+    async with db.execute("SELECT chat_id, exchanges, markets FROM subscribers ORDER BY created") as cur:
+        return list(await cur.fetchall())
+
+
+async def subscriber_put(db, chat_id: str, exchanges: str, markets: str) -> None:
+    with DB_SECONDS.time(op="subscribers"):
+        await db.execute(
+            "INSERT INTO subscribers(chat_id,exchanges,markets) VALUES(?,?,?) "
+            "ON CONFLICT(chat_id) DO UPDATE SET exchanges=excluded.exchanges, markets=excluded.markets",
+            (chat_id, exchanges, markets),
+        )
+        await db.commit()
+
+
+async def subscriber_delete(db, chat_id: str) -> bool:
+    with DB_SECONDS.time(op="subscribers"):
+        cur = await db.execute("DELETE FROM subscribers WHERE chat_id=?", (chat_id,))
+        await db.commit()
+    return cur.rowcount > 0
+
+
+# ────────────────────── учащённый опрос ────────────────────
+async def burst_put(db, exchange: str, symbol: str, starts: float) -> None:
+    with DB_SECONDS.time(op="bursts"):
+        await db.execute(
+            "INSERT INTO bursts(exchange,symbol,starts) VALUES(?,?,?) "
+            "ON CONFLICT(exchange,symbol) DO UPDATE SET starts=excluded.starts",
+            (exchange, symbol, starts),
+        )
+        await db.commit()
+
+
+async def burst_load(db, exchange: str) -> list[tuple[str, float]]:
+    async with db.execute(
+        "SELECT symbol, starts FROM bursts WHERE exchange=? ORDER BY starts", (exchange,)
+    ) as cur:
+        return list(await cur.fetchall())
+
+
+async def burst_done(db, exchange: str, symbol: str) -> None:
+    with DB_SECONDS.time(op="bursts"):
+        await db.execute("DELETE FROM bursts WHERE exchange=? AND symbol=?", (exchange, symbol))
+        await db.commit()
+
+
+# ────────────────────── аренда источников ──────────────────
+async def lease_acquire(db, source: str, owner: str, ttl: float, steal_after: float, now: float) -> bool:
+    """
+    Взять или продлить аренду source. Чужую — только если она истекла
+    больше steal_after секунд назад. Атомарно: один UPSERT.
+    """
+    with DB_SECONDS.time(op="lease"):
+        cur = await db.execute(
+            "INSERT INTO leases(source,owner,expires) VALUES(?,?,?) "
+            "ON CONFLICT(source) DO UPDATE SET owner=excluded.owner, expires=excluded.expires "
+            "WHERE leases.owner=excluded.owner OR leases.expires<?",
+            (source, owner, now + ttl, now - steal_after),
+        )
+        await db.commit()
+    return cur.rowcount > 0
+
+
+async def lease_reset(db, sources: list[str], now: float) -> None:
+    """
+    Старт супервизора: все аренды свободны «с этого момента» — свой
+    воркер возьмёт источник сразу, чужой только спустя steal_after.
+    """
+    with DB_SECONDS.time(op="lease"):
+        await db.execute("DELETE FROM leases")
+        await db.executemany(
+            "INSERT INTO leases(source,owner,expires) VALUES(?,'',?)", [(s, now) for s in sources]
+        )
+        await db.commit()
+
+
+async def lease_release(db, owner: str, now: float) -> None:
+    with DB_SECONDS.time(op="lease"):
+        await db.execute("UPDATE leases SET owner='', expires=? WHERE owner=?", (now, owner))
+        await db.commit()
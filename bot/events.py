@@ -0,0 +1,62 @@
+"""
+events.py — типизированные события листинга
+Раннеры не сравнивают строки рынков: db.listing_markets() отдаёт маску
+того, что о паре уже известно, а events_for() превращает новые биты в
+одно событие:
+• ANNOUNCED     — CMS-анонс;
+• SPOT_LIVE     — пара появилась на споте (с деривативами сразу — тоже оно);
+• FUTURES_ADDED — у пары появились деривативы;
+• DELISTED      — пара пропала из списка инструментов биржи.
+Переход Spot → Both — это FUTURES_ADDED, а не «новая пара (Both)».
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from enum import Enum
+from typing import Optional
+
+from bot.ann_api.symbol import Market, market_label
+
+
+class Kind(str, Enum):
+    ANNOUNCED = "announced"
+    SPOT_LIVE = "spot live"
+    FUTURES_ADDED = "futures added"
+    DELISTED = "delisted"
+
+
+@dataclass(frozen=True, slots=True)
+class ListingEvent:
+    kind: Kind
+    exchange: str
+    symbol: str       # как у биржи: FOOUSDT — из API, FOO — из анонса
+    markets: int      # рынки, о которых событие (Market)
+    announced: bool = False  # пару анонсировали раньше — торги по анонсу открылись
+
+    @property
+    def market(self) -> str:
+        """Spot / Futures / Both / Unknown — так рынок пишется в чат и в фильтры подписок."""
+        if self.kind is Kind.ANNOUNCED:
+            return "Unknown"
+        return market_label(self.markets)
+
+    def key(self) -> str:
+        """Ключ идемпотентности рассылки (outbox / notified)."""
+        return f"{self.kind.value}:{self.exchange}:{self.symbol}:{self.market}"
+
+
+def events_for(exchange: str, symbol: str, known: int, seen: int) -> Optional[ListingEvent]:
+    """
+    known — маска пары до наблюдения, seen — что видно сейчас.
+    Событие по битам, которых ещё не было; None — ничего нового.
+    """
+    new = seen & ~known
+    announced = bool(known & Market.ANNOUNCED)
+    if new & Market.SPOT:
+        return ListingEvent(Kind.SPOT_LIVE, exchange, symbol, new & Market.TRADED, announced)
+    if new & Market.DERIVATIVES:
+        return ListingEvent(Kind.FUTURES_ADDED, exchange, symbol, new & Market.DERIVATIVES, announced)
+    if new & Market.ANNOUNCED:
+        return ListingEvent(Kind.ANNOUNCED, exchange, symbol, Market.ANNOUNCED)
+    return None
@@ -0,0 +1,48 @@
+"""
+fetch.py — параллельный запуск сетевых запросов
+• gather_all     — «всё или ничего» для связанных запросов (spot + futures)
+• gather_bounded — независимые задачи с лимитом параллелизма;
+                   ошибки и таймауты возвращаются как значения
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import Any, Awaitable, Iterable, List
+
+FETCH_CONCURRENCY = int(os.getenv("FETCH_CONCURRENCY", "8"))
+FETCH_TIMEOUT = float(os.getenv("FETCH_TIMEOUT", "30"))
+
+
+async def gather_all(*aws: Awaitable[Any], timeout: float = FETCH_TIMEOUT) -> List[Any]:
+    """
+    Запускает все запросы одновременно и ждёт каждый.
+    Первая ошибка (или таймаут) отменяет остальные и пробрасывается.
+    """
+    tasks = [asyncio.ensure_future(a) for a in aws]
+    try:
+        return await asyncio.wait_for(asyncio.gather(*tasks), timeout)
+    finally:
+        for t in tasks:
+            t.cancel()  # для завершённых — no-op
+
+
+async def gather_bounded(
+    jobs: Iterable[Awaitable[Any]],
+    *,
+    limit: int = FETCH_CONCURRENCY,
+    timeout: float = FETCH_TIMEOUT,
+) -> List[Any]:
+    """
+    Не больше `limit` задач одновременно, у каждой свой таймаут.
+    Результат — список в порядке jobs; упавшие задачи дают исключение
+    вместо значения, остальные не ждут и не отменяются из-за них.
+    """
+    sem = asyncio.Semaphore(limit)
+
+    async def run(job: Awaitable[Any]) -> Any:
+        async with sem:
+            return await asyncio.wait_for(job, timeout)
+
+    return await asyncio.gather(*(run(j) for j in jobs), return_exceptions=True)
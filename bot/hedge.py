@@ -0,0 +1,249 @@
+"""
+hedge.py — хеджированные запросы по зеркалам бирж
+• у хоста биржи может быть несколько зеркал (HTTP_MIRRORS): api.binance.com
+  и api1–api4.binance.com, api.bybit.com и api.bytick.com …;
+• GET уходит на лучшее по здоровью зеркало; если ответа (заголовков) нет
+  дольше HTTP_HEDGE_PCT-го перцентиля недавних задержек этого эндпоинта,
+  тот же запрос уходит на следующее зеркало — побеждает первый ответ,
+  второй отменяется;
+• здоровье зеркала — EWMA успехов и задержки: ошибки, 5xx и 429 тянут
+  его вниз, и ниже HTTP_MIRROR_MIN_OK зеркало выводится из ротации
+  на HTTP_MIRROR_COOLDOWN секунд, после чего получает ещё один шанс;
+• 429 / 418 не хеджируются: зеркала биржи (api1–api4.binance.com)
+  считают лимит по IP вызывающего, и вторая копия только продлит бан.
+  Ответ уходит вызывающему как есть (его backoff — в раннере), а группа
+  на Retry-After (или HTTP_HEDGE_THROTTLE) секунд шлёт одну копию.
+Тело ответа не хеджируется: перцентиль считается до заголовков, а
+потоковое чтение мегабайтных списков идёт с того зеркала, что ответило.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+import httpx
+
+from bot.metrics import HEDGED_REQUESTS
+
+# хост → зеркала через запятую, группы через ';' (первым — основной хост)
+DEFAULT_MIRRORS = (
+    "api.binance.com=api1.binance.com,api2.binance.com,api3.binance.com,api4.binance.com;"
+    "api.bybit.com=api.bytick.com;"
+    "www.okx.com=aws.okx.com"
+)
+HTTP_MIRRORS = os.getenv("HTTP_MIRRORS", DEFAULT_MIRRORS)
+HTTP_HEDGE = os.getenv("HTTP_HEDGE", "1").lower() in ("1", "true", "yes", "on")
+HTTP_HEDGE_PCT = float(os.getenv("HTTP_HEDGE_PCT", "90"))            # перцентиль задержки
+HTTP_HEDGE_MIN_MS = float(os.getenv("HTTP_HEDGE_MIN_MS", "50"))      # не хеджировать раньше
+HTTP_HEDGE_DEFAULT_MS = float(os.getenv("HTTP_HEDGE_DEFAULT_MS", "1000"))  # пока нет истории
+HTTP_HEDGE_HISTORY = int(os.getenv("HTTP_HEDGE_HISTORY", "200"))     # замеров на эндпоинт
+HTTP_MIRROR_MIN_OK = float(os.getenv("HTTP_MIRROR_MIN_OK", "0.5"))
+HTTP_MIRROR_COOLDOWN = float(os.getenv("HTTP_MIRROR_COOLDOWN", "300"))
+HTTP_HEDGE_THROTTLE = float(os.getenv("HTTP_HEDGE_THROTTLE", "60"))  # без хеджа после 429, сек
+
+_MIN_HISTORY = 20   # меньше замеров — перцентиль ненадёжен, берём DEFAULT
+_ALPHA = 0.2        # вес нового замера в EWMA
+_THROTTLED = frozenset({418, 429})  # лимит / бан по IP: вредят здоровью, но без второй копии
+
+
+def parse_mirrors(spec: str) -> Dict[str, List[str]]:
+    """"a=b,c;d=e" → {"a": ["a", "b", "c"], "d": ["d", "e"]}."""
+    groups: Dict[str, List[str]] = {}
+    for part in filter(None, (p.strip() for p in spec.split(";"))):
+        host, _, rest = part.partition("=")
+        hosts = [host.strip(), *(h.strip() for h in rest.split(",") if h.strip())]
+        groups[hosts[0]] = list(dict.fromkeys(hosts))
+    return groups
+
+
+MIRRORS = parse_mirrors(HTTP_MIRRORS)
+# зеркало → основной хост (синтетическому транспорту и логам)
+CANONICAL = {m: host for host, hosts in MIRRORS.items() for m in hosts}
+
+
+def canonical_host(host: str) -> str:
+    return CANONICAL.get(host, host)
+
+
+class Mirror:
+    """Здоровье одного зеркала."""
+
+    __slots__ = ("host", "ok", "latency", "down_until")
+
+    def __init__(self, host: str) -> None:
+        self.host = host
+        self.ok = 1.0                   # EWMA доли успешных ответов
+        self.latency: Optional[float] = None  # EWMA задержки, сек; None — ещё не пробовали
+        self.down_until = 0.0
+
+    def healthy(self, now: float) -> bool:
+        if self.down_until and now >= self.down_until:
+            # карантин кончился — ещё один шанс, но с порога
+            self.down_until = 0.0
+            self.ok = HTTP_MIRROR_MIN_OK
+        return not self.down_until
+
+    def record(self, ok: bool, elapsed: float) -> None:
+        self.ok = self.ok * (1 - _ALPHA) + (_ALPHA if ok else 0.0)
+        self.lagged(elapsed)
+        if self.ok < HTTP_MIRROR_MIN_OK and not self.down_until:
+            self.down_until = time.monotonic() + HTTP_MIRROR_COOLDOWN
+            logging.warning("Mirror %s dropped for %ds (success %.0f%%)",
+                            self.host, HTTP_MIRROR_COOLDOWN, self.ok * 100)
+
+    def lagged(self, elapsed: float) -> None:
+        """Только задержка — и для запроса, отменённого хеджем (оценка снизу)."""
+        self.latency = elapsed if self.latency is None else self.latency * (1 - _ALPHA) + elapsed * _ALPHA
+
+
+class MirrorGroup:
+    """Зеркала одного хоста и история задержек его эндпоинтов."""
+
+    def __init__(self, hosts: List[str]) -> None:
+        self.mirrors = [Mirror(h) for h in hosts]
+        self._history: Dict[str, Deque[float]] = {}
+        self.calm_until = 0.0  # до этого момента (monotonic) — без хеджа: биржа нас ограничила
+
+    def throttled(self, host: str, response: httpx.Response) -> None:
+        try:
+            pause = float(response.headers.get("Retry-After", ""))
+        except ValueError:
+            pause = HTTP_HEDGE_THROTTLE
+        self.calm_until = max(self.calm_until, time.monotonic() + pause)
+        logging.warning("%s answered %d: no hedging for %.0fs",
+                        host, response.status_code, pause)
+
+    def ranked(self) -> List[Mirror]:
+        """
+        Здоровые зеркала, быстрые — первыми; ещё не пробованные идут
+        вперёд (разведка), при равенстве — порядок из конфига.
+        Все в карантине — всё равно отдаём самое живучее.
+        """
+        now = time.monotonic()
+        alive = [m for m in self.mirrors if m.healthy(now)]
+        if not alive:
+            return [max(self.mirrors, key=lambda m: m.ok)]
+        return sorted(alive, key=lambda m: m.latency or 0.0)
+
+    def threshold(self, path: str) -> float:
+        """Сколько ждать ответа, прежде чем хеджировать, сек."""
+        history = self._history.get(path)
+        if history is None or len(history) < _MIN_HISTORY:
+            return HTTP_HEDGE_DEFAULT_MS / 1000
+        ordered = sorted(history)
+        rank = min(len(ordered) - 1, int(len(ordered) * HTTP_HEDGE_PCT / 100))
+        return max(HTTP_HEDGE_MIN_MS / 1000, ordered[rank])
+
+    def observe(self, path: str, elapsed: float) -> None:
+        history = self._history.get(path)
+        if history is None:
+            history = self._history[path] = deque(maxlen=HTTP_HEDGE_HISTORY)
+        history.append(elapsed)
+
+
+def _failed(response: httpx.Response) -> bool:
+    """Плохой ответ для здоровья зеркала."""
+    return response.status_code >= 500 or response.status_code in _THROTTLED
+
+
+def _retryable(response: httpx.Response) -> bool:
+    """Стоит ли повторить на другом зеркале: только 5xx, не лимиты."""
+    return response.status_code >= 500
+
+
+class HedgedTransport(httpx.AsyncBaseTransport):
+    """
+    Обёртка над транспортом: GET к хостам из MIRRORS идут на зеркала
+    с хеджированием; остальные запросы проходят как есть.
+    """
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, mirrors: Dict[str, List[str]]) -> None:
+        self._inner = inner
+        self._groups = {host: MirrorGroup(hosts) for host, hosts in mirrors.items() if len(hosts) > 1}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        group = self._groups.get(request.url.host)
+        if group is None or request.method != "GET":
+            return await self._inner.handle_async_request(request)
+
+        path = request.url.path
+        mirrors = group.ranked()
+        first = asyncio.create_task(self._send(group, mirrors[0], path, request))
+        tasks = [first]
+        keep: Optional[asyncio.Task] = None  # чей ответ (или ошибку) отдаём
+        try:
+            if len(mirrors) < 2 or time.monotonic() < group.calm_until:
+                await asyncio.wait(tasks)
+                keep = first
+                return first.result()
+            done, _ = await asyncio.wait(tasks, timeout=group.threshold(path))
+            if done and not self._needs_backup(first):
+                keep = first
+                return first.result()
+
+            # медленно или упало — тот же запрос на следующее зеркало
+            tasks.append(asyncio.create_task(self._send(group, mirrors[1], path, request)))
+            pending = set(tasks)
+            while pending and keep is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                keep = next((t for t in tasks if t in done and not self._needs_backup(t)), None)
+            HEDGED_REQUESTS.inc(host=request.url.host,
+                                result="primary" if keep is first else "backup" if keep else "failed")
+            # оба упали — отдаём то, что вернул (или бросил) основной запрос
+            keep = keep or first
+            return keep.result()
+        finally:
+            await _discard([t for t in tasks if t is not keep])
+
+    @staticmethod
+    def _needs_backup(task: asyncio.Task) -> bool:
+        return task.exception() is not None or _retryable(task.result())
+
+    async def _send(self, group: MirrorGroup, mirror: Mirror, path: str,
+                    request: httpx.Request) -> httpx.Response:
+        if mirror.host != request.url.host:
+            headers = httpx.Headers(request.headers)
+            headers["Host"] = mirror.host
+            request = httpx.Request(
+                request.method, request.url.copy_with(host=mirror.host),
+                headers=headers, extensions=request.extensions,
+            )
+        start = time.monotonic()
+        try:
+            response = await self._inner.handle_async_request(request)
+        except asyncio.CancelledError:
+            # проиграл хеджу: задержка как минимум такая — хвост истории не теряем,
+            # а вечно зависающее зеркало уходит в конец ранжирования
+            elapsed = time.monotonic() - start
+            mirror.lagged(elapsed)
+            group.observe(path, elapsed)
+            raise
+        except Exception:
+            mirror.record(False, time.monotonic() - start)
+            raise
+        elapsed = time.monotonic() - start
+        mirror.record(not _failed(response), elapsed)
+        group.observe(path, elapsed)
+        if response.status_code in _THROTTLED:
+            group.throttled(mirror.host, response)
+        return response
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+async def _discard(tasks: List[asyncio.Task]) -> None:
+    """Отменить проигравшие запросы и закрыть их ответы (освободить слоты хоста)."""
+    if not tasks:
+        return
+    for task in tasks:
+        task.cancel()
+    await asyncio.wait(tasks)
+    for task in tasks:
+        if not task.cancelled() and task.exception() is None:
+            await task.result().aclose()
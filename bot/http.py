@@ -0,0 +1,188 @@
+"""
+http.py — общий HTTP-клиент для всех API- и CMS-анонсеров
+Один долгоживущий httpx.AsyncClient на процесс: keep-alive пул,
+опциональный HTTP/2, лимит соединений на хост, таймауты и
+хеджирование по зеркалам бирж (bot/hedge.py).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+
+import httpx
+
+from bot.hedge import HTTP_HEDGE, MIRRORS, HedgedTransport
+from bot.metrics import FETCH_SECONDS, RESPONSE_BYTES, SOURCE
+from bot.ratelimit import TokenBucket
+from bot.transport import HTTP_TRANSPORT, make_transport
+
+# ─────────────────────────── настройки ────────────────────────────
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "15"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "32"))
+HTTP_PER_HOST = int(os.getenv("HTTP_PER_HOST", "4"))
+# держим соединения дольше самого длинного интервала опроса
+HTTP_KEEPALIVE = float(os.getenv("HTTP_KEEPALIVE", "300"))
+HTTP2 = os.getenv("HTTP2", "0").lower() in ("1", "true", "yes", "on")
+# бюджет запросов на хост в минуту (0 — без ограничения) и допустимый всплеск
+HTTP_HOST_BUDGET = float(os.getenv("HTTP_HOST_BUDGET", "120"))
+HTTP_HOST_BURST = float(os.getenv("HTTP_HOST_BURST", "10"))
+
+try:  # HTTP/2 доступен только с пакетом h2 (pip install httpx[http2])
+    import h2  # noqa: F401
+    _H2_AVAILABLE = True
+except ImportError:
+    _H2_AVAILABLE = False
+
+
+# ─────────────────────────── лимиты на хост ───────────────────────────
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Тело ответа, которое отпускает слот хоста при закрытии."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release) -> None:
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+class PerHostTransport(httpx.AsyncBaseTransport):
+    """
+    Обёртка над транспортом: не больше `per_host` одновременных
+    запросов к одному хосту. Слот занят, пока тело ответа не закрыто.
+    budget_per_min > 0 — ещё и token bucket на частоту запросов к хосту.
+    """
+
+    def __init__(
+        self,
+        inner: httpx.AsyncBaseTransport,
+        per_host: int,
+        budget_per_min: float = 0,
+        burst: float = 1,
+    ) -> None:
+        self._inner = inner
+        self._per_host = per_host
+        self._budget = budget_per_min
+        self._burst = burst
+        self._slots: dict[str, asyncio.Semaphore] = {}
+        self._buckets: dict[str, TokenBucket] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        if self._budget > 0:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self._budget / 60, self._burst)
+            await bucket.acquire()
+
+        sem = self._slots.setdefault(host, asyncio.Semaphore(self._per_host))
+        await sem.acquire()
+        try:
+            response = await self._inner.handle_async_request(request)
+        except BaseException:
+            sem.release()
+            raise
+
+        if isinstance(response.stream, httpx.ByteStream):
+            sem.release()  # тело уже в памяти — соединение свободно
+            return response
+
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                sem.release()
+
+        response.stream = _ReleasingStream(response.stream, release)
+        return response
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+# ───────────────────────────── метрики ─────────────────────────────
+class _MeteredStream(httpx.AsyncByteStream):
+    """Считает байты тела и сообщает итог при закрытии."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, done) -> None:
+        self._stream = stream
+        self._done = done
+        self._size = 0
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            self._size += len(chunk)
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._done(self._size)
+
+
+class MeteredTransport(httpx.AsyncBaseTransport):
+    """Время запроса (до конца тела) и размер ответа по source/host."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport) -> None:
+        self._inner = inner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        start = time.perf_counter()
+        labels = {"source": SOURCE.get(), "host": request.url.host}
+        response = await self._inner.handle_async_request(request)
+
+        def done(size: int) -> None:
+            FETCH_SECONDS.observe(time.perf_counter() - start, **labels)
+            RESPONSE_BYTES.observe(size, **labels)
+
+        if isinstance(response.stream, httpx.ByteStream):
+            done(len(response.content))
+        else:
+            response.stream = _MeteredStream(response.stream, done)
+        return response
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+# ───────────────────────── фабрика клиента ─────────────────────────
+def make_client() -> httpx.AsyncClient:
+    """
+    Создаёт общий клиент. Владелец — main.main():
+        async with make_client() as client: ...
+    """
+    limits = httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE,
+    )
+    timeout = httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+    if HTTP2 and not _H2_AVAILABLE:
+        logging.warning("HTTP2=1, но пакет h2 не установлен — работаем по HTTP/1.1")
+    # HTTP_TRANSPORT=record|replay|synthetic подменяет сеть (см. bot/transport.py)
+    inner = make_transport(httpx.AsyncHTTPTransport(
+        limits=limits,
+        http2=HTTP2 and _H2_AVAILABLE,
+        retries=1,  # повтор только на ошибке установки соединения
+    ))
+    transport: httpx.AsyncBaseTransport = PerHostTransport(
+        MeteredTransport(inner), HTTP_PER_HOST, HTTP_HOST_BUDGET, HTTP_HOST_BURST,
+    )
+    # лента record/replay хранит ответы по URL — зеркала её бы разъехали
+    if HTTP_HEDGE and HTTP_TRANSPORT in ("live", "synthetic"):
+        transport = HedgedTransport(transport, MIRRORS)
+    return httpx.AsyncClient(transport=transport, timeout=timeout)
@@ -0,0 +1,218 @@
+"""
+metrics.py — гистограммы задержек в формате Prometheus
+• Histogram — минимальная реализация без внешних зависимостей;
+• Counter   — то же для счётчиков событий;
+• Gauge     — текущее значение (глубина очереди и т.п.);
+• SOURCE    — contextvar с текущим источником ("api:Binance", "cms:OKX"):
+              раннер ставит его один раз, и все замеры внутри задачи
+              (включая HTTP-транспорт) получают метку автоматически;
+• start_metrics_server() — GET /metrics на METRICS_HOST:METRICS_PORT.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Sequence
+
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))  # 0 — выключено
+
+SOURCE: ContextVar[str] = ContextVar("metrics_source", default="-")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS = (1e3, 1e4, 1e5, 5e5, 1e6, 5e6, 2e7)
+LAG_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 900, 3600, 6 * 3600, 24 * 3600)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    def __init__(self, name: str, doc: str, buckets: Sequence[float], labels: Sequence[str]) -> None:
+        self.name = name
+        self.doc = doc
+        self.buckets = tuple(buckets)
+        self.labels = tuple(labels)
+        # labels -> [count в каждом бакете (+Inf последним), sum]
+        self._series: dict[tuple[str, ...], list] = {}
+        _REGISTRY.append(self)
+
+    def observe(self, value: float, **labels: str) -> None:
+        if "source" in self.labels and "source" not in labels:
+            labels["source"] = SOURCE.get()
+        key = tuple(str(labels.get(n, "")) for n in self.labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.doc}"
+        yield f"# TYPE {self.name} histogram"
+        for key, (counts, total) in sorted(self._series.items()):
+            pairs = [f'{n}="{_escape(v)}"' for n, v in zip(self.labels, key)]
+            labels = "{" + ",".join(pairs) + "}" if pairs else ""
+            acc = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                acc += count
+                le = ",".join((*pairs, f'le="{bound}"'))
+                yield f"{self.name}_bucket{{{le}}} {acc}"
+            yield f"{self.name}_sum{labels} {total}"
+            yield f"{self.name}_count{labels} {acc}"
+
+
+class Counter:
+    def __init__(self, name: str, doc: str, labels: Sequence[str]) -> None:
+        self.name = name
+        self.doc = doc
+        self.labels = tuple(labels)
+        self._series: dict[tuple[str, ...], float] = {}
+        _REGISTRY.append(self)
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        if "source" in self.labels and "source" not in labels:
+            labels["source"] = SOURCE.get()
+        key = tuple(str(labels.get(n, "")) for n in self.labels)
+        self._series[key] = self._series.get(key, 0.0) + amount
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.doc}"
+        yield f"# TYPE {self.name} counter"
+        for key, value in sorted(self._series.items()):
+            pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(self.labels, key))
+            yield f"{self.name}_total{{{pairs}}} {value}" if pairs else f"{self.name}_total {value}"
+
+
+class Gauge:
+    def __init__(self, name: str, doc: str, labels: Sequence[str]) -> None:
+        self.name = name
+        self.doc = doc
+        self.labels = tuple(labels)
+        self._series: dict[tuple[str, ...], float] = {}
+        _REGISTRY.append(self)
+
+    def set(self, value: float, **labels: str) -> None:
+        self._series[tuple(str(labels.get(n, "")) for n in self.labels)] = value
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.doc}"
+        yield f"# TYPE {self.name} gauge"
+        for key, value in sorted(self._series.items()):
+            pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(self.labels, key))
+            yield f"{self.name}{{{pairs}}} {value}" if pairs else f"{self.name} {value}"
+
+
+_REGISTRY: list[Histogram | Counter | Gauge] = []
+
+
+def render() -> str:
+    return "\n".join(line for h in _REGISTRY for line in h.render()) + "\n"
+
+
+# ───────────────────────────── метрики ─────────────────────────────
+FETCH_SECONDS = Histogram(
+    "criptabot_fetch_seconds", "HTTP request duration incl. body download",
+    LATENCY_BUCKETS, ("source", "host"),
+)
+RESPONSE_BYTES = Histogram(
+    "criptabot_response_bytes", "HTTP response body size",
+    SIZE_BUCKETS, ("source", "host"),
+)
+PARSE_SECONDS = Histogram(
+    "criptabot_parse_seconds", "Time spent decoding/parsing a source response",
+    LATENCY_BUCKETS, ("source",),
+)
+POLL_SECONDS = Histogram(
+    "criptabot_poll_seconds", "Full poll cycle of one source",
+    LATENCY_BUCKETS, ("source",),
+)
+DB_SECONDS = Histogram(
+    "criptabot_db_seconds", "SQLite operation duration",
+    LATENCY_BUCKETS, ("source", "op"),
+)
+SEND_SECONDS = Histogram(
+    "criptabot_send_seconds", "Telegram send_message duration",
+    LATENCY_BUCKETS, ("source", "result"),
+)
+DETECTION_LAG = Histogram(
+    "criptabot_detection_lag_seconds", "Exchange publication -> alert queued",
+    LAG_BUCKETS, ("source",),
+)
+HEDGED_REQUESTS = Counter(
+    "criptabot_hedged_requests", "Requests re-sent to a second mirror, by which copy answered",
+    ("host", "result"),
+)
+LISTING_LAG = Histogram(
+    "criptabot_listing_lag_seconds", "Announced trading start -> pair-is-live alert queued",
+    LAG_BUCKETS, ("source",),
+)
+STAGE_SECONDS = Histogram(
+    "criptabot_stage_seconds", "Time one pipeline stage spent on an item",
+    LATENCY_BUCKETS, ("stage",),
+)
+STAGE_WAIT = Histogram(
+    "criptabot_stage_wait_seconds", "Time an item waited in the stage queue",
+    LATENCY_BUCKETS, ("stage",),
+)
+STAGE_ITEMS = Counter(
+    "criptabot_stage_items", "Items handled by a pipeline stage: passed / dropped / failed",
+    ("stage", "result"),
+)
+STAGE_QUEUE = Gauge(
+    "criptabot_stage_queue", "Items waiting in the stage queue",
+    ("stage",),
+)
+LOOP_LAG = Histogram(
+    "criptabot_loop_lag_seconds", "How late the event loop woke up a sleeping task",
+    LATENCY_BUCKETS, (),
+)
+LOOP_STALLS = Counter(
+    "criptabot_loop_stalls", "Event loop blocked longer than LOOP_STALL_MS, by running task",
+    ("task",),
+)
+
+
+# ─────────────────────────── HTTP endpoint ─────────────────────────
+async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        request = await reader.readline()
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass  # заголовки не нужны
+        parts = request.split()
+        if len(parts) >= 2 and parts[1].split(b"?")[0] == b"/metrics":
+            status, ctype, body = "200 OK", "text/plain; version=0.0.4", render().encode()
+        else:
+            status, ctype, body = "404 Not Found", "text/plain", b"not found\n"
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: {ctype}\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_metrics_server() -> asyncio.AbstractServer | None:
+    if not METRICS_PORT:
+        return None
+    server = await asyncio.start_server(_handle, METRICS_HOST, METRICS_PORT)
+    logging.info("Metrics: http://%s:%d/metrics", METRICS_HOST, METRICS_PORT)
+    return server
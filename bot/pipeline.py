@@ -0,0 +1,110 @@
+"""
+pipeline.py — этапы обработки, связанные ограниченными очередями
+• Stage — очередь asyncio.Queue(PIPELINE_QUEUE) и N воркеров; обработчик
+  возвращает элемент для следующего этапа или None (отсеян);
+• полная очередь блокирует put() предыдущего этапа — backpressure
+  доходит до раннеров, а не копится в памяти;
+• у каждого этапа свои метрики: время обработки, ожидание в очереди,
+  глубина очереди, счётчик passed / dropped / failed;
+• close() — этапы по порядку дорабатывают очереди (не дольше
+  PIPELINE_DRAIN_TIMEOUT на этап), затем воркеры гасятся.
+Какие этапы и что они делают — см. main.py.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, List, Optional
+
+from bot.metrics import STAGE_ITEMS, STAGE_QUEUE, STAGE_SECONDS, STAGE_WAIT
+
+PIPELINE_QUEUE = int(os.getenv("PIPELINE_QUEUE", "1000"))                   # элементов на этап
+PIPELINE_DRAIN_TIMEOUT = float(os.getenv("PIPELINE_DRAIN_TIMEOUT", "10"))   # сек на этап
+
+
+def workers_for(stage: str, default: int) -> int:
+    """PIPELINE_WORKERS_<ЭТАП> из окружения, иначе default."""
+    return max(1, int(os.getenv(f"PIPELINE_WORKERS_{stage.upper()}", str(default))))
+
+
+class Stage:
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Any], Awaitable[Any]],
+        workers: int = 1,
+        maxsize: int = PIPELINE_QUEUE,
+    ) -> None:
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.maxsize = maxsize
+        self.next: Optional[Stage] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue(self.maxsize)
+        self._tasks = [
+            asyncio.create_task(self._work(), name=f"pipeline:{self.name}:{i}")
+            for i in range(self.workers)
+        ]
+
+    async def put(self, item: Any) -> None:
+        await self._queue.put((time.monotonic(), item))
+        STAGE_QUEUE.set(self._queue.qsize(), stage=self.name)
+
+    async def _work(self) -> None:
+        while True:
+            queued, item = await self._queue.get()
+            STAGE_QUEUE.set(self._queue.qsize(), stage=self.name)
+            STAGE_WAIT.observe(time.monotonic() - queued, stage=self.name)
+            result = "dropped"
+            try:
+                with STAGE_SECONDS.time(stage=self.name):
+                    out = await self.handler(item)
+                if out is not None:
+                    result = "passed"
+                    if self.next is not None:
+                        await self.next.put(out)  # ждёт место — backpressure
+            except Exception as exc:
+                result = "failed"
+                logging.error("Pipeline %s failed on %r: %s", self.name, item, exc)
+            finally:
+                self._queue.task_done()
+                STAGE_ITEMS.inc(stage=self.name, result=result)
+
+    async def drain(self) -> None:
+        """Доработать очередь (с таймаутом) и погасить воркеров."""
+        try:
+            await asyncio.wait_for(self._queue.join(), PIPELINE_DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            logging.warning("Pipeline %s: %d items left undrained", self.name, self._queue.qsize())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+class Pipeline:
+    """Цепочка этапов: put() — в первый, выход каждого — во вход следующего."""
+
+    def __init__(self, stages: List[Stage]) -> None:
+        self.stages = stages
+        for stage, following in zip(stages, stages[1:]):
+            stage.next = following
+
+    def start(self) -> None:
+        for stage in self.stages:
+            stage.start()
+        logging.info("Pipeline: %s", " → ".join(f"{s.name}×{s.workers}" for s in self.stages))
+
+    async def put(self, item: Any) -> None:
+        await self.stages[0].put(item)
+
+    async def close(self) -> None:
+        # по порядку: пока дренируется этап, предыдущие уже всё ему отдали
+        for stage in self.stages:
+            await stage.drain()
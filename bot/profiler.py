@@ -0,0 +1,251 @@
+"""
+profiler.py — задержки event loop и сэмплирующий профайлер
+Все раннеры, колбэки aiosqlite, разбор BeautifulSoup и отправка в
+Telegram делят один asyncio-loop; здесь видно, кто его блокирует.
+• LoopMonitor — задача спит LOOP_LAG_INTERVAL и меряет, насколько
+  проснулась позже (criptabot_loop_lag_seconds); сторожевой поток
+  замечает, что loop не проснулся вовремя, и снимает стек основного
+  потока прямо во время блокировки. Если задержка больше LOOP_STALL_MS —
+  warning с виновником: имя задачи (cms:OKX, api:Binance:burst …)
+  и место в коде (bot/ann_cms/okx.py:… _parse);
+• Sampler — по запросу, PROFILE_HZ раз в секунду снимает стек
+  основного потока и пишет в logs/profile-….folded свёрнутые стеки
+  («корень;…;лист N») — формат flamegraph.pl, speedscope, inferno;
+  корень стека — имя текущей задачи, так что пламя делится по источникам;
+• запуск: /profile [сек] от админа (bot/commands.py) или SIGUSR1
+  (повторный сигнал — остановить и записать).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter as Tally
+from pathlib import Path
+from types import CodeType, FrameType
+from typing import Dict, List, Optional
+
+from bot.metrics import LOOP_LAG, LOOP_STALLS
+
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.5"))   # шаг замера, сек
+LOOP_STALL_MS = float(os.getenv("LOOP_STALL_MS", "100"))           # блокировка дольше — warning
+PROFILE_HZ = float(os.getenv("PROFILE_HZ", "100"))                 # сэмплов в секунду
+PROFILE_SECONDS = float(os.getenv("PROFILE_SECONDS", "30"))        # длительность по умолчанию
+PROFILE_MAX_SECONDS = 600.0
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+PROFILE_DIR = BASE_DIR / "logs"
+
+_STACK_DEPTH = 4  # кадров в warning о блокировке
+
+
+# ───────────────────────────── стеки ───────────────────────────────
+_ROOT = str(BASE_DIR) + os.sep
+_STDLIB = os.path.dirname(os.__file__) + os.sep
+_NAMES: Dict[CodeType, str] = {}
+_LOOP_FILES = ("asyncio/", "selectors.py")  # сам event loop: всё до них — не работа задач
+
+
+def _where(code: CodeType) -> str:
+    """Путь файла: от корня проекта, stdlib или site-packages; иначе имя файла."""
+    path = code.co_filename
+    for root in (_ROOT, _STDLIB):
+        if path.startswith(root):
+            return path[len(root):]
+    _, sep, tail = path.rpartition("site-packages" + os.sep)
+    return tail if sep else os.path.basename(path)
+
+
+def _frame_name(code: CodeType) -> str:
+    name = _NAMES.get(code)
+    if name is None:
+        name = _NAMES[code] = f"{code.co_name} ({_where(code)}:{code.co_firstlineno})"
+    return name
+
+
+def _stack(frame: Optional[FrameType]) -> List[FrameType]:
+    """Кадры от корня к листу."""
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+
+def _task_name(loop: asyncio.AbstractEventLoop) -> str:
+    # current_task(loop) читает общий словарь — годится и из чужого потока
+    task = asyncio.current_task(loop)
+    return task.get_name() if task is not None else "loop"
+
+
+def _below_loop(files: List[str]) -> int:
+    """Индекс первого кадра ниже кода самого event loop (asyncio, selectors)."""
+    return max((i for i, f in enumerate(files) if f.startswith(_LOOP_FILES)), default=-1) + 1
+
+
+def _culprit(frames: List[FrameType]) -> str:
+    """Где именно стоим: глубже всего — кадры проекта внутри задачи/колбэка."""
+    inner = frames[_below_loop([_where(f.f_code) for f in frames]):]
+    # пусто — занят сам loop (select, планировщик колбэков): показываем его кадры
+    own = [f for f in inner if f.f_code.co_filename.startswith(_ROOT)] or inner or frames
+    picked = own[-_STACK_DEPTH:]
+    return " ← ".join(f"{_where(f.f_code)}:{f.f_lineno} {f.f_code.co_name}" for f in reversed(picked))
+
+
+# ───────────────────────────── лаг loop ────────────────────────────
+class LoopMonitor:
+    """Лаг event loop и виновники блокировок; start() — из потока loop."""
+
+    def __init__(self) -> None:
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ident = 0
+        self._due = 0.0                   # когда loop должен проснуться (monotonic)
+        self._stall: Optional[tuple[str, str]] = None  # (задача, стек) — пишет сторож
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._ident = threading.get_ident()
+        self._due = time.monotonic() + LOOP_LAG_INTERVAL
+        self._stop.clear()
+        self._task = asyncio.create_task(self._run(), name="loop-monitor")
+        threading.Thread(target=self._watch, name="loop-watchdog", daemon=True).start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _run(self) -> None:
+        while True:
+            self._due = time.monotonic() + LOOP_LAG_INTERVAL
+            await asyncio.sleep(LOOP_LAG_INTERVAL)
+            lag = max(time.monotonic() - self._due, 0.0)
+            LOOP_LAG.observe(lag)
+            stall, self._stall = self._stall, None
+            if stall is not None and lag * 1000 >= LOOP_STALL_MS:
+                task, where = stall
+                LOOP_STALLS.inc(task=task)
+                logging.warning("Event loop blocked %.0f ms by %s: %s", lag * 1000, task, where,
+                                extra={"task": task, "latency": round(lag, 3)})
+
+    def _watch(self) -> None:
+        """Поток-сторож: loop опаздывает — снять стек, пока он ещё занят."""
+        threshold = LOOP_STALL_MS / 1000
+        while not self._stop.wait(threshold / 2):
+            due = self._due
+            if self._stall is not None or time.monotonic() - due < threshold:
+                continue
+            frame = sys._current_frames().get(self._ident)
+            if frame is None:
+                continue
+            # тот же замер ещё идёт — иначе loop уже проснулся сам
+            if self._due == due:
+                self._stall = (_task_name(self._loop), _culprit(_stack(frame)))
+
+
+MONITOR = LoopMonitor()
+
+
+# ───────────────────────────── профайлер ───────────────────────────
+class Sampler:
+    """Сэмплирующий профайлер основного потока (поток-сэмплер, без trace-хуков)."""
+
+    def __init__(self) -> None:
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.path: Optional[Path] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds: float = PROFILE_SECONDS) -> bool:
+        """Начать профилирование (из потока loop); False — уже идёт."""
+        if self.running:
+            return False
+        seconds = min(max(seconds, 1.0), PROFILE_MAX_SECONDS)
+        loop = asyncio.get_running_loop()
+        self._stop.clear()
+        self.path = PROFILE_DIR / f"profile-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.folded"
+        self._thread = threading.Thread(
+            target=self._sample, args=(loop, threading.get_ident(), seconds, self.path),
+            name="profiler", daemon=True,
+        )
+        self._thread.start()
+        logging.info("Profiler: sampling %.0fs at %.0f Hz → %s", seconds, PROFILE_HZ, self.path)
+        return True
+
+    def stop(self) -> None:
+        """Остановить раньше срока; файл допишет поток-сэмплер."""
+        self._stop.set()
+
+    async def wait(self) -> Optional[Path]:
+        """Дождаться конца профилирования; путь к файлу со стеками."""
+        thread = self._thread
+        if thread is not None:
+            await asyncio.to_thread(thread.join)
+        return self.path
+
+    def _sample(self, loop: asyncio.AbstractEventLoop, ident: int, seconds: float, path: Path) -> None:
+        stacks: Tally[str] = Tally()
+        period = 1 / PROFILE_HZ
+        deadline = time.monotonic() + seconds
+        while not self._stop.wait(period) and time.monotonic() < deadline:
+            frame = sys._current_frames().get(ident)
+            if frame is None:
+                break  # поток loop завершился
+            names = [_task_name(loop), *(_frame_name(f.f_code) for f in _stack(frame))]
+            stacks[";".join(names)] += 1
+        path.parent.mkdir(exist_ok=True)
+        with path.open("w", encoding="utf-8") as fh:
+            for stack, count in stacks.most_common():
+                fh.write(f"{stack} {count}\n")
+        logging.info("Profiler: %d samples written to %s", sum(stacks.values()), path)
+
+
+SAMPLER = Sampler()
+
+
+def top_frames(path: Path, limit: int = 5) -> List[tuple[str, float]]:
+    """
+    Самые «горячие» места для ответа в чат: у каждого сэмпла — самый
+    глубокий кадр проекта внутри задачи (ниже кода asyncio); loop
+    в select() — «idle». Результат: (кадр, доля сэмплов).
+    """
+    hot: Tally[str] = Tally()
+    total = 0
+    with path.open(encoding="utf-8") as fh:
+        for line in fh:
+            stack, _, count = line.rstrip("\n").rpartition(" ")
+            frames = stack.split(";")[1:]
+            inner = frames[_below_loop([f.split(" (", 1)[-1] for f in frames]):]
+            own = [f for f in inner if "(bot/" in f or "(main.py" in f]
+            hot[own[-1] if own else inner[-1] if inner else "idle"] += int(count)
+            total += int(count)
+    return [(name, count / total) for name, count in hot.most_common(limit)] if total else []
+
+
+# ───────────────────────────── запуск ──────────────────────────────
+def _toggle_profile() -> None:
+    if SAMPLER.running:
+        SAMPLER.stop()
+    else:
+        SAMPLER.start()
+
+
+def start_loop_monitor() -> LoopMonitor:
+    """Мониторинг лага и SIGUSR1 → профайлер; вызывать внутри работающего loop."""
+    MONITOR.start()
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, _toggle_profile)
+    except (NotImplementedError, AttributeError):  # Windows: ни add_signal_handler, ни SIGUSR1
+        pass
+    return MONITOR
@@ -0,0 +1,137 @@
+"""
+scheduler.py — адаптивное расписание опроса одного источника
+• fixed-rate: следующий тик считается от начала прошлого, а не от конца;
+• jitter, чтобы источники не стреляли синхронно;
+• экспоненциальный backoff на ошибках и 429 (с учётом Retry-After);
+• ускорение, пока ответы источника недавно менялись, — в пределах
+  общего бюджета (PollBudget): лишние запросы активного источника
+  оплачивают тихие, опрашиваясь реже базы (не реже base × POLL_MAX_STRETCH),
+  и суммарный объём запросов не превышает объёма с базовыми интервалами.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import time
+import weakref
+from typing import Optional
+
+import httpx
+
+POLL_JITTER = float(os.getenv("POLL_JITTER", "0.1"))          # ±10 % интервала
+POLL_SPEEDUP = float(os.getenv("POLL_SPEEDUP", "0.5"))        # ×0.5 после изменения
+POLL_MIN_FACTOR = float(os.getenv("POLL_MIN_FACTOR", "0.25"))  # не чаще base/4
+POLL_MAX_STRETCH = float(os.getenv("POLL_MAX_STRETCH", "2"))   # тихий — не реже base×2
+POLL_MAX_BACKOFF = float(os.getenv("POLL_MAX_BACKOFF", "900"))  # сек
+
+
+def interval_for(kind: str, name: str, default: float) -> float:
+    """POLL_INTERVAL_API_BINANCE, POLL_INTERVAL_CMS_OKX … либо default."""
+    return float(os.getenv(f"POLL_INTERVAL_{kind}_{name}".upper(), default))
+
+
+def _retry_after(exc: BaseException) -> float | None:
+    """Сколько просит подождать биржа (429/418), если просит."""
+    if isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code in (418, 429):
+        try:
+            return float(exc.response.headers.get("Retry-After", "0")) or None
+        except ValueError:
+            return None
+    return None
+
+
+class PollBudget:
+    """
+    Общий бюджет запросов: Σ 1/base всех расписаний. Ускоренные
+    (interval < base) тратят сверх базы, тихие (interval ≥ base)
+    опрашиваются реже ровно настолько, чтобы это оплатить.
+    """
+
+    def __init__(self) -> None:
+        self._schedules: "weakref.WeakSet[PollSchedule]" = weakref.WeakSet()
+
+    def add(self, sched: "PollSchedule") -> None:
+        self._schedules.add(sched)
+
+    def _quiet_rate(self, exclude: Optional["PollSchedule"] = None) -> float:
+        return sum(1 / s.base for s in self._schedules if s is not exclude and s.interval >= s.base)
+
+    def _extra_rate(self, exclude: Optional["PollSchedule"] = None) -> float:
+        return sum(1 / s.interval - 1 / s.base for s in self._schedules
+                   if s is not exclude and s.interval < s.base)
+
+    def fast_interval(self, sched: "PollSchedule", desired: float) -> float:
+        """Самый частый интервал для sched, который ещё оплачивают тихие источники."""
+        spare = self._quiet_rate(sched) * (1 - 1 / POLL_MAX_STRETCH) - self._extra_rate(sched)
+        if spare <= 0:
+            return sched.base
+        return max(desired, 1 / (1 / sched.base + spare))
+
+    def quiet_interval(self, sched: "PollSchedule") -> float:
+        """Интервал тихого sched: его доля в оплате ускоренных источников."""
+        extra = self._extra_rate(sched)
+        if extra <= 0:
+            return sched.base
+        quiet = self._quiet_rate()
+        return sched.base * quiet / max(quiet - extra, quiet / POLL_MAX_STRETCH)
+
+
+BUDGET = PollBudget()
+
+
+class PollSchedule:
+    def __init__(self, name: str, interval: float, budget: PollBudget = BUDGET) -> None:
+        self.name = name
+        self.base = interval
+        self.interval = interval
+        self.budget = budget
+        budget.add(self)
+        self.failures = 0
+        now = time.monotonic()
+        # первый тик — со случайным сдвигом внутри окна jitter
+        self._next = now + random.uniform(0, self.base * POLL_JITTER)
+        self._started = now
+        self._wake = asyncio.Event()
+
+    async def wait(self) -> None:
+        """Спит до следующего тика (или до wake())."""
+        delay = self._next - time.monotonic()
+        if delay > 0:
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+        self._wake.clear()
+        self._started = time.monotonic()
+
+    def wake(self) -> None:
+        """Внеочередной опрос прямо сейчас (внешний триггер)."""
+        self._wake.set()
+
+    def succeeded(self, changed: bool) -> None:
+        self.failures = 0
+        floor = self.base * POLL_MIN_FACTOR
+        if changed:
+            desired = max(floor, min(self.interval, self.base) * POLL_SPEEDUP)
+            self.interval = self.budget.fast_interval(self, desired)
+        elif self.interval < self.base:
+            # плавно возвращаемся к базовому интервалу
+            self.interval = min(self.base, self.interval * 1.5)
+        else:
+            self.interval = self.budget.quiet_interval(self)
+        self._plan(self.interval)
+
+    def failed(self, exc: BaseException) -> None:
+        self.failures += 1
+        delay = min(POLL_MAX_BACKOFF, self.base * 2 ** self.failures)
+        if (hint := _retry_after(exc)) is not None:
+            delay = max(delay, hint)
+        self.interval = self.base
+        self._plan(delay)
+
+    def _plan(self, delay: float) -> None:
+        delay *= 1 + random.uniform(-POLL_JITTER, POLL_JITTER)
+        # от начала тика (fixed-rate); пропущенные тики не догоняем
+        self._next = max(self._started + delay, time.monotonic())
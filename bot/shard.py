@@ -0,0 +1,92 @@
+"""
+shard.py — шардированный режим: источники опроса по процессам
+• источник — "api:Binance", "cms:OKX" …; «свой» воркер у каждого —
+  crc32(источник) % WORKERS;
+• владение подтверждается арендой в таблице leases на LEASE_TTL секунд,
+  продлевается каждую треть TTL; не продлил — источник уходит другому;
+• упавший воркер: свои источники перезапущенный забирает сразу по
+  истечении аренды, любой другой — спустя ещё LEASE_TTL (чтобы не
+  перебивать перезапуск и не гонять источники туда-сюда); на старте
+  супервизор делает все аренды свободными «с этого момента» (reset),
+  так что и первое распределение идёт по шардам;
+• дубли уведомлений при перехвате отсекает ключ идемпотентности
+  в outbox (db.outbox_put_many).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import time
+import zlib
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from bot.db import lease_acquire, lease_release, lease_reset
+
+LEASE_TTL = float(os.getenv("LEASE_TTL", "30"))
+
+
+def shard_of(source: str, total: int) -> int:
+    return zlib.crc32(source.encode()) % total
+
+
+async def reset_leases(db, sources: List[str]) -> None:
+    await lease_reset(db, sources, time.time())
+
+
+class Leases:
+    """
+    Держит аренды источников и запускает/гасит их раннеры.
+    sources: источник → фабрика корутины раннера;
+    on_acquire(источник) вызывается перед запуском только что взятого.
+    """
+
+    def __init__(
+        self,
+        db,
+        shard: int,
+        total: int,
+        sources: Dict[str, Callable[[], Awaitable[None]]],
+        on_acquire: Optional[Callable[[str], Awaitable[None]]] = None,
+    ) -> None:
+        self.db = db
+        self.shard = shard
+        self.total = total
+        self.sources = sources
+        self.on_acquire = on_acquire
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{shard}"
+        self.tasks: Dict[str, asyncio.Task] = {}
+
+    async def run(self) -> None:
+        try:
+            while True:
+                try:
+                    await self._tick()
+                except Exception as exc:  # БД занята и т.п. — повторим на следующем тике
+                    logging.error("Worker %s: lease renewal failed: %s", self.owner, exc)
+                await asyncio.sleep(LEASE_TTL / 3)
+        finally:
+            for task in self.tasks.values():
+                task.cancel()
+            await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+            await lease_release(self.db, self.owner, time.time())
+
+    async def _tick(self) -> None:
+        now = time.time()
+        for source, start in self.sources.items():
+            mine = shard_of(source, self.total) == self.shard
+            held = await lease_acquire(
+                self.db, source, self.owner, LEASE_TTL, 0.0 if mine else LEASE_TTL, now
+            )
+            task = self.tasks.get(source)
+            if held and task is None:
+                logging.info("Worker %s: took %s", self.owner, source)
+                if self.on_acquire is not None:
+                    await self.on_acquire(source)
+                self.tasks[source] = asyncio.create_task(start(), name=source)
+            elif not held and task is not None:
+                logging.warning("Worker %s: lost lease on %s", self.owner, source)
+                task.cancel()
+                del self.tasks[source]
@@ -0,0 +1,137 @@
+"""
+subscribers.py — подписчики рассылки и индекс их фильтров
+• Subscription — chat_id + множества бирж и рынков (пустое = все);
+• FilterIndex  — (биржа | *, рынок | *) → чаты: событие сопоставляется
+                 за несколько обращений к dict, а не перебором всех
+                 подписчиков; подписка на N бирж × M рынков кладётся
+                 в N×M ячеек заранее, при /subscribe;
+• CHAT_ID из .env — подписчик «на всё», в БД не хранится и всегда
+  идёт первым в рассылке.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from bot.db import subscriber_delete, subscriber_put, subscribers_load
+
+EXCHANGES = ("Binance", "Bybit", "OKX", "Bitget")
+MARKETS = ("spot", "futures", "cms")
+ANY = "*"
+
+# market_type события → рынки фильтра ("Unknown" — CMS-анонс)
+_EVENT_MARKETS: Dict[str, Tuple[str, ...]] = {
+    "Spot": ("spot",),
+    "Futures": ("futures",),
+    "Both": ("spot", "futures"),
+    "Unknown": ("cms",),
+}
+
+
+@dataclass(frozen=True, slots=True)
+class Subscription:
+    chat_id: str
+    exchanges: FrozenSet[str] = frozenset()  # пусто — все биржи
+    markets: FrozenSet[str] = frozenset()    # пусто — все рынки
+
+    def describe(self) -> str:
+        exchanges = ", ".join(e for e in EXCHANGES if e in self.exchanges) or "все биржи"
+        markets = ", ".join(m for m in MARKETS if m in self.markets) or "все рынки"
+        return f"{exchanges}; {markets}"
+
+
+def parse_filters(args: Iterable[str]) -> Tuple[FrozenSet[str], FrozenSet[str], List[str]]:
+    """Аргументы /subscribe → (биржи, рынки, нераспознанное); регистр не важен."""
+    by_name = {e.lower(): e for e in EXCHANGES}
+    exchanges, markets, unknown = set(), set(), []
+    for arg in args:
+        word = arg.strip(",").lower()
+        if word in by_name:
+            exchanges.add(by_name[word])
+        elif word in MARKETS:
+            markets.add(word)
+        elif word:
+            unknown.append(arg)
+    return frozenset(exchanges), frozenset(markets), unknown
+
+
+class FilterIndex:
+    def __init__(self) -> None:
+        # dict вместо set: порядок вставки = порядок рассылки
+        self._cells: Dict[Tuple[str, str], Dict[str, None]] = {}
+        self._subs: Dict[str, Subscription] = {}
+
+    def __len__(self) -> int:
+        return len(self._subs)
+
+    def clear(self) -> None:
+        self._cells.clear()
+        self._subs.clear()
+
+    def get(self, chat_id: str) -> Optional[Subscription]:
+        return self._subs.get(chat_id)
+
+    def add(self, sub: Subscription) -> None:
+        self.remove(sub.chat_id)
+        self._subs[sub.chat_id] = sub
+        for key in _cells_of(sub):
+            self._cells.setdefault(key, {})[sub.chat_id] = None
+
+    def remove(self, chat_id: str) -> bool:
+        sub = self._subs.pop(chat_id, None)
+        if sub is None:
+            return False
+        for key in _cells_of(sub):
+            cell = self._cells[key]
+            del cell[chat_id]
+            if not cell:
+                del self._cells[key]
+        return True
+
+    def match(self, exchange: str, market: str) -> List[str]:
+        """Чаты, чьи фильтры пропускают событие; подписчики «на всё» — первыми."""
+        markets = _EVENT_MARKETS.get(market, ("cms",))
+        found: Dict[str, None] = {}
+        for exch in (ANY, exchange):
+            for mkt in (ANY, *markets):
+                cell = self._cells.get((exch, mkt))
+                if cell:
+                    found.update(cell)
+        return list(found)
+
+
+def _cells_of(sub: Subscription) -> Iterable[Tuple[str, str]]:
+    for exch in sub.exchanges or (ANY,):
+        for mkt in sub.markets or (ANY,):
+            yield exch, mkt
+
+
+INDEX = FilterIndex()
+
+
+async def load_subscribers(db, default_chat: Optional[str]) -> None:
+    """Индекс из таблицы subscribers; default_chat (CHAT_ID) — первым и на всё."""
+    INDEX.clear()
+    if default_chat:
+        INDEX.add(Subscription(default_chat))
+    for chat_id, exchanges, markets in await subscribers_load(db):
+        if chat_id == default_chat:
+            continue
+        INDEX.add(Subscription(
+            chat_id,
+            frozenset(filter(None, exchanges.split(","))),
+            frozenset(filter(None, markets.split(","))),
+        ))
+    logging.debug("Subscribers: %d chats", len(INDEX))
+
+
+async def subscribe(db, sub: Subscription) -> None:
+    await subscriber_put(db, sub.chat_id, ",".join(sorted(sub.exchanges)), ",".join(sorted(sub.markets)))
+    INDEX.add(sub)
+
+
+async def unsubscribe(db, chat_id: str) -> bool:
+    INDEX.remove(chat_id)
+    return await subscriber_delete(db, chat_id)
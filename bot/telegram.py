@@ -1,26 +1,304 @@
+import asyncio
 import logging
 import os
+import time
 from typing import Final
 
-from aiogram.exceptions import TelegramAPIError
+from aiogram.exceptions import (
+    TelegramAPIError,
+    TelegramForbiddenError,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
 
 from bot.core import bot
+from bot.db import outbox_after, outbox_done, outbox_pending, outbox_put_many
+from bot.metrics import SEND_SECONDS, SOURCE
+from bot.ratelimit import TokenBucket
+from bot.subscribers import INDEX, unsubscribe
 
 CHAT_ID: Final[str | None] = os.getenv("CHAT_ID") or os.getenv("TG_CHAT_ID")
 
 if CHAT_ID is None:
     raise RuntimeError("CHAT_ID (или TG_CHAT_ID) не задан в .env")
 
-async def send(text: str) -> None:
-    """
-    Отправляет текстовое сообщение без превью ссылок.
-    Используется всеми анонсерами.
-    """
+# ───────────────────── лимиты Telegram ─────────────────────
+# ~30 сообщений/с на бота, ~20/мин в группу/канал
+TG_GLOBAL_PER_SEC: Final[float] = float(os.getenv("TG_GLOBAL_PER_SEC", "25"))
+TG_CHAT_PER_MIN: Final[float] = float(os.getenv("TG_CHAT_PER_MIN", "20"))
+TG_CHAT_BURST: Final[float] = float(os.getenv("TG_CHAT_BURST", "3"))
+# сколько ждать «соседей» по всплеску, чтобы склеить их в одно сообщение
+TG_COALESCE: Final[float] = int(os.getenv("TG_COALESCE_MS", "500")) / 1000
+TG_MAX_LEN: Final[int] = 4096
+TG_MAX_BACKOFF: Final[float] = 60.0
+
+
+async def _send_now(chat_id: str, text: str) -> None:
+    start = time.perf_counter()
+    result = "error"
     try:
         await bot.send_message(
-            chat_id=CHAT_ID,
-            text=text.strip(),
+            chat_id=chat_id,
+            text=text,
             disable_web_page_preview=True,
         )
-    except TelegramAPIError as exc:
-        logging.exception("Failed to send message to Telegram: %s", exc)
+        result = "ok"
+    except TelegramRetryAfter:
+        result = "flood"
+        raise
+    finally:
+        SEND_SECONDS.observe(time.perf_counter() - start, result=result)
+
+
+def _merge(items: list[tuple[int, str, str]]) -> list[tuple[list[int], str, str]]:
+    """
+    Склеивает тексты через пустую строку, не превышая лимит длины.
+    Источник склейки — общий источник частей, иначе "mixed".
+    """
+    merged: list[tuple[list[int], str, str]] = []
+    ids: list[int] = []
+    text = source = ""
+    for row_id, part, part_source in items:
+        candidate = f"{text}\n\n{part}" if text else part
+        if text and len(candidate) > TG_MAX_LEN:
+            merged.append((ids, text, source))
+            ids, candidate = [], part
+        source = part_source if not ids or source == part_source else "mixed"
+        ids.append(row_id)
+        text = candidate
+    if ids:
+        merged.append((ids, text, source))
+    return merged
+
+
+# ───────────────────── очередь доставки ────────────────────
+class _Delivery:
+    """
+    Outbox → очередь → token bucket → Telegram.
+    Сообщение сначала сохраняется в БД и удаляется только после
+    успешной отправки; всё, что пришло в одном всплеске, склеивается.
+    У каждого чата свой воркер: пока он ждёт лимита, новые события
+    для этого чата копятся и уйдут одним сообщением, а медленный
+    чат не держит остальных.
+    mode: local    — пишем в outbox и сами же отправляем;
+          writer   — только пишем (воркер шардированного режима);
+          follower — отправляем всё, что появляется в outbox, в т.ч.
+                     от других процессов (супервизор): лимиты Telegram
+                     общие на бота, поэтому шлёт ровно один процесс.
+    """
+
+    def __init__(self, db, mode: str = "local") -> None:
+        self.db = db
+        self.mode = mode
+        self.last_id = 0
+        self.queue: asyncio.Queue[tuple[int, str, str, str]] = asyncio.Queue()
+        self.global_bucket = TokenBucket(TG_GLOBAL_PER_SEC, TG_GLOBAL_PER_SEC)
+        self.chat_buckets: dict[str, TokenBucket] = {}
+        self.pending: dict[str, list[tuple[int, str, str]]] = {}
+        self.workers: dict[str, asyncio.Task] = {}
+        self.acked: list[int] = []
+        self._has_acks = asyncio.Event()
+        self.task: asyncio.Task | None = None
+        self.acker: asyncio.Task | None = None
+        self.follower: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if self.mode == "writer":
+            return  # отправляет другой процесс
+        pending = await outbox_pending(self.db)
+        if pending:
+            logging.info("Telegram outbox: resending %d undelivered messages", len(pending))
+            self.last_id = pending[-1][0]
+        for row in pending:
+            self.queue.put_nowait(row)
+        self.task = asyncio.create_task(self._run(), name="telegram-delivery")
+        self.acker = asyncio.create_task(self._ack_loop(), name="telegram-outbox-ack")
+        if self.mode == "follower":
+            self.follower = asyncio.create_task(self._follow(), name="telegram-outbox-follow")
+
+    async def put(self, chat_ids: list[str], text: str, key: str | None = None) -> None:
+        """
+        Одна запись outbox на чат, все — одной транзакцией.
+        key — ключ идемпотентности: повтор того же события не пишется.
+        """
+        source = SOURCE.get()
+        row_ids = await outbox_put_many(self.db, [(chat_id, text) for chat_id in chat_ids], key, source)
+        if self.mode != "local":
+            return  # из outbox заберёт follower
+        for row_id, chat_id in zip(row_ids, chat_ids):
+            self.queue.put_nowait((row_id, chat_id, text, source))
+
+    async def _follow(self) -> None:
+        """Подбирает строки outbox, записанные после last_id (ids растут монотонно)."""
+        backoff = TG_COALESCE
+        while True:
+            await asyncio.sleep(backoff)
+            try:
+                rows = await outbox_after(self.db, self.last_id)
+                backoff = TG_COALESCE
+            except Exception as exc:
+                backoff = min(backoff * 2, TG_MAX_BACKOFF)
+                logging.error("Telegram outbox: failed to read new rows, retry in %.1fs: %s", backoff, exc)
+                continue
+            for row in rows:
+                self.queue.put_nowait(row)
+            if rows:
+                self.last_id = rows[-1][0]
+
+    def _bucket(self, chat_id: str) -> TokenBucket:
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(TG_CHAT_PER_MIN / 60, TG_CHAT_BURST)
+            self.chat_buckets[chat_id] = bucket
+        return bucket
+
+    async def _run(self) -> None:
+        backoff = TG_COALESCE
+        while True:
+            batch = [await self.queue.get()]
+            await asyncio.sleep(TG_COALESCE)
+            while not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            try:
+                self._dispatch(batch)
+                backoff = TG_COALESCE
+            except Exception:
+                # цикл доставки не должен умирать молча: строки в outbox, повторим позже
+                logging.exception("Telegram delivery loop failed, retry in %.1fs", backoff)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, TG_MAX_BACKOFF)
+
+    def _dispatch(self, batch: list[tuple[int, str, str, str]]) -> None:
+        while batch:
+            row_id, chat_id, text, source = batch[0]
+            if chat_id not in self.workers:
+                self.workers[chat_id] = asyncio.create_task(
+                    self._chat_worker(chat_id), name=f"telegram-{chat_id}"
+                )
+            self.pending.setdefault(chat_id, []).append((row_id, text, source))
+            batch.pop(0)
+
+    async def _chat_worker(self, chat_id: str) -> None:
+        try:
+            while items := self.pending.pop(chat_id, None):
+                await self._deliver_chat(chat_id, items)
+        except Exception:
+            # строки остались в outbox — уйдут после рестарта
+            logging.exception("Telegram delivery to %s failed", chat_id)
+        finally:
+            del self.workers[chat_id]
+
+    async def _deliver_chat(self, chat_id: str, items: list[tuple[int, str, str]]) -> None:
+        for ids, text, source in _merge(items):
+            SOURCE.set(source or "-")  # задача чата своя — метка только для её замеров
+            await self._deliver(chat_id, text)
+            self.acked += ids
+            self._has_acks.set()
+
+    async def _ack_loop(self) -> None:
+        """Чистит outbox пачками: один DELETE на всплеск, а не на каждый чат."""
+        backoff = TG_COALESCE
+        while True:
+            await self._has_acks.wait()
+            await asyncio.sleep(backoff)
+            try:
+                await self._flush_acks()
+                backoff = TG_COALESCE
+            except Exception as exc:
+                backoff = min(backoff * 2, TG_MAX_BACKOFF)
+                logging.error("Telegram outbox: failed to drop delivered rows, retry in %.1fs: %s",
+                              backoff, exc)
+
+    async def _flush_acks(self) -> None:
+        ids, self.acked = self.acked, []
+        self._has_acks.clear()
+        if not ids:
+            return
+        try:
+            await outbox_done(self.db, ids)
+        except BaseException:
+            # не удалили — иначе после рестарта уйдут повторно
+            self.acked = ids + self.acked
+            self._has_acks.set()
+            raise
+
+    async def _deliver(self, chat_id: str, text: str) -> None:
+        """
+        Ретраит флуд-лимиты и сетевые ошибки с растущей паузой;
+        постоянные ошибки (bad request, бот удалён из чата) — в лог.
+        """
+        bucket = self._bucket(chat_id)
+        backoff = 1.0
+        while True:
+            # сначала лимит чата: ждущий своей очереди чат не тратит общий токен
+            await bucket.acquire()
+            await self.global_bucket.acquire()
+            try:
+                await _send_now(chat_id, text)
+                return
+            except TelegramRetryAfter as exc:
+                logging.warning("Telegram flood limit for %s, retry in %ss", chat_id, exc.retry_after)
+                bucket.pause(exc.retry_after)
+            except (TelegramNetworkError, TelegramServerError) as exc:
+                logging.warning("Telegram send failed (%s), retry in %.0fs", exc, backoff)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, TG_MAX_BACKOFF)
+            except TelegramForbiddenError as exc:
+                # бота заблокировали / выгнали из чата — не тратим на него лимит
+                logging.warning("Telegram chat %s is gone (%s), unsubscribing", chat_id, exc)
+                if chat_id != CHAT_ID:
+                    await unsubscribe(self.db, chat_id)
+                return
+            except TelegramAPIError as exc:
+                logging.exception("Failed to send message to Telegram: %s", exc)
+                return
+
+    async def stop(self) -> None:
+        tasks = [
+            t for t in (self.task, self.acker, self.follower, *self.workers.values()) if t is not None
+        ]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._flush_acks()  # доставленное не должно уйти повторно после рестарта
+
+
+_DELIVERY: _Delivery | None = None
+
+
+async def start_delivery(db, mode: str = "local") -> None:
+    """Поднимает очередь доставки и дозакидывает недоставленное из outbox."""
+    global _DELIVERY
+    _DELIVERY = _Delivery(db, mode)
+    await _DELIVERY.start()
+
+
+async def stop_delivery() -> None:
+    """Останавливает очередь; недоставленное остаётся в outbox до рестарта."""
+    global _DELIVERY
+    if _DELIVERY is not None:
+        await _DELIVERY.stop()
+        _DELIVERY = None
+
+
+async def send(
+    text: str, *, exchange: str | None = None, market: str | None = None, key: str | None = None
+) -> None:
+    """
+    Ставит текстовое сообщение (без превью ссылок) в очередь доставки.
+    Используется всеми анонсерами. С exchange/market — всем подписчикам,
+    чьи фильтры пропускают событие (CHAT_ID — первым), иначе только в
+    CHAT_ID. key — ключ события: второй send с тем же ключом (например,
+    из другого процесса) ничего не отправит. Без запущенной очереди —
+    шлёт сразу.
+    """
+    chats = INDEX.match(exchange, market or "Unknown") if exchange and len(INDEX) else [CHAT_ID]
+    if _DELIVERY is not None:
+        await _DELIVERY.put(chats, text.strip(), key)
+        return
+    for chat_id in chats:
+        try:
+            await _send_now(chat_id, text.strip())
+        except TelegramAPIError as exc:
+            logging.exception("Failed to send message to Telegram: %s", exc)
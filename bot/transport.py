@@ -0,0 +1,415 @@
+"""
+transport.py — подменяемый транспорт под общим HTTP-клиентом.
+Режим выбирается переменной HTTP_TRANSPORT:
+• live      — обычная сеть (по умолчанию);
+• record    — сеть + запись каждого ответа (статус, заголовки, тело,
+              время ответа) в HTTP_TAPE_DIR;
+• replay    — ответы только с ленты HTTP_TAPE_DIR, по порядку записи
+              для каждого URL, с искусственной задержкой;
+• synthetic — сгенерированные списки инструментов (SYNTH_SYMBOLS на
+              рынок) и CMS-ленты; каждые SYNTH_NEW_EVERY секунд на одной
+              из бирж «листится» новая монета; SYNTH_LISTING_LEAD > 0 —
+              анонс выходит заранее, со временем старта торгов.
+Нагрузочный прогон без сети — tools/soak.py.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable, Optional
+
+import httpx
+
+from bot.hedge import canonical_host
+
+HTTP_TRANSPORT = os.getenv("HTTP_TRANSPORT", "live").lower()
+HTTP_TAPE_DIR = Path(os.getenv("HTTP_TAPE_DIR", "data/tape"))
+# задержка ответа в replay/synthetic; пусто — записанная на ленте (replay) или 50 мс
+HTTP_FAKE_LATENCY_MS = os.getenv("HTTP_FAKE_LATENCY_MS", "")
+HTTP_FAKE_JITTER_MS = float(os.getenv("HTTP_FAKE_JITTER_MS", "0"))
+# synthetic: доля «зависших» ответов и на сколько; хосты, отвечающие 503
+HTTP_FAKE_STALL_P = float(os.getenv("HTTP_FAKE_STALL_P", "0"))
+HTTP_FAKE_STALL_MS = float(os.getenv("HTTP_FAKE_STALL_MS", "5000"))
+HTTP_FAKE_DOWN_HOSTS = frozenset(filter(None, os.getenv("HTTP_FAKE_DOWN_HOSTS", "").split(",")))
+SYNTH_SYMBOLS = int(os.getenv("SYNTH_SYMBOLS", "3000"))
+SYNTH_NEW_EVERY = float(os.getenv("SYNTH_NEW_EVERY", "30"))
+SYNTH_SEED = int(os.getenv("SYNTH_SEED", "1"))
+SYNTH_LISTING_LEAD = float(os.getenv("SYNTH_LISTING_LEAD", "0"))
+
+_CHUNK = 64 * 1024
+
+
+class _Chunked(httpx.AsyncByteStream):
+    """Тело из памяти, но отдаётся кусками — как настоящая загрузка."""
+
+    def __init__(self, body: bytes) -> None:
+        self._body = body
+
+    async def __aiter__(self):
+        for i in range(0, len(self._body), _CHUNK):
+            yield self._body[i:i + _CHUNK]
+
+
+def _delay(recorded: float = 0.05) -> float:
+    base = float(HTTP_FAKE_LATENCY_MS) / 1000 if HTTP_FAKE_LATENCY_MS else recorded
+    jitter = HTTP_FAKE_JITTER_MS / 1000
+    return max(0.0, base + random.uniform(-jitter, jitter))
+
+
+# ───────────────────────────── запись ─────────────────────────────
+# Лента: tape.jsonl (по строке на ответ) + bodies/<sha1> — одинаковые
+# тела (неизменившийся exchangeInfo) хранятся один раз.
+class RecordingTransport(httpx.AsyncBaseTransport):
+    def __init__(self, inner: httpx.AsyncBaseTransport, tape_dir: Path) -> None:
+        self._inner = inner
+        self._dir = tape_dir
+        (tape_dir / "bodies").mkdir(parents=True, exist_ok=True)
+        self._tape = open(tape_dir / "tape.jsonl", "a", encoding="utf-8", buffering=1)
+        self._started = time.monotonic()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        start = time.perf_counter()
+        response = await self._inner.handle_async_request(request)
+        try:
+            body = b"".join([chunk async for chunk in response.stream])
+        finally:
+            await response.stream.aclose()
+        elapsed = time.perf_counter() - start
+
+        digest = hashlib.sha1(body).hexdigest()
+        path = self._dir / "bodies" / digest
+        if not path.exists():
+            path.write_bytes(body)
+        self._tape.write(json.dumps({
+            "t": round(time.monotonic() - self._started, 3),
+            "method": request.method,
+            "url": str(request.url),
+            "status": response.status_code,
+            "headers": response.headers.multi_items(),
+            "elapsed": round(elapsed, 4),
+            "body": digest,
+        }) + "\n")
+        # сырые байты: content-encoding остаётся как прислал сервер
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            content=body,
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        self._tape.close()
+        await self._inner.aclose()
+
+
+# ─────────────────────────── воспроизведение ──────────────────────
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """
+    Для каждого (method, url) отдаёт записанные ответы по очереди;
+    дойдя до последнего, повторяет его. Незаписанный URL — 404.
+    """
+
+    def __init__(self, tape_dir: Path) -> None:
+        self._dir = tape_dir
+        self._records: dict[tuple[str, str], list[dict]] = defaultdict(list)
+        with open(tape_dir / "tape.jsonl", encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    rec = json.loads(line)
+                    self._records[(rec["method"], rec["url"])].append(rec)
+        self._pos: dict[tuple[str, str], int] = defaultdict(int)
+        logging.info("HTTP replay: %d URLs from %s", len(self._records), tape_dir)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = (request.method, str(request.url))
+        records = self._records.get(key)
+        if not records:
+            logging.warning("HTTP replay: no recording for %s %s", *key)
+            return httpx.Response(404, request=request)
+        i = self._pos[key]
+        self._pos[key] = min(i + 1, len(records) - 1)
+        rec = records[i]
+
+        await asyncio.sleep(_delay(rec["elapsed"]))
+        body = (self._dir / "bodies" / rec["body"]).read_bytes()
+        return httpx.Response(rec["status"], headers=rec["headers"], stream=_Chunked(body))
+
+
+# ─────────────────────────── синтетика ────────────────────────────
+def _base(i: int) -> str:
+    """0 → "SBA", 1 → "SBB" … — уникальные тикеры, которые понимают все парсеры."""
+    name = ""
+    i += 26
+    while i:
+        i, r = divmod(i, 26)
+        name = chr(65 + r) + name
+    return "S" + name
+
+
+# одинаковый «балласт» на инструмент, чтобы размер ответа рос как у бирж
+_PAD = ',"status":"TRADING","filters":[{"filterType":"PRICE_FILTER","minPrice":"0.00000100",' \
+       '"maxPrice":"100000.00000000","tickSize":"0.00000100"},{"filterType":"LOT_SIZE",' \
+       '"minQty":"0.10000000","maxQty":"92141578.00000000","stepSize":"0.10000000"}]'
+
+EXCHANGES = ("Binance", "Bybit", "OKX", "Bitget")
+_SPOT = {e: f"{e.lower()}_spot" for e in EXCHANGES}
+_FUTURES = {"Binance": "binance_futures", "Bybit": "bybit_linear",
+            "OKX": "okx_futures", "Bitget": "bitget_futures"}
+
+
+class _Market:
+    """Список инструментов одного рынка: items растёт, тело кешируется."""
+
+    def __init__(self, item: Callable[[str], str], wrap: Callable[[str], str]) -> None:
+        self._item = item
+        self._wrap = wrap
+        self.items: list[str] = []
+        self._body: Optional[bytes] = None
+
+    def add(self, base: str) -> None:
+        self.items.append(self._item(base))
+        self._body = None
+
+    def body(self) -> bytes:
+        if self._body is None:
+            self._body = self._wrap(",".join(self.items)).encode()
+        return self._body
+
+    def only(self, name: str) -> Optional[bytes]:
+        """Тело с одним инструментом name; None — такого нет."""
+        quoted = f'"{name}"'
+        items = [item for item in self.items if quoted in item]
+        return self._wrap(",".join(items)).encode() if items else None
+
+
+class SyntheticWorld:
+    """
+    Модель четырёх бирж: по SYNTH_SYMBOLS инструментов на рынок и
+    CMS-ленты. Новые листинги добавляются лениво — при запросе, за всё
+    прошедшее время, — поэтому результат не зависит от частоты опроса.
+    injected: тикер → (биржа, time.time() анонса) — для замера задержки;
+    live: тикер → time.time() старта торгов (анонс + lead).
+    """
+
+    def __init__(self, symbols: int, new_every: float, seed: int, lead: float = 0.0) -> None:
+        self.new_every = new_every
+        self.lead = lead
+        self.injected: dict[str, tuple[str, float]] = {}
+        self.live: dict[str, float] = {}
+        self._upcoming: list[tuple[float, str, str]] = []  # (старт, биржа, тикер)
+        self._rng = random.Random(seed)
+        self._next = 0
+        self._started = time.time()
+        self._due = 0
+        self.markets = {
+            "binance_spot": _Market(
+                lambda b: f'{{"symbol":"{b}USDT","baseAsset":"{b}","quoteAsset":"USDT"{_PAD}}}',
+                lambda s: f'{{"timezone":"UTC","symbols":[{s}]}}'),
+            "binance_futures": _Market(
+                lambda b: f'{{"symbol":"{b}USDT","pair":"{b}USDT","contractType":"PERPETUAL"{_PAD}}}',
+                lambda s: f'{{"timezone":"UTC","symbols":[{s}]}}'),
+            "bybit_spot": _Market(
+                lambda b: f'{{"symbol":"{b}USDT","baseCoin":"{b}","quoteCoin":"USDT"{_PAD}}}',
+                lambda s: f'{{"retCode":0,"retMsg":"OK","result":{{"category":"spot","list":[{s}]}}}}'),
+            "bybit_linear": _Market(
+                lambda b: f'{{"symbol":"{b}USDT","contractType":"LinearPerpetual"{_PAD}}}',
+                lambda s: f'{{"retCode":0,"retMsg":"OK","result":{{"category":"linear","list":[{s}]}}}}'),
+            "okx_spot": _Market(
+                lambda b: f'{{"instType":"SPOT","instId":"{b}-USDT","baseCcy":"{b}"{_PAD}}}',
+                lambda s: f'{{"code":"0","msg":"","data":[{s}]}}'),
+            "okx_futures": _Market(
+                lambda b: f'{{"instType":"FUTURES","instId":"{b}-USD-251226","uly":"{b}-USD"{_PAD}}}',
+                lambda s: f'{{"code":"0","msg":"","data":[{s}]}}'),
+            "bitget_spot": _Market(
+                lambda b: f'{{"symbol":"{b}USDT_SPBL","symbolName":"{b}USDT","baseCoin":"{b}"{_PAD}}}',
+                lambda s: f'{{"code":"00000","msg":"success","data":[{s}]}}'),
+            "bitget_futures": _Market(
+                lambda b: f'{{"symbol":"{b}USDT_UMCBL","symbolName":"{b}USDT","baseCoin":"{b}"{_PAD}}}',
+                lambda s: f'{{"code":"00000","msg":"success","data":[{s}]}}'),
+        }
+        # CMS: (тикер, ms публикации), новые — в начале ленты
+        self.articles: dict[str, list[tuple[str, int]]] = {e: [] for e in EXCHANGES}
+
+        for exchange in EXCHANGES:
+            for _ in range(symbols):
+                base = self._new_base()
+                self.markets[_SPOT[exchange]].add(base)
+                if self._rng.random() < 0.3:
+                    self.markets[_FUTURES[exchange]].add(base)
+            # в ленте уже есть прошлые анонсы — bootstrap их просто запомнит
+            for _ in range(10):
+                self.articles[exchange].insert(0, (self._new_base(), int(self._started * 1000)))
+
+    def _new_base(self) -> str:
+        base = _base(self._next)
+        self._next += 1
+        return base
+
+    def advance(self) -> None:
+        now = time.time()
+        if self.new_every > 0:
+            due = int((now - self._started) / self.new_every)
+            while self._due < due:
+                self._due += 1
+                exchange = EXCHANGES[self._rng.randrange(len(EXCHANGES))]
+                base = self._new_base()
+                at = self._started + self._due * self.new_every
+                self.articles[exchange].insert(0, (base, int(at * 1000)))
+                self.injected[base] = (exchange, at)
+                self.live[base] = at + self.lead
+                self._upcoming.append((at + self.lead, exchange, base))
+        # торги открываются по объявленному времени
+        while self._upcoming and self._upcoming[0][0] <= now:
+            _, exchange, base = self._upcoming.pop(0)
+            self.markets[_SPOT[exchange]].add(base)
+            self.markets[_FUTURES[exchange]].add(base)
+
+    def _starts(self, base: str) -> Optional[int]:
+        """Объявленный старт торгов в мс — только у анонсов «заранее»."""
+        at = self.live.get(base)
+        return int(at * 1000) if at is not None and self.lead > 0 else None
+
+    def _starts_text(self, base: str) -> str:
+        ms = self._starts(base)
+        if ms is None:
+            return ""
+        when = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(ms / 1000))
+        return f"Spot trading opens at {when} (UTC)."
+
+    # ─── рендер CMS-ответов ───
+    def _slice(self, exchange: str, size: int, page: int) -> list[tuple[str, int]]:
+        return self.articles[exchange][(page - 1) * size:page * size]
+
+    def cms_binance(self, page: int) -> bytes:
+        arts = [{"id": i, "code": f"synth{b.lower()}", "title": f"Binance Will List {b} Token ({b})",
+                 "type": 1, "releaseDate": ms}
+                for i, (b, ms) in enumerate(self._slice("Binance", 40, page))]
+        return json.dumps({"code": "000000", "data": {"articles": arts}}).encode()
+
+    def cms_bybit(self, page: int) -> bytes:
+        items = [{"title": f"New Listing: {b}USDT Perpetual Contract",
+                  "url": f"https://announcements.bybit.com/en-US/article/new-listing-{b.lower()}/",
+                  "publishTime": ms, "startDateTimestamp": self._starts(b) or ms}
+                 for b, ms in self._slice("Bybit", 50, page)]
+        return json.dumps({"retCode": 0, "retMsg": "OK", "result": {"list": items}}).encode()
+
+    def cms_bitget(self, after: Optional[str]) -> bytes:
+        arts = self.articles["Bitget"]
+        # курсор — annId (= тикер) последней статьи прошлой страницы
+        start = next((i + 1 for i, (b, _) in enumerate(arts) if b == after), 0) if after else 0
+        data = [{"annId": b, "annTitle": f"Bitget Will List {b} Token ({b})", "cTime": str(ms),
+                 "annDesc": self._starts_text(b),
+                 "annUrl": f"https://www.bitget.com/support/articles/{b.lower()}"}
+                for b, ms in arts[start:start + 10]]
+        return json.dumps({"code": "00000", "msg": "success", "data": data}).encode()
+
+    def cms_binance_detail(self, code: str) -> bytes:
+        base = code.removeprefix("synth").upper()
+        body = json.dumps({"node": "p", "child": [{"node": "text", "text": self._starts_text(base)}]})
+        return json.dumps({"code": "000000", "data": {"code": code, "body": body}}).encode()
+
+    def cms_okx_article(self, slug: str) -> bytes:
+        base = slug.removeprefix("okx-will-list-").upper()
+        return f"<html><body><article><p>{self._starts_text(base)}</p></article></body></html>".encode()
+
+    def cms_okx(self, page: int) -> bytes:
+        cards = "".join(
+            f'<li><a class="article-item" href="/help/okx-will-list-{b.lower()}">'
+            f"OKX Will List {b} Token ({b})</a></li>"
+            for b, _ in self._slice("OKX", 20, page)
+        )
+        return f"<html><body><ul>{cards}</ul></body></html>".encode()
+
+
+# (host+path, значение category/instType/productType) → рынок или CMS-лента
+_ROUTES = {
+    ("api.binance.com/api/v3/exchangeInfo", None): "binance_spot",
+    ("fapi.binance.com/fapi/v1/exchangeInfo", None): "binance_futures",
+    ("fapi.binance.com/fapi/v1/ticker/price", None): "binance_futures",
+    ("api.bybit.com/v5/market/instruments-info", "spot"): "bybit_spot",
+    ("api.bybit.com/v5/market/instruments-info", "linear"): "bybit_linear",
+    ("www.okx.com/api/v5/public/instruments", "SPOT"): "okx_spot",
+    ("www.okx.com/api/v5/public/instruments", "FUTURES"): "okx_futures",
+    ("api.bitget.com/api/spot/v1/public/products", None): "bitget_spot",
+    ("api.bitget.com/api/mix/v1/market/contracts", "umcbl"): "bitget_futures",
+    ("api.bitget.com/api/spot/v1/public/product", None): "bitget_spot",
+    ("api.bitget.com/api/mix/v1/market/ticker", None): "bitget_futures",
+    ("www.binance.com/bapi/composite/v1/public/cms/article/detail/query", None): "cms_binance_detail",
+    ("www.binance.com/bapi/composite/v1/public/cms/article/catalog/list/query", None): "cms_binance",
+    ("api.bybit.com/v5/announcements/index", None): "cms_bybit",
+    ("api.bitget.com/api/v2/public/annoucements", None): "cms_bitget",
+    ("www.okx.com/help/section/announcements-new-listings", None): "cms_okx",
+}
+_SELECTORS = ("category", "instType", "productType")
+_PROBES = ("symbol", "instId")  # запрос одного инструмента
+_OKX_ARTICLE = "www.okx.com/help/okx-will-list-"
+
+
+class SyntheticTransport(httpx.AsyncBaseTransport):
+    def __init__(self, world: SyntheticWorld) -> None:
+        self.world = world
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        url = request.url
+        if url.host in HTTP_FAKE_DOWN_HOSTS:
+            await asyncio.sleep(_delay())
+            return httpx.Response(503, request=request)
+        host = canonical_host(url.host)  # зеркала отдают то же, что основной хост
+        selector = next((url.params[k] for k in _SELECTORS if k in url.params), None)
+        path, _, page = url.path.partition("/page/")  # OKX листает путём …/page/N
+        route = _ROUTES.get((host + path, selector)) or _ROUTES.get((host + path, None))
+        if route is None and (host + path).startswith(_OKX_ARTICLE):
+            route = "cms_okx_article"
+        if route is None:
+            return httpx.Response(404, request=request)
+
+        stall = HTTP_FAKE_STALL_MS / 1000 if random.random() < HTTP_FAKE_STALL_P else 0.0
+        await asyncio.sleep(_delay() + stall)
+        self.world.advance()
+        name = next((url.params[k] for k in _PROBES if k in url.params), None)
+        if route == "cms_bitget":
+            body = self.world.cms_bitget(url.params.get("cursor"))
+        elif route == "cms_binance_detail":
+            body = self.world.cms_binance_detail(url.params.get("articleCode", ""))
+        elif route == "cms_okx_article":
+            body = self.world.cms_okx_article(path.rsplit("/", 1)[-1])
+        elif route.startswith("cms_"):
+            page = page or url.params.get("pageNo") or url.params.get("page") or "1"
+            body = getattr(self.world, route)(int(page))
+        elif name is not None:
+            body = self.world.markets[route].only(name)
+            if body is None:
+                return httpx.Response(400, request=request, json={"code": -1121, "msg": "Invalid symbol."})
+        else:
+            body = self.world.markets[route].body()
+        ctype = "text/html" if route in ("cms_okx", "cms_okx_article") else "application/json"
+        return httpx.Response(200, headers={"content-type": ctype}, stream=_Chunked(body))
+
+
+# ───────────────────────────── выбор ──────────────────────────────
+WORLD: Optional[SyntheticWorld] = None  # для tools/soak.py
+
+
+def make_transport(live: httpx.AsyncBaseTransport) -> httpx.AsyncBaseTransport:
+    """Оборачивает/подменяет сетевой транспорт согласно HTTP_TRANSPORT."""
+    global WORLD
+    if HTTP_TRANSPORT == "live":
+        return live
+    logging.warning("HTTP transport: %s", HTTP_TRANSPORT)
+    if HTTP_TRANSPORT == "record":
+        return RecordingTransport(live, HTTP_TAPE_DIR)
+    if HTTP_TRANSPORT == "replay":
+        return ReplayTransport(HTTP_TAPE_DIR)
+    if HTTP_TRANSPORT == "synthetic":
+        if WORLD is None:
+            WORLD = SyntheticWorld(SYNTH_SYMBOLS, SYNTH_NEW_EVERY, SYNTH_SEED, SYNTH_LISTING_LEAD)
+        return SyntheticTransport(WORLD)
+    raise RuntimeError(f"HTTP_TRANSPORT={HTTP_TRANSPORT!r}: ожидается live, record, replay или synthetic")
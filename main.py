@@ -1,13 +1,19 @@
 from __future__ import annotations
 
+import argparse
 import asyncio
+import contextlib
 import logging
 import os
 import re
+import signal
 import sys
+import time
 from datetime import datetime, timezone
+from dataclasses import dataclass, field, replace
+from functools import partial
 from pathlib import Path
-from typing import Iterable
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
 
 from dateutil import parser as dtparse
 
@@ -18,14 +24,42 @@ if str(ROOT_DIR) not in sys.path:
 
 # ───────────────────────── внутренние модули ───────────────────────
 from bot.db import (
-    already_seen,
+    claim,
+    close,
     connect,
     db_is_empty,
-    mark_seen,
-    symbol_exists,
+    exchange_seeded,
+    flush,
+    listing_markets,
+    observe,
+    persist,
+    release,
+    reload_exchange,
 )
-from bot.telegram import send
-from bot.core import dp  # noqa: F401
+from bot.ann_api.symbol import Market
+from bot.events import Kind, ListingEvent, events_for
+from bot.ann_cms.base import Announcement
+from bot.ann_cms.cursor import load_cursors
+from bot.burst import BurstWatch, plan
+from bot.ann_cms.http_cache import load_http_cache
+from bot.fetch import gather_bounded
+from bot.http import make_client
+from bot.metrics import (
+    DETECTION_LAG,
+    LISTING_LAG,
+    METRICS_PORT,
+    POLL_SECONDS,
+    SOURCE,
+    start_metrics_server,
+)
+from bot.pipeline import Pipeline, Stage, workers_for
+from bot.profiler import start_loop_monitor
+from bot.scheduler import PollSchedule, interval_for
+from bot.shard import Leases, reset_leases
+from bot.telegram import CHAT_ID, send, start_delivery, stop_delivery
+from bot.subscribers import load_subscribers
+from bot.commands import router as commands_router
+from bot.core import bot, dp
 
 # CMS- и API-анонcеры
 from bot.ann_cms.binance import BinanceAnnouncer
@@ -33,6 +67,7 @@ from bot.ann_cms.bybit   import BybitAnnouncer
 from bot.ann_cms.okx     import OkxAnnouncer
 from bot.ann_cms.bitget  import BitgetAnnouncer
 
+from bot.ann_api.ws import WS_FEEDS, run_feed
 from bot.ann_api.wrappers import (
     BinanceApiAnnouncer,
     BybitApiAnnouncer,
@@ -44,6 +79,16 @@ from bot.ann_api.wrappers import (
 # ───────────────────────── интервалы ───────────────────────────
 POLL_INTERVAL_API = int(os.getenv("POLL_INTERVAL_API", "60"))
 POLL_INTERVAL_CMS = int(os.getenv("POLL_INTERVAL_CMS", "90"))
+# push-детекция через WebSocket там, где биржа её позволяет (см. bot/ann_api/ws.py)
+API_WS = os.getenv("API_WS", "0").lower() in ("1", "true", "yes", "on")
+# /subscribe и прочие команды: long polling Telegram в том же процессе
+TG_COMMANDS = os.getenv("TG_COMMANDS", "1").lower() in ("1", "true", "yes", "on")
+# WORKERS > 1 — шардированный режим: источники делятся между процессами
+WORKERS = int(os.getenv("WORKERS", "1"))
+# как часто воркер перечитывает подписчиков (их меняет процесс с командами)
+SUBSCRIBERS_REFRESH = int(os.getenv("SUBSCRIBERS_REFRESH", "30"))
+
+dp.include_router(commands_router)
 
 CMS_ANNOUNCERS: Iterable[type] = (
     BinanceAnnouncer,
@@ -98,103 +143,539 @@ def is_future(ts) -> bool:
 
 
 # ─────────────────────── bootstrap ────────────────────────────────
-async def bootstrap(db):
+def _source(announcer) -> str:
+    """Метка источника для метрик: api:Binance, cms:OKX …"""
+    if hasattr(announcer, "exchange"):
+        return f"api:{announcer.exchange}"
+    return f"cms:{announcer.name}"
+
+
+async def _collect(announcer) -> list:
+    SOURCE.set(_source(announcer))  # своя задача — свой контекст
+    return [item async for item in announcer.fetch()]
+
+
+async def bootstrap(db, client):
+    # Все биржи и рынки опрашиваются одновременно (с лимитом и таймаутом),
+    # а результаты применяются по порядку: сначала API, затем CMS.
+    # Упавшая биржа только логируется — старт не блокирует; её пары молча
+    # запишет первый удачный опрос раннера (см. _poll_api).
+    logging.info("Bootstrap: fetching REST pairs and CMS announcements …")
+    api_list = [cls(client) for cls in API_ANNOUNCERS]
+    cms_list = [cls(client) for cls in CMS_ANNOUNCERS]
+    results = await gather_bounded(_collect(a) for a in (*api_list, *cms_list))
+    api_results, cms_results = results[:len(api_list)], results[len(api_list):]
+
     logging.info("Bootstrap: storing existing REST pairs …")
     # 1) Наполняем таблицу listings текущими парами из API (spot/perp)
-    for cls in API_ANNOUNCERS:
-        api = cls()
-        async for sym in api.fetch():
+    for api, symbols in zip(api_list, api_results):
+        if isinstance(symbols, BaseException):
+            logging.error("Bootstrap API %s failed: %r", api.exchange, symbols)
+            continue
+        for sym in symbols:
             # игнорируем futures-символы
             if is_dated_symbol(sym.name):
                 continue
-            await mark_seen(db, api.exchange, sym.name, sym.market_type, "api")
+            await observe(db, api.exchange, sym.name, sym.markets)
 
     logging.info("Bootstrap: registering existing CMS announcements …")
     # 2) Пробегаем по всем существующим CMS-анонсерам и просто помечаем
     #    всё, что текущие fetch() возвращают (не отправляем в чат)
-    for cls in CMS_ANNOUNCERS:
-        cms = cls()
-        async for ann in cms.fetch():
-            # если пара уже в БД (любая market) — пропускаем
-            if await symbol_exists(db, ann.exchange, ann.symbol):
-                continue
-            # иначе просто сохраняем без отправки
-            await mark_seen(db, ann.exchange, ann.symbol, "Unknown", "cms")
-            logging.debug("Bootstrap CMS registered: %s — %s", ann.exchange, ann.symbol)
+    for cms, anns in zip(cms_list, cms_results):
+        if isinstance(anns, BaseException):
+            logging.error("Bootstrap CMS %s failed: %r", cms.name, anns)
+            continue
+        for ann in anns:
+            # объявленный, но ещё не начавшийся листинг — ждём его и после рестарта
+            if is_future(ann.starts):
+                await plan(db, ann.exchange, ann.symbol, ann.starts)
+            # просто сохраняем без отправки (торгуемой паре — бит анонса в ту же строку)
+            if await observe(db, ann.exchange, ann.symbol, Market.ANNOUNCED, pair=False):
+                logging.debug("Bootstrap CMS registered: %s — %s", ann.exchange, ann.symbol)
 
+    # всё накопленное — одной транзакцией
+    await flush(db)
     logging.info("Bootstrap finished.")
 
 
+# ───────────────────── конвейер ───────────────────────────────────
+# fetch (раннеры) → normalize → dedup → notify, этапы связаны очередями
+# bot/pipeline.py: медленная запись в outbox или БД больше не задерживает
+# следующий опрос биржи, а полная очередь притормаживает раннеры.
+@dataclass(frozen=True, slots=True)
+class Fetched:
+    """Сырой результат опроса: fetch → normalize."""
+    source: str                     # api:Binance, cms:OKX …
+    exchange: str
+    item: Any                       # Symbol из REST или Announcement из CMS
+    gone: bool = False              # пара пропала из списка инструментов
+    starts: Optional[float] = None  # нашёл учащённый опрос: объявленный старт (unix time)
+    # раннеру: True — отсеян или алерт в outbox, False — этап упал
+    done: Optional[asyncio.Future] = field(default=None, repr=False, compare=False)
+
+
+@dataclass(frozen=True, slots=True)
+class Sighting:
+    """Что замечено, в терминах listings: normalize → dedup."""
+    source: str
+    exchange: str
+    symbol: str
+    markets: int                    # Market
+    ann: Optional[Announcement] = None
+    gone: bool = False
+    starts: Optional[float] = None
+    done: Optional[asyncio.Future] = field(default=None, repr=False, compare=False)
+    pair: bool = True               # False — тикер из CMS-анонса (db.listing_key)
+    claimed: int = 0                # биты, отмеченные dedup: упал notify — вернуть
+
+
+async def _normalize(raw: Fetched) -> Optional[Sighting]:
+    """Symbol / Announcement → Sighting; датированные фьючерсы отсеиваются."""
+    if isinstance(raw.item, Announcement):
+        ann = raw.item
+        return Sighting(raw.source, ann.exchange, ann.symbol, Market.ANNOUNCED, ann=ann,
+                        done=raw.done, pair=False)
+    sym = raw.item
+    if is_dated_symbol(sym.name):
+        return None  # новая серия / экспирация фьючерса — не листинг и не делистинг
+    return Sighting(raw.source, raw.exchange, sym.name, int(sym.markets),
+                    gone=raw.gone, starts=raw.starts, done=raw.done)
+
+
+async def _dedup(seen: Sighting) -> Optional[Tuple[Sighting, ListingEvent]]:
+    """
+    Новые биты → событие (SPOT_LIVE / FUTURES_ADDED / ANNOUNCED).
+    Проверка и отметка в индексе — без await, атомарно и при N воркерах;
+    в БД пишет уже notify, после outbox, а если outbox не принял алерт —
+    notify снимает отметку (release).
+    """
+    if seen.gone:
+        return seen, ListingEvent(Kind.DELISTED, seen.exchange, seen.symbol, seen.markets)
+    have = listing_markets(seen.exchange, seen.symbol, pair=seen.pair)
+    event = events_for(seen.exchange, seen.symbol, have, seen.markets)
+    if event is None:
+        return None
+    return replace(seen, claimed=claim(seen.exchange, seen.symbol, seen.markets, pair=seen.pair)), event
+
+
+def _render(seen: Sighting, event: ListingEvent) -> str:
+    if event.kind is Kind.DELISTED:
+        return f"🚫 <b>{seen.exchange}</b> убрал пару <code>{seen.symbol}</code> ({event.market})"
+    if event.kind is Kind.ANNOUNCED:
+        ann = seen.ann
+        msg = f"📰 <b>{ann.exchange}</b> анонсировал листинг <code>{ann.symbol}</code>"
+        if is_future(ann.starts):
+            msg += f"\nСтарт торгов: {_fmt(ann.starts)}"
+        url = _get_url(ann)
+        if url:
+            msg += f"\n{url}"
+        return msg
+    text = f"⚡️ <b>{seen.exchange}</b> добавил пару <code>{seen.symbol}</code> ({event.market})"
+    if event.announced:
+        text += "\n📰 листинг анонсирован ранее"
+    return text
+
+
+async def _send_event(event: ListingEvent, text: str, latency: Optional[float] = None) -> None:
+    await send(text, exchange=event.exchange, market=event.market, key=event.key())
+    fields = {"event": event.kind.value, "exchange": event.exchange, "symbol": event.symbol,
+              "market": event.market}
+    if latency is not None:
+        fields["latency"] = round(latency, 3)
+    logging.info("%s: %s — %s (%s)", event.kind.value, event.exchange, event.symbol, event.market,
+                 extra=fields)
+
+
+async def _notify(db, found: Tuple[Sighting, ListingEvent]) -> bool:
+    """
+    Алерт в outbox, затем UPSERT в listings. Outbox не принял алерт —
+    отметка dedup снимается и исключение уходит дальше: раннер узнает
+    об этом по Fetched.done и не сдвинет ни снимок, ни курсор CMS.
+    """
+    seen, event = found
+    SOURCE.set(seen.source)  # метрики и логи — с источником, как в раннере
+    lag = None
+    if seen.ann is not None and seen.ann.published is not None:
+        lag = max((datetime.now(timezone.utc) - seen.ann.published).total_seconds(), 0.0)
+    try:
+        await _send_event(event, _render(seen, event), lag)
+    except BaseException:
+        if seen.claimed:
+            release(seen.exchange, seen.symbol, seen.claimed, pair=seen.pair)
+        raise
+    if not seen.gone:
+        await persist(db, seen.exchange, seen.symbol, seen.markets, pair=seen.pair)
+    if seen.ann is not None and is_future(seen.ann.starts):
+        await plan(db, seen.exchange, seen.symbol, seen.ann.starts)
+    if lag is not None:
+        DETECTION_LAG.observe(lag)
+    if seen.starts is not None:
+        LISTING_LAG.observe(max(time.time() - seen.starts, 0.0))
+    return True
+
+
+def _settle(done: Optional[asyncio.Future], ok: bool) -> None:
+    if done is not None and not done.done():
+        done.set_result(ok)
+
+
+def _tracked(handler: Callable[[Any], Awaitable[Any]], last: bool = False) -> Callable[[Any], Awaitable[Any]]:
+    """
+    Этап с отчётом в Fetched.done: исключение — False, отсеян (None)
+    или прошёл последний этап — True; иначе ответит следующий этап.
+    """
+    async def run(item):
+        done = (item[0] if isinstance(item, tuple) else item).done
+        try:
+            out = await handler(item)
+        except BaseException:
+            _settle(done, False)
+            raise
+        if out is None or last:
+            _settle(done, True)
+        return out
+    return run
+
+
+_PIPELINE: Optional[Pipeline] = None
+
+
+def start_pipeline(db) -> None:
+    global _PIPELINE
+    _PIPELINE = Pipeline([
+        Stage("normalize", _tracked(_normalize), workers_for("normalize", 1)),
+        Stage("dedup", _tracked(_dedup), workers_for("dedup", 1)),
+        Stage("notify", _tracked(partial(_notify, db), last=True), workers_for("notify", 2)),
+    ])
+    _PIPELINE.start()
+
+
+async def stop_pipeline(db) -> None:
+    """Дренировать этапы и дописать listings; раннеры к этому моменту уже остановлены."""
+    global _PIPELINE
+    if _PIPELINE is not None:
+        await _PIPELINE.close()
+        _PIPELINE = None
+    await flush(db)
+
+
+async def _emit(db, raw: Fetched) -> None:
+    """В конвейер; без запущенного (bench, отдельный раннер) — все этапы сразу."""
+    if _PIPELINE is not None:
+        await _PIPELINE.put(raw)
+        return
+    seen = await _tracked(_normalize)(raw)
+    found = await _tracked(_dedup)(seen) if seen is not None else None
+    if found is not None:
+        await _tracked(partial(_notify, db), last=True)(found)
+
+
 # ───────────────────── REST-runner ────────────────────────────────
-async def _runner_api(cls, db):
-    api = cls()
-    while True:
-        async for sym in api.fetch():
-            if is_dated_symbol(sym.name):
-                continue
-            if await already_seen(db, api.exchange, sym.name, sym.market_type):
-                continue
-            await mark_seen(db, api.exchange, sym.name, sym.market_type, "api")
+async def _burst_found(api, db, symbols, starts: float) -> bool:
+    """
+    Учащённый опрос нашёл объявленную пару — алерт, не дожидаясь полного
+    опроса. False — все найденные рынки уже известны: ждём дальше.
+    """
+    fresh = False
+    sent = []
+    for sym in symbols:
+        if not is_dated_symbol(sym.name) and sym.markets & ~listing_markets(api.exchange, sym.name):
+            fresh = True
+        done = asyncio.get_running_loop().create_future()
+        await _emit(db, Fetched(_source(api), api.exchange, sym, starts=starts, done=done))
+        sent.append(done)
+    # алерт не дошёл до outbox — план не закрываем, следующий опрос повторит
+    return fresh and all([await done for done in sent])
 
-            # отправляем только новые API-пары
-            await send(
-                f"⚡️ <b>{api.exchange}</b> добавил пару "
-                f"<code>{sym.name}</code> ({sym.market_type})"
-            )
-            logging.info("API new: %s — %s (%s)", api.exchange, sym.name, sym.market_type)
-        await asyncio.sleep(POLL_INTERVAL_API)
 
+async def _seed(api, db, symbols) -> None:
+    """Молча записать текущие пары биржи — как bootstrap, без алертов."""
+    for sym in symbols:
+        if not is_dated_symbol(sym.name):
+            await observe(db, api.exchange, sym.name, sym.markets)
+    await flush(db)
+    logging.warning("API %s: no stored pairs, first poll seeded %d symbols silently",
+                    api.exchange, len(symbols))
 
-# ───────────────────── CMS-runner ─────────────────────────────────
-async def _runner_cms(cls, db):
+
+async def _poll_api(api, db) -> bool:
     """
-    Каждый CMS-анонсер, в бесконечном цикле, проверяет:
-    • Если fetch() вернул ann, которого ещё нет в БД — отправляем и сохраняем.
+    Один цикл REST-опроса: в конвейер уходит только дифф против прошлого
+    снимка — неизменённый ответ не доходит ни до БД, ни до чата.
+    True, если ответ биржи изменился.
     """
-    cms = cls()
-    while True:
+    added, removed = await api.poll()
+    if added and not exchange_seeded(api.exchange):
+        # bootstrap этой биржи не удался (или она новая): первый ответ — база, а не листинги
+        await _seed(api, db, added)
+        return True
+    source = _source(api)
+    loop = asyncio.get_running_loop()
+    diff = [(False, sym) for sym in added] + [(True, sym) for sym in removed]
+    for i, (gone, sym) in enumerate(diff):
+        # алерт не дошёл до outbox — вернуть пару в дифф следующего опроса
+        done = loop.create_future()
+        done.add_done_callback(lambda f, sym=sym, gone=gone: f.result() or api.forget(sym, gone))
         try:
-            async for ann in cms.fetch():
-                # Если уже есть в таблице — пропускаем
-                if await already_seen(db, ann.exchange, ann.symbol, "Unknown"):
-                    continue
+            await _emit(db, Fetched(source, api.exchange, sym, gone=gone, done=done))
+        except BaseException:
+            # опрос прерван: и эта пара, и ещё не отправленные — снова в дифф
+            _settle(done, False)
+            for rest_gone, rest in diff[i + 1:]:
+                api.forget(rest, rest_gone)
+            raise
+    return bool(added or removed)
+
+
+async def _runner_api(cls, db, client):
+    api = cls(client)
+    SOURCE.set(_source(api))
+    sched = PollSchedule(
+        f"API {api.exchange}",
+        interval_for("API", api.exchange, POLL_INTERVAL_API),
+    )
+    # WS-потоки будят этот же цикл: незнакомый символ / переподключение
+    feeds = [
+        asyncio.create_task(run_feed(feed(), api.knows, sched.wake), name=f"{_source(api)}:ws")
+        for feed in (WS_FEEDS.get(api.exchange, ()) if API_WS else ())
+    ]
+    # объявленные CMS листинги: вокруг старта — запросы только по символу
+    burst = BurstWatch(api.exchange, db, api.probe, partial(_burst_found, api, db))
+    feeds.append(asyncio.create_task(burst.run(), name=f"{_source(api)}:burst"))
+    try:
+        while True:
+            await sched.wait()
+            try:
+                with POLL_SECONDS.time():
+                    changed = await _poll_api(api, db)
+            except Exception as exc:
+                logging.error("API runner %s failed: %s", cls.__name__, exc)
+                sched.failed(exc)
+            else:
+                sched.succeeded(changed)
+    finally:
+        for task in feeds:
+            task.cancel()
+
+
+# ───────────────────── CMS-runner ─────────────────────────────────
+async def _poll_cms(cms, db) -> bool:
+    """
+    Один цикл CMS-опроса: анонсы новее high-water mark — в конвейер
+    (уже известные отсеет dedup). Статья считается обработанной, а курсор
+    сдвигается, только когда конвейер её отсеял или алерт лёг в outbox.
+    True, если лента отдала новое.
+    """
+    loop = asyncio.get_running_loop()
+    sent: list[asyncio.Future] = []
+
+    async def ack() -> bool:
+        # все анонсы опроса уже в конвейере — ждём их разом, а не по одному
+        return all(await asyncio.gather(*sent))
 
-                # Отправляем новый CMS-анонс в чат
-                msg = f"📰 <b>{ann.exchange}</b> анонсировал листинг <code>{ann.symbol}</code>"
-                url = _get_url(ann)
-                if url:
-                    msg += f"\n{url}"
+    async with contextlib.aclosing(cms.fetch(ack)) as anns:
+        async for ann in anns:
+            done = loop.create_future()
+            sent.append(done)
+            await _emit(db, Fetched(_source(cms), ann.exchange, ann, done=done))
+    if not all(done.result() for done in sent):
+        raise RuntimeError(f"{cms.name}: {sum(not d.result() for d in sent)} alerts not queued, retrying next poll")
+    return bool(sent)
 
-                await send(msg)
-                await mark_seen(db, ann.exchange, ann.symbol, "Unknown", "cms")
-                logging.info("CMS sent: %s — %s", ann.exchange, ann.symbol)
 
+async def _runner_cms(cls, db, client):
+    cms = cls(client)
+    SOURCE.set(_source(cms))
+    sched = PollSchedule(
+        f"CMS {cms.name}",
+        interval_for("CMS", cms.name, POLL_INTERVAL_CMS),
+    )
+    while True:
+        await sched.wait()
+        try:
+            with POLL_SECONDS.time():
+                changed = await _poll_cms(cms, db)
         except Exception as exc:
             logging.error("CMS runner %s failed: %s", cls.__name__, exc)
+            sched.failed(exc)
+        else:
+            sched.succeeded(changed)
+
 
-        await asyncio.sleep(POLL_INTERVAL_CMS)
+# ───────────────────── команды бота ───────────────────────────────
+async def _run_commands(db):
+    """Long polling команд; упавший polling не должен валить раннеры."""
+    try:
+        await dp.start_polling(bot, db=db, handle_signals=False, close_bot_session=False)
+    except Exception as exc:
+        logging.error("Telegram commands polling stopped: %s", exc)
+
+
+# ───────────────────── источники ─────────────────────────────────
+SOURCES = [
+    *(f"api:{c.exchange}" for c in API_ANNOUNCERS),
+    *(f"cms:{c.name}" for c in CMS_ANNOUNCERS),
+]
+
+
+def _sources(db, client) -> Dict[str, Callable[[], Awaitable[None]]]:
+    """Источник ("api:Binance", "cms:OKX" …) → фабрика его раннера."""
+    return {
+        **{f"api:{c.exchange}": partial(_runner_api, c, db, client) for c in API_ANNOUNCERS},
+        **{f"cms:{c.name}": partial(_runner_cms, c, db, client) for c in CMS_ANNOUNCERS},
+    }
 
 
 # ───────────────────────── main ────────────────────────────────────
 async def main():
     db = await connect()
-    if await db_is_empty(db):
-        await bootstrap(db)
+    await load_http_cache(db)
+    await load_cursors(db)
+    await load_subscribers(db, CHAT_ID)
+    await start_delivery(db)
+    start_pipeline(db)
+    metrics = await start_metrics_server()
+    monitor = start_loop_monitor()
+    try:
+        # один HTTP-клиент на весь процесс: keep-alive между циклами опроса
+        async with make_client() as client:
+            if await db_is_empty(db):
+                await bootstrap(db, client)
+
+            # имя задачи = источник: по нему profiler.py называет, кто держит loop
+            tasks = [asyncio.create_task(start(), name=source) for source, start in _sources(db, client).items()]
+            if TG_COMMANDS:
+                tasks.append(asyncio.create_task(_run_commands(db), name="telegram-commands"))
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                # сначала остановить опрос — потом дорабатывать то, что уже в конвейере
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        await stop_pipeline(db)
+        monitor.stop()
+        if metrics is not None:
+            metrics.close()
+        await stop_delivery()
+        await close(db)
+
+
+# ───────────────────── шардированный режим ─────────────────────────
+async def supervise(total: int):
+    """
+    Супервизор: bootstrap, доставка в Telegram (одна на бота — общие
+    лимиты), команды и перезапуск упавших воркеров. Сам бирж не опрашивает.
+    """
+    db = await connect()
+    await load_http_cache(db)
+    await load_cursors(db)
+    await load_subscribers(db, CHAT_ID)
+    await start_delivery(db, "follower")
+    metrics = await start_metrics_server()
+    monitor = start_loop_monitor()
+    try:
+        if await db_is_empty(db):
+            async with make_client() as client:
+                await bootstrap(db, client)
 
-    tasks = [
-        *(asyncio.create_task(_runner_api(c, db)) for c in API_ANNOUNCERS),
-        *(asyncio.create_task(_runner_cms(c, db)) for c in CMS_ANNOUNCERS),
-    ]
-    await asyncio.gather(*tasks)
+        await reset_leases(db, SOURCES)
+        tasks = [asyncio.create_task(_keep_worker(i, total)) for i in range(total)]
+        if TG_COMMANDS:
+            tasks.append(asyncio.create_task(_run_commands(db), name="telegram-commands"))
+        await asyncio.gather(*tasks)
+    finally:
+        monitor.stop()
+        if metrics is not None:
+            metrics.close()
+        await stop_delivery()
+        await close(db)
+
+
+async def _keep_worker(shard: int, total: int):
+    """Держит процесс-воркер запущенным; упал — перезапуск с растущей паузой."""
+    env = dict(
+        os.environ,
+        METRICS_PORT=str(METRICS_PORT + 1 + shard) if METRICS_PORT else "0",
+        LOG_NAME=f"criptabot-w{shard}",  # свой файл: ротация одного файла из N процессов ломает его
+    )
+    backoff = 1.0
+    while True:
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, str(Path(__file__).resolve()), "--worker", f"{shard}/{total}", env=env,
+        )
+        started = time.monotonic()
+        try:
+            code = await proc.wait()
+        except asyncio.CancelledError:
+            proc.terminate()  # воркер сам отпустит аренды
+            await proc.wait()
+            raise
+        backoff = 1.0 if time.monotonic() - started > 60 else min(backoff * 2, 60.0)
+        logging.warning("Worker %d/%d exited with code %s, restart in %.0fs", shard, total, code, backoff)
+        await asyncio.sleep(backoff)
+
+
+async def worker(shard: int, total: int):
+    """
+    Процесс-воркер: опрашивает только арендованные источники
+    (см. bot/shard.py) и пишет уведомления в outbox — шлёт супервизор.
+    """
+    with contextlib.suppress(NotImplementedError):  # SIGTERM от супервизора → чистый выход
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+
+    db = await connect()
+    await load_http_cache(db)
+    await load_cursors(db)
+    await load_subscribers(db, CHAT_ID)
+    await start_delivery(db, "writer")
+    start_pipeline(db)
+    metrics = await start_metrics_server()
+    monitor = start_loop_monitor()
+
+    async def on_acquire(source: str) -> None:
+        # источник мог опрашивать другой процесс — берём его состояние из БД
+        await reload_exchange(db, source.split(":", 1)[1])
+        await load_http_cache(db)
+        await load_cursors(db)
+
+    async def refresh_subscribers() -> None:
+        while True:
+            await asyncio.sleep(SUBSCRIBERS_REFRESH)
+            try:
+                await load_subscribers(db, CHAT_ID)
+            except Exception as exc:
+                logging.error("Worker %d/%d: failed to reload subscribers: %s", shard, total, exc)
+
+    refresher = asyncio.create_task(refresh_subscribers())
+    try:
+        async with make_client() as client:
+            # напрямую, не через gather: при отмене run() должен успеть отпустить аренды
+            await Leases(db, shard, total, _sources(db, client), on_acquire).run()
+    finally:
+        refresher.cancel()
+        await stop_pipeline(db)
+        monitor.stop()
+        if metrics is not None:
+            metrics.close()
+        await stop_delivery()
+        await close(db)
 
 
 # ───────────────────────── entry-point ─────────────────────────────
 if __name__ == "__main__":
-    logging.basicConfig(
-        level=logging.INFO,
-        format="[%(asctime)s] %(levelname)s:%(name)s — %(message)s",
-    )
+    # логирование настроено в bot/core.py (очередь + фоновый поток)
+    ap = argparse.ArgumentParser(description="CryptoListingNotifyBot")
+    ap.add_argument("--worker", metavar="I/N", help="процесс-воркер шарда I из N (его запускает супервизор)")
+    args = ap.parse_args()
     try:
-        asyncio.run(main())
-    except (KeyboardInterrupt, SystemExit):
-        logging.info("CryptoListingNotifyBot stopped.")
\ No newline at end of file
+        if args.worker:
+            shard, total = map(int, args.worker.split("/"))
+            asyncio.run(worker(shard, total))
+        elif WORKERS > 1:
+            asyncio.run(supervise(WORKERS))
+        else:
+            asyncio.run(main())
+    except (KeyboardInterrupt, SystemExit, asyncio.CancelledError):
+        logging.info("CryptoListingNotifyBot stopped.")
@@ -0,0 +1,17 @@
+"""Корень проекта и tools/ — в sys.path: тесты импортируют bot.* и ws_replay как скрипты."""
+
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+
+# bot.core/bot.telegram требуют токен и чат при импорте; в Telegram тесты не ходят
+os.environ.setdefault("TG_TOKEN", "123456:TEST")
+os.environ.setdefault("CHAT_ID", "1")
+os.environ.setdefault("METRICS_PORT", "0")
+
+ROOT = Path(__file__).resolve().parent.parent
+for path in (ROOT, ROOT / "tools"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
@@ -0,0 +1,89 @@
+"""newer_than() / _mark(): метка CMS-ленты — набор последних id, а не одна статья."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+
+from bot.ann_cms import cursor, http_cache
+from bot.ann_cms.base import AbstractAnnouncer, Article, _mark, newer_than
+from bot.ann_cms.cursor import Mark
+from bot.ann_cms.okx import RULES
+
+T0 = datetime(2025, 6, 3, 10, 0, tzinfo=timezone.utc)
+MS0 = int(T0.timestamp() * 1000)
+
+
+def _okx(*ids: str) -> list[Article]:
+    """Лента без времени публикации, как у OKX."""
+    return [Article(i, f"OKX Will List {i.upper()} ({i.upper()})", f"/help/{i}") for i in ids]
+
+
+def test_deleted_mark_does_not_trigger_backfill():
+    mark = _mark(_okx("c", "b", "a"), None)
+    # статью c удалили, сверху вышла d
+    fresh, reached = newer_than(_okx("d", "b", "a"), mark)
+    assert [a.id for a in fresh] == ["d"] and reached
+
+
+def test_pinned_card_does_not_hide_newer_articles():
+    mark = _mark(_okx("pinned", "b", "a"), None)
+    fresh, reached = newer_than(_okx("pinned", "d", "c", "b", "a"), mark)
+    assert [a.id for a in fresh] == ["d", "c"] and reached
+
+
+def test_unknown_page_is_not_reached():
+    mark = _mark(_okx("b", "a"), None)
+    fresh, reached = newer_than(_okx("f", "e"), mark)
+    assert len(fresh) == 2 and not reached
+
+
+def test_same_millisecond_article_is_new():
+    first = Article("1", "Binance Will List Foo (FOO)", "/1", T0)
+    mark = _mark([first], None)
+    assert mark == Mark(("1",), MS0)
+    twin = Article("2", "Binance Will List Bar (BAR)", "/2", T0)
+    older = Article("0", "Binance Will List Baz (BAZ)", "/0", datetime(2025, 6, 2, tzinfo=timezone.utc))
+    fresh, reached = newer_than([twin, first, older], mark)
+    assert fresh == [twin] and reached
+
+
+def test_mark_keeps_previous_ids_within_limit():
+    prev = _mark(_okx("b", "a"), None)
+    assert _mark(_okx("c", "b"), prev).article_ids == ("c", "b", "a")
+
+
+class _Feed(AbstractAnnouncer):
+    """Лента OKX без HTTP: время старта есть только в теле статьи."""
+    name = "TestFeed"
+    rules = RULES
+
+    def __init__(self, ids: list[str]) -> None:
+        super().__init__(None)
+        self.ids = ids
+        self.details: list[str] = []
+
+    async def _page(self, n: int):
+        return _okx(*self.ids) if n == 1 else []
+
+    async def _detail_time(self, art: Article):
+        self.details.append(art.id)
+        return None
+
+
+def test_article_bodies_fetched_only_past_the_mark():
+    cursor.reset()
+    http_cache.reset()
+    feed = _Feed(["ccc", "bbb", "aaa"])
+
+    async def poll() -> list[str]:
+        return [ann.symbol async for ann in feed.fetch()]
+
+    # первое чтение ленты (bootstrap): без метки тела статей не запрашиваются
+    assert asyncio.run(poll()) == ["CCC", "BBB", "AAA"]
+    assert feed.details == []
+    # вышла статья ddd — за телом идём только для неё
+    feed.ids = ["ddd", "ccc", "bbb", "aaa"]
+    assert asyncio.run(poll()) == ["DDD"]
+    assert feed.details == ["ddd"]
+    cursor.reset()
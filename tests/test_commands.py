@@ -0,0 +1,64 @@
+"""/subscribe и /unsubscribe в группах — только администраторам чата."""
+
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from bot import commands
+
+
+class _Message:
+    def __init__(self, chat_type: str, status: str = "member", sender_chat=None) -> None:
+        self.chat = SimpleNamespace(id=-100, type=chat_type)
+        self.from_user = SimpleNamespace(id=42)
+        self.sender_chat = sender_chat
+        self.answers: list[str] = []
+
+        async def get_chat_member(chat_id, user_id):
+            return SimpleNamespace(status=status)
+
+        self.bot = SimpleNamespace(get_chat_member=get_chat_member)
+
+    async def answer(self, text: str) -> None:
+        self.answers.append(text)
+
+
+@pytest.fixture
+def subscribed(monkeypatch):
+    calls: list[str] = []
+
+    async def subscribe(db, sub):
+        calls.append(sub.chat_id)
+
+    async def unsubscribe(db, chat_id):
+        calls.append(f"-{chat_id}")
+        return True
+
+    monkeypatch.setattr(commands, "subscribe", subscribe)
+    monkeypatch.setattr(commands, "unsubscribe", unsubscribe)
+    return calls
+
+
+@pytest.mark.parametrize("chat_type, status, allowed", [
+    ("private", "member", True),
+    ("supergroup", "administrator", True),
+    ("group", "creator", True),
+    ("supergroup", "member", False),
+    ("group", "restricted", False),
+])
+def test_subscribe_rights(subscribed, chat_type, status, allowed):
+    message = _Message(chat_type, status)
+    asyncio.run(commands.cmd_subscribe(message, SimpleNamespace(args="okx spot"), db=None))
+    asyncio.run(commands.cmd_unsubscribe(message, db=None))
+    assert subscribed == (["-100", "--100"] if allowed else [])
+    if not allowed:
+        assert all("администраторы" in text for text in message.answers)
+
+
+def test_anonymous_group_admin_may_subscribe(subscribed):
+    message = _Message("supergroup", sender_chat=SimpleNamespace(id=-100))
+    asyncio.run(commands.cmd_subscribe(message, SimpleNamespace(args=""), db=None))
+    assert subscribed == ["-100"]
@@ -0,0 +1,87 @@
+"""listing_key() и перенос старой listings (строка на рынок) в строку на актив."""
+
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+
+from bot import db as dbmod
+from bot.ann_api.symbol import Market
+
+_OLD_LISTINGS = """
+CREATE TABLE listings (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    exchange  TEXT NOT NULL,
+    symbol    TEXT NOT NULL,
+    market    TEXT NOT NULL,
+    source    TEXT NOT NULL,
+    created   TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(exchange, symbol, market)
+);
+INSERT INTO listings(exchange, symbol, market, source, created) VALUES
+    ('Binance', 'FOOUSDT', 'Spot',    'api', '2024-01-02 00:00:00'),
+    ('Binance', 'FOOUSDT', 'Both',    'api', '2024-01-03 00:00:00'),
+    ('Binance', 'FOO',     'Unknown', 'cms', '2024-01-01 00:00:00'),
+    ('Binance', 'SUSD',    'Unknown', 'cms', '2024-01-04 00:00:00'),
+    ('Binance', 'SUSDT',   'Spot',    'api', '2024-01-05 00:00:00'),
+    ('OKX',     'BAR-USDT', 'Futures', 'api', '2024-02-01 00:00:00');
+"""
+
+
+def test_listing_key_pairs():
+    assert dbmod.listing_key("FOO/USDT") == "FOO"
+    assert dbmod.listing_key("foousdt") == "FOO"
+    assert dbmod.listing_key("FOOFDUSD") == "FOO"
+    assert dbmod.listing_key("FOOBTC") == "FOOBTC"
+
+
+def test_listing_key_bare_ticker_keeps_quote():
+    assert dbmod.listing_key("SUSD", pair=False) == "SUSD"
+    assert dbmod.listing_key("BUSD", pair=False) == "BUSD"
+    assert dbmod.listing_key("FOO", pair=False) == "FOO"
+    # «FOO/USD» в тексте анонса — всё-таки пара
+    assert dbmod.listing_key("FOO/USD", pair=False) == "FOO"
+
+
+def _rows(path) -> dict:
+    con = sqlite3.connect(path)
+    try:
+        return {
+            (exch, sym): rest
+            for exch, sym, *rest in con.execute(
+                "SELECT exchange, symbol, markets, announced, spot, futures, created FROM listings"
+            )
+        }
+    finally:
+        con.close()
+
+
+def test_migration_groups_rows_per_asset(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    dbmod.DB_PATH.parent.mkdir()
+    con = sqlite3.connect(dbmod.DB_PATH)
+    con.executescript(_OLD_LISTINGS)
+    con.close()
+
+    async def reconnect():
+        db = await dbmod.connect()
+        await dbmod.close(db)
+
+    asyncio.run(reconnect())
+    rows = _rows(dbmod.DB_PATH)
+    assert rows == {
+        ("Binance", "FOO"): [
+            Market.SPOT | Market.FUTURES | Market.ANNOUNCED,
+            "2024-01-01 00:00:00", "2024-01-02 00:00:00", "2024-01-03 00:00:00", "2024-01-01 00:00:00",
+        ],
+        # анонс актива SUSD и пара S/USDT — разные строки
+        ("Binance", "SUSD"): [Market.ANNOUNCED, "2024-01-04 00:00:00", None, None, "2024-01-04 00:00:00"],
+        ("Binance", "S"): [Market.SPOT, None, "2024-01-05 00:00:00", None, "2024-01-05 00:00:00"],
+        ("OKX", "BAR"): [Market.FUTURES, None, None, "2024-02-01 00:00:00", "2024-02-01 00:00:00"],
+    }
+    assert dbmod.listing_markets("Binance", "SUSD", pair=False) == Market.ANNOUNCED
+    assert dbmod.listing_markets("Binance", "SUSDT") == Market.SPOT
+
+    # вторая connect() уже ничего не переносит
+    asyncio.run(reconnect())
+    assert _rows(dbmod.DB_PATH) == rows
@@ -0,0 +1,88 @@
+"""classify(): эндпоинт с ответом-ошибкой не превращается в массовый делистинг."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from bot.ann_api import engine
+from bot.ann_api.engine import Endpoint
+from bot.ann_api.symbol import Market
+
+SPOT = "https://api.test/spot"
+FUTURES = "https://api.test/futures"
+
+
+def _classify(answers: dict[str, list[str]], endpoints) -> list:
+    def handler(request: httpx.Request) -> httpx.Response:
+        names = answers[str(request.url)]
+        return httpx.Response(200, content=json.dumps({"list": [{"symbol": n} for n in names]}))
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await engine.classify(client, endpoints)
+
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def endpoints():
+    return (Endpoint(SPOT, "symbol", Market.SPOT), Endpoint(FUTURES, "symbol", Market.FUTURES))
+
+
+def _names(n: int) -> list[str]:
+    return [f"C{i}USDT" for i in range(n)]
+
+
+def test_empty_market_raises(endpoints):
+    _classify({SPOT: _names(100), FUTURES: _names(50)}, endpoints)
+    # Bybit retCode 10006 / Binance {} — в теле нет ни одного имени
+    with pytest.raises(RuntimeError, match="0 instruments instead of 100"):
+        _classify({SPOT: [], FUTURES: _names(50)}, endpoints)
+    # сбой не сдвинул базу: следующий нормальный ответ принимается
+    assert len(_classify({SPOT: _names(99), FUTURES: _names(50)}, endpoints)) == 99
+
+
+def test_sharp_shrink_needs_confirmation(endpoints):
+    _classify({SPOT: _names(100), FUTURES: _names(50)}, endpoints)
+    for _ in range(engine.API_SHRINK_CONFIRM - 1):
+        with pytest.raises(RuntimeError):
+            _classify({SPOT: _names(10), FUTURES: _names(50)}, endpoints)
+    assert len(_classify({SPOT: _names(10), FUTURES: _names(50)}, endpoints)) == 50
+
+
+def test_shrink_confirmed_while_names_trickle_out(endpoints):
+    _classify({SPOT: _names(100), FUTURES: _names(50)}, endpoints)
+    # массовый делистинг: каждый опрос чуть меньше предыдущего, но все ниже порога
+    sizes = [30 - i for i in range(engine.API_SHRINK_CONFIRM)]
+    for n in sizes[:-1]:
+        with pytest.raises(RuntimeError, match="instead of 100"):
+            _classify({SPOT: _names(n), FUTURES: _names(50)}, endpoints)
+    assert len(_classify({SPOT: _names(sizes[-1]), FUTURES: _names(50)}, endpoints)) == 50
+    # принятый размер — новая база
+    assert len(_classify({SPOT: _names(sizes[-1] - 1), FUTURES: _names(50)}, endpoints)) == 50
+
+
+def test_recovery_resets_confirmation(endpoints):
+    _classify({SPOT: _names(100), FUTURES: _names(50)}, endpoints)
+    with pytest.raises(RuntimeError):
+        _classify({SPOT: _names(10), FUTURES: _names(50)}, endpoints)
+    _classify({SPOT: _names(100), FUTURES: _names(50)}, endpoints)
+    # нормальный ответ между сбоями — счёт подтверждений с нуля
+    with pytest.raises(RuntimeError):
+        _classify({SPOT: _names(10), FUTURES: _names(50)}, endpoints)
+
+
+def test_empty_market_is_never_confirmed(endpoints):
+    _classify({SPOT: _names(100), FUTURES: _names(50)}, endpoints)
+    for _ in range(engine.API_SHRINK_CONFIRM + 1):
+        with pytest.raises(RuntimeError):
+            _classify({SPOT: _names(100), FUTURES: []}, endpoints)
+
+
+def test_ordinary_delisting_passes(endpoints):
+    _classify({SPOT: _names(100), FUTURES: _names(50)}, endpoints)
+    assert len(_classify({SPOT: _names(97), FUTURES: _names(50)}, endpoints)) == 97
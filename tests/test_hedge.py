@@ -0,0 +1,126 @@
+"""
+HedgedTransport на httpx.MockTransport: хедж после перцентиля задержки,
+отмена проигравшего со слотом хоста, 5xx — на зеркало, 429 — без второй копии,
+здоровье зеркал (EWMA и карантин).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from bot import hedge
+from bot.hedge import HedgedTransport, Mirror, MirrorGroup
+from bot.http import PerHostTransport
+
+PRIMARY, BACKUP = "api.test", "mirror.test"
+
+
+@pytest.fixture(autouse=True)
+def fast_hedge(monkeypatch):
+    monkeypatch.setattr(hedge, "HTTP_HEDGE_DEFAULT_MS", 30.0)
+
+
+def _run(answers: dict, requests: int = 1):
+    """
+    answers: хост → корутина-обработчик. Возвращает (ответы, хосты вызовов,
+    транспорт с лимитом хоста, затраченное время).
+    """
+    calls: list[str] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.host)
+        return await answers[request.url.host]()
+
+    per_host = PerHostTransport(httpx.MockTransport(handler), per_host=1)
+    transport = HedgedTransport(per_host, {PRIMARY: [PRIMARY, BACKUP]})
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=transport) as client:
+            start = time.monotonic()
+            out = [await client.get(f"https://{PRIMARY}/v1/list") for _ in range(requests)]
+            return out, time.monotonic() - start
+
+    responses, elapsed = asyncio.run(scenario())
+    return responses, calls, per_host, elapsed
+
+
+def _reply(status: int, body: bytes = b"", delay: float = 0.0, headers=None, log=None):
+    async def answer() -> httpx.Response:
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            if log is not None:
+                log.append("cancelled")
+            raise
+        return httpx.Response(status, content=body, headers=headers)
+    return answer
+
+
+def _slots_free(per_host: PerHostTransport) -> bool:
+    return all(sem._value == 1 for sem in per_host._slots.values())
+
+
+def test_stalled_primary_is_hedged_and_cancelled():
+    log: list[str] = []
+    (resp,), calls, per_host, elapsed = _run({
+        PRIMARY: _reply(200, b"primary", delay=10, log=log),
+        BACKUP: _reply(200, b"backup"),
+    })
+    assert resp.content == b"backup"
+    assert calls == [PRIMARY, BACKUP]
+    assert elapsed < 1
+    assert log == ["cancelled"]              # проигравший отменён …
+    assert _slots_free(per_host)             # … и отпустил слот своего хоста
+
+
+def test_fast_primary_is_not_hedged():
+    (resp,), calls, _, _ = _run({PRIMARY: _reply(200, b"primary"), BACKUP: _reply(200, b"backup")})
+    assert resp.content == b"primary" and calls == [PRIMARY]
+
+
+def test_server_error_goes_to_mirror_without_waiting(monkeypatch):
+    monkeypatch.setattr(hedge, "HTTP_HEDGE_DEFAULT_MS", 5000.0)
+    (resp,), calls, per_host, elapsed = _run({PRIMARY: _reply(503), BACKUP: _reply(200, b"backup")})
+    assert resp.status_code == 200 and calls == [PRIMARY, BACKUP]
+    assert elapsed < 1
+    assert _slots_free(per_host)
+
+
+@pytest.mark.parametrize("status", [429, 418])
+def test_rate_limit_is_not_hedged(status):
+    limited = _reply(status, headers={"Retry-After": "30"})
+    responses, calls, _, _ = _run({PRIMARY: limited, BACKUP: limited}, requests=2)
+    # ответ — вызывающему как есть, и до конца Retry-After — по одной копии
+    assert [r.status_code for r in responses] == [status, status]
+    assert len(calls) == 2
+
+
+def test_threshold_is_the_latency_percentile(monkeypatch):
+    monkeypatch.setattr(hedge, "HTTP_HEDGE_PCT", 90.0)
+    group = MirrorGroup([PRIMARY, BACKUP])
+    assert group.threshold("/v1/list") == pytest.approx(0.03)   # мало истории — по умолчанию
+    for ms in range(1, 101):
+        group.observe("/v1/list", ms / 1000)
+    assert group.threshold("/v1/list") == pytest.approx(0.091)
+    for _ in range(200):
+        group.observe("/fast", 0.001)
+    assert group.threshold("/fast") == hedge.HTTP_HEDGE_MIN_MS / 1000
+
+
+def test_failing_mirror_cools_down_and_returns():
+    mirror = Mirror(PRIMARY)
+    for _ in range(3):
+        mirror.record(False, 0.01)
+    assert mirror.healthy(time.monotonic())          # 0.8³ ≈ 0.51 — ещё в ротации
+    mirror.record(False, 0.01)
+    assert not mirror.healthy(time.monotonic())
+    group = MirrorGroup([PRIMARY, BACKUP])
+    group.mirrors[0] = mirror
+    assert [m.host for m in group.ranked()] == [BACKUP]
+    # карантин кончился — ещё один шанс, с порога
+    assert mirror.healthy(mirror.down_until + 1)
+    assert mirror.ok == hedge.HTTP_MIRROR_MIN_OK
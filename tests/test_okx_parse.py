@@ -0,0 +1,79 @@
+"""Быстрый разбор ленты OKX (extract_fast, потоковый _page) против BeautifulSoup."""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+from pathlib import Path
+
+import httpx
+import pytest
+
+from bot.ann_cms import okx
+
+FIXTURES = Path(__file__).resolve().parent.parent / "bench" / "fixtures"
+
+
+@pytest.fixture(scope="module")
+def listings() -> str:
+    return gzip.decompress((FIXTURES / "okx_listings.html.gz").read_bytes()).decode()
+
+
+# варианты вёрстки карточек, на которых быстрый разбор обязан совпадать с BeautifulSoup
+VARIANTS = {
+    "nested tags": """<a href='/help/a' class="x article-item y">Will List <b>Foo</b> (FOO)</a>""",
+    "deeply nested": """<a class="article-item" href="/help/n"><div><span>OKX <b><i>Will</i> List</b></span>"""
+                     """<span> Bar (BAR)</span></div></a>""",
+    "entities": """<a class="article-item" href="/help/b?x=1&amp;y=2">\n  OKX &amp; Co <!-- c -->"""
+                """ Token Listing: BAR&nbsp;(BAR)\n</a>""",
+    "numeric entities": """<a class="article-item" href="/help/e">OKX&#39;s &#x201C;Will List&#x201D; &lt;Baz&gt; (BAZ)</a>""",
+    "upper case, unquoted href": """<A CLASS="article-item" HREF=/help/c><span>One</span><span> Two </span></A>""",
+    "not a card / missing href": """<a class="article-item-title" href="/nope">not a card</a>"""
+                                 """<a class="article-item">no href</a>""",
+}
+
+
+def test_fixture_parity(listings):
+    fast = okx.extract_fast(listings)
+    assert fast and fast == okx.extract_soup(listings)
+
+
+@pytest.mark.parametrize("page", VARIANTS.values(), ids=VARIANTS.keys())
+def test_variant_parity(page):
+    assert okx.extract_fast(page) == okx.extract_soup(page)
+
+
+def test_entities_are_decoded():
+    [(href, title)] = okx.extract_fast(VARIANTS["entities"])
+    assert href == "/help/b?x=1&y=2"
+    assert title == "OKX & Co Token Listing: BAR\xa0(BAR)"
+
+
+def _page(body: str, chunk: int) -> list:
+    class Chunked(httpx.AsyncByteStream):
+        async def __aiter__(self):
+            data = body.encode()
+            for i in range(0, len(data), chunk):
+                yield data[i:i + chunk]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers={"content-type": "text/html"}, stream=Chunked())
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await okx.OkxAnnouncer(client)._page(2)  # n > 1 — без условных заголовков и кеша
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("chunk", [7, 1000, 64 * 1024])
+def test_streaming_matches_soup(listings, chunk):
+    # карточки режутся границами чанков в любом месте
+    articles = _page(listings, chunk)
+    assert [(a.id, a.title) for a in articles] == okx.extract_soup(listings)[:len(articles)]
+    assert articles
+
+
+def test_card_without_href_is_skipped():
+    page = VARIANTS["nested tags"] + VARIANTS["not a card / missing href"]
+    assert [a.id for a in _page(page, 1000)] == ["/help/a"]
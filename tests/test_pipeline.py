@@ -0,0 +1,163 @@
+"""
+Конвейер normalize → dedup → notify: упавшая отправка не теряет алерт
+(claim откатывается, снимок и курсор не двигаются), close() дорабатывает очереди.
+"""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+import main as app
+from bot import db as dbmod
+from bot.ann_api.symbol import Market, Symbol
+from bot.ann_api.wrappers import _BaseApiAnnouncer
+from bot.ann_cms import cursor, http_cache
+from bot.ann_cms.base import AbstractAnnouncer, Article
+from bot.ann_cms.okx import RULES
+from bot.pipeline import Pipeline, Stage
+
+
+class _Api(_BaseApiAnnouncer):
+    exchange = "TestApi"
+
+    def __init__(self, symbols: list[Symbol]) -> None:
+        super().__init__(None)
+        self.symbols = symbols
+
+    async def _fetch_raw(self, client) -> list[Symbol]:
+        return list(self.symbols)
+
+
+class _Cms(AbstractAnnouncer):
+    name = "TestCms"
+    rules = RULES
+
+    def __init__(self, ids: list[str]) -> None:
+        super().__init__(None)
+        self.ids = ids
+
+    async def _page(self, n: int):
+        if n != 1:
+            return []
+        return [Article(i, f"OKX Will List {i.upper()} ({i.upper()})", f"/help/{i}") for i in self.ids]
+
+
+class _Outbox:
+    """send() из bot.telegram: первые fail вызовов падают, остальные копятся в sent."""
+
+    def __init__(self, fail: int) -> None:
+        self.fail = fail
+        self.sent: list[str] = []
+
+    async def __call__(self, text: str, **route) -> None:
+        if self.fail:
+            self.fail -= 1
+            raise RuntimeError("outbox is down")
+        self.sent.append(text)
+
+
+@pytest.fixture
+def outbox(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cursor.reset()
+    http_cache.reset()
+    box = _Outbox(fail=1)
+    monkeypatch.setattr(app, "send", box)
+    yield box
+    cursor.reset()
+    http_cache.reset()
+
+
+def test_failed_send_is_retried_by_next_api_poll(outbox):
+    old, new = Symbol("OLDUSDT", Market.SPOT), Symbol("NEWUSDT", Market.SPOT)
+    api = _Api([old])
+
+    async def scenario():
+        db = await dbmod.connect()
+        try:
+            await dbmod.observe(db, api.exchange, old.name, old.markets)
+            app.start_pipeline(db)
+            await app._poll_api(api, db)            # первый снимок: всё известно
+            api.symbols = [old, new]
+            await app._poll_api(api, db)            # NEWUSDT — отправка падает
+            await app.stop_pipeline(db)
+            assert outbox.sent == []
+            assert dbmod.listing_markets(api.exchange, new.name) == 0
+            assert new.name not in api._snapshot
+
+            app.start_pipeline(db)
+            assert await app._poll_api(api, db)     # тот же ответ — снова в диффе
+            await app.stop_pipeline(db)
+            assert dbmod.listing_markets(api.exchange, new.name) == Market.SPOT
+        finally:
+            await dbmod.close(db)
+
+    asyncio.run(scenario())
+    assert len(outbox.sent) == 1 and "NEWUSDT" in outbox.sent[0]
+
+
+def test_failed_send_keeps_cms_cursor(outbox):
+    cms = _Cms(["bbb", "aaa"])
+
+    async def scenario():
+        db = await dbmod.connect()
+        try:
+            app.start_pipeline(db)
+            with pytest.raises(RuntimeError, match="not queued"):
+                await app._poll_cms(cms, db)
+            assert cursor.get(cms.name) is None       # метка не сдвинулась
+            assert len(outbox.sent) == 1              # BBB упал, AAA ушёл
+            assert await app._poll_cms(cms, db)       # опрос повторил обе статьи
+            assert cursor.get(cms.name) is not None
+            assert not await app._poll_cms(cms, db)   # всё обработано
+            await app.stop_pipeline(db)
+        finally:
+            await dbmod.close(db)
+
+    asyncio.run(scenario())
+    assert sorted(text.split("<code>")[1][:3] for text in outbox.sent) == ["AAA", "BBB"]
+
+
+def test_inline_emit_rolls_back_claim(outbox):
+    api = _Api([Symbol("OLDUSDT", Market.SPOT)])
+
+    async def scenario():
+        db = await dbmod.connect()
+        try:
+            await dbmod.observe(db, api.exchange, "OLDUSDT", Market.SPOT)
+            await app._poll_api(api, db)
+            api.symbols = [*api.symbols, Symbol("NEWUSDT", Market.FUTURES)]
+            with pytest.raises(RuntimeError, match="outbox is down"):
+                await app._poll_api(api, db)          # без конвейера ошибка — сразу раннеру
+            await asyncio.sleep(0)                    # колбэк done → forget()
+            assert dbmod.listing_markets(api.exchange, "NEWUSDT") == 0
+            assert await app._poll_api(api, db)
+        finally:
+            await dbmod.close(db)
+
+    asyncio.run(scenario())
+    assert len(outbox.sent) == 1 and "NEWUSDT" in outbox.sent[0]
+
+
+def test_close_drains_every_stage():
+    seen: list[int] = []
+
+    async def slow(item: int) -> int:
+        await asyncio.sleep(0.001)
+        return item
+
+    async def record(item: int) -> int:
+        seen.append(item)
+        return item
+
+    async def scenario():
+        pipe = Pipeline([Stage("slow", slow, 2, maxsize=4), Stage("record", record, 1, maxsize=4)])
+        pipe.start()
+        for i in range(50):
+            await pipe.put(i)
+        await pipe.close()
+
+    asyncio.run(scenario())
+    assert sorted(seen) == list(range(50))
@@ -0,0 +1,70 @@
+"""PollSchedule: ускорение в пределах общего бюджета, возврат к базе, 429 с Retry-After."""
+
+from __future__ import annotations
+
+import httpx
+import pytest
+
+from bot import scheduler
+from bot.scheduler import PollBudget, PollSchedule
+
+
+@pytest.fixture(autouse=True)
+def no_jitter(monkeypatch):
+    monkeypatch.setattr(scheduler, "POLL_JITTER", 0.0)
+
+
+def _sources(n: int, base: float = 60.0) -> list[PollSchedule]:
+    budget = PollBudget()
+    return [PollSchedule(f"S{i}", base, budget) for i in range(n)]
+
+
+def _rate(schedules) -> float:
+    return sum(1 / s.interval for s in schedules)
+
+
+def test_change_halves_and_quiet_sources_pay_for_it():
+    active, *quiet = sources = _sources(4)
+    active.succeeded(True)
+    assert active.interval == 30
+    for sched in quiet:
+        sched.succeeded(False)
+    assert [s.interval for s in quiet] == pytest.approx([90, 90, 90])
+    # суммарно — как при базовых интервалах
+    assert _rate(sources) == pytest.approx(4 / 60)
+
+
+def test_speedup_limited_by_budget():
+    alone, = _sources(1)
+    alone.succeeded(True)
+    assert alone.interval == 60          # оплатить некому
+
+    active, peer = _sources(2)
+    active.succeeded(True)
+    assert active.interval == pytest.approx(40)
+    peer.succeeded(False)
+    assert peer.interval == pytest.approx(120)   # не реже base × POLL_MAX_STRETCH
+    assert _rate([active, peer]) == pytest.approx(2 / 60)
+
+
+def test_quiet_source_relaxes_back_to_base():
+    active, *quiet = sources = _sources(4)
+    active.succeeded(True)
+    active.succeeded(False)
+    assert active.interval == 45
+    active.succeeded(False)
+    assert active.interval == 60
+    for sched in quiet:
+        sched.succeeded(False)
+    assert [s.interval for s in sources] == [60, 60, 60, 60]
+
+
+def test_retry_after_sets_the_pause():
+    sched, = _sources(1)
+    request = httpx.Request("GET", "https://api.test/")
+    response = httpx.Response(429, headers={"Retry-After": "300"}, request=request)
+    sched.failed(httpx.HTTPStatusError("429", request=request, response=response))
+    assert sched._next - sched._started == pytest.approx(300, abs=0.1)
+    assert sched.interval == 60
+    sched.failed(RuntimeError("boom"))   # без подсказки — экспоненциальный backoff
+    assert sched._next - sched._started == pytest.approx(60 * 4, abs=0.1)
@@ -0,0 +1,134 @@
+"""
+Аренды источников двумя воркерами на одном файле SQLite: свой шард
+берёт сразу, чужой — только после grace-периода; ключ notified
+пропускает одну рассылку события на оба процесса.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+import aiosqlite
+import pytest
+
+from bot import db as dbmod
+from bot import shard
+from bot.shard import LEASE_TTL, Leases, reset_leases, shard_of
+
+T0 = 1_000_000.0
+
+
+@pytest.fixture
+def clock(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    now = SimpleNamespace(value=T0)
+    monkeypatch.setattr(shard, "time", SimpleNamespace(time=lambda: now.value))
+    return now
+
+
+def _source_of(shard_no: int) -> str:
+    return next(s for s in (f"api:Test{i}" for i in range(100)) if shard_of(s, 2) == shard_no)
+
+
+async def _idle() -> None:
+    await asyncio.Event().wait()
+
+
+def _holder(db, shard_no: int, source: str, owner: str) -> Leases:
+    leases = Leases(db, shard_no, 2, {source: _idle})
+    leases.owner = owner
+    return leases
+
+
+async def _stop(*holders: Leases) -> None:
+    tasks = [t for h in holders for t in h.tasks.values()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def test_preferred_shard_and_takeover_grace(clock):
+    source = _source_of(0)
+
+    async def scenario():
+        first = await dbmod.connect()
+        second = await aiosqlite.connect(dbmod.DB_PATH)
+        own = _holder(first, 0, source, "w0")
+        other = _holder(second, 1, source, "w1")
+        try:
+            await reset_leases(first, [source])
+            clock.value += 0.1
+            await other._tick()
+            await own._tick()
+            assert source not in other.tasks and source in own.tasks   # свой шард — первым
+
+            # w0 продлевает — чужой не перебьёт и после TTL
+            for _ in range(4):
+                clock.value += LEASE_TTL / 3
+                await own._tick()
+                await other._tick()
+            assert source not in other.tasks
+
+            # w0 упал: аренда истекла, но grace-период ещё идёт
+            expired = clock.value + LEASE_TTL
+            clock.value = expired + LEASE_TTL / 2
+            await other._tick()
+            assert source not in other.tasks
+            clock.value = expired + LEASE_TTL + 0.1
+            await other._tick()
+            assert source in other.tasks
+
+            # ожил старый воркер — аренда уже чужая, его раннер гасится
+            await own._tick()
+            assert source not in own.tasks
+        finally:
+            await _stop(own, other)
+            await second.close()
+            await dbmod.close(first)
+
+    asyncio.run(scenario())
+
+
+def test_restarted_worker_takes_its_source_back_at_once(clock):
+    source = _source_of(0)
+
+    async def scenario():
+        first = await dbmod.connect()
+        second = await aiosqlite.connect(dbmod.DB_PATH)
+        own = _holder(first, 0, source, "w0")
+        other = _holder(second, 1, source, "w1")
+        restarted = _holder(first, 0, source, "w0-restarted")
+        try:
+            await reset_leases(first, [source])
+            clock.value += 0.1
+            await own._tick()
+            clock.value += LEASE_TTL + 0.1                 # w0 упал, аренда истекла
+            await other._tick()
+            await restarted._tick()
+            assert source in restarted.tasks and source not in other.tasks
+        finally:
+            await _stop(own, other, restarted)
+            await second.close()
+            await dbmod.close(first)
+
+    asyncio.run(scenario())
+
+
+def test_notified_key_lets_one_process_send(clock):
+    async def scenario():
+        first = await dbmod.connect()
+        second = await aiosqlite.connect(dbmod.DB_PATH)
+        try:
+            key = "spot_live:Binance:FOOUSDT:Spot"
+            sent = [
+                await dbmod.outbox_put_many(first, [("1", "FOO")], key, "api:Binance"),
+                await dbmod.outbox_put_many(second, [("1", "FOO")], key, "api:Binance"),
+            ]
+            assert [len(ids) for ids in sent] == [1, 0]
+            assert len(await dbmod.outbox_pending(first)) == 1
+        finally:
+            await second.close()
+            await dbmod.close(first)
+
+    asyncio.run(scenario())
@@ -0,0 +1,51 @@
+"""FilterIndex.match: фильтры подписок по биржам и рынкам, отписка."""
+
+from __future__ import annotations
+
+from bot.subscribers import FilterIndex, Subscription
+
+
+def _index(*subs: Subscription) -> FilterIndex:
+    index = FilterIndex()
+    for sub in subs:
+        index.add(sub)
+    return index
+
+
+def test_all_exchanges_one_market():
+    index = _index(Subscription("spot-only", markets=frozenset({"spot"})))
+    assert index.match("OKX", "Spot") == ["spot-only"]
+    assert index.match("Bybit", "Both") == ["spot-only"]
+    assert index.match("OKX", "Futures") == []
+    assert index.match("OKX", "Unknown") == []
+
+
+def test_one_exchange_all_markets():
+    index = _index(Subscription("bybit", exchanges=frozenset({"Bybit"})))
+    assert index.match("Bybit", "Futures") == ["bybit"]
+    assert index.match("Bybit", "Unknown") == ["bybit"]   # CMS-анонс
+    assert index.match("Binance", "Spot") == []
+
+
+def test_catch_all_first_and_no_duplicates():
+    index = _index(
+        Subscription("main"),
+        Subscription("okx-both", frozenset({"OKX"}), frozenset({"spot", "futures"})),
+    )
+    # Both попадает в обе ячейки подписчика — но в рассылке он один раз
+    assert index.match("OKX", "Both") == ["main", "okx-both"]
+    assert index.match("Bitget", "Both") == ["main"]
+
+
+def test_unsubscribe_and_resubscribe():
+    index = _index(Subscription("a", frozenset({"OKX"}), frozenset({"cms"})), Subscription("b"))
+    assert index.remove("a")
+    assert not index.remove("a")
+    assert index.match("OKX", "Unknown") == ["b"]
+    index.remove("b")
+    assert index._cells == {}                              # пустые ячейки не копятся
+
+    index.add(Subscription("a", frozenset({"OKX"}), frozenset({"cms"})))
+    index.add(Subscription("a", frozenset({"Binance"})))   # новые фильтры заменяют старые
+    assert index.match("OKX", "Unknown") == []
+    assert index.match("Binance", "Futures") == ["a"]
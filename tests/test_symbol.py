@@ -0,0 +1,22 @@
+"""Symbol: интернирование между опросами и без утечки старых экземпляров."""
+
+from __future__ import annotations
+
+import gc
+
+from bot.ann_api.symbol import Market, Symbol
+
+
+def test_same_name_and_markets_is_same_object():
+    sym = Symbol("FOOUSDT", Market.SPOT)
+    assert Symbol("FOOUSDT", int(Market.SPOT)) is sym
+    assert Symbol("FOOUSDT", Market.SPOT | Market.FUTURES) is not sym
+
+
+def test_unreferenced_symbols_leave_the_table():
+    key = ("GONEUSDT", int(Market.SPOT))
+    sym = Symbol(*key)
+    assert Symbol._interned.get(key) is sym
+    del sym
+    gc.collect()
+    assert Symbol._interned.get(key) is None
@@ -0,0 +1,136 @@
+"""
+Доставка в Telegram без сети: склейка под лимит длины, RetryAfter
+тормозит только свой чат, строка outbox живёт до удачной отправки.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+
+from bot import db as dbmod
+from bot import telegram
+from bot.telegram import TG_MAX_LEN, _Delivery, _merge
+
+
+class _Bot:
+    """bot.send_message: чаты из flood сначала получают RetryAfter, из hold — ждут gate."""
+
+    def __init__(self, flood: tuple[str, ...] = (), hold: tuple[str, ...] = ()) -> None:
+        self.flood = set(flood)
+        self.hold = set(hold)
+        self.gate = asyncio.Event()
+        self.sent: list[tuple[str, str, float]] = []
+
+    async def send_message(self, chat_id: str, text: str, **kwargs) -> None:
+        if chat_id in self.flood:
+            self.flood.discard(chat_id)
+            raise TelegramRetryAfter(None, "Too Many Requests", retry_after=1)
+        if chat_id in self.hold:
+            await self.gate.wait()
+        self.sent.append((chat_id, text, time.monotonic()))
+
+
+@pytest.fixture
+def fake_bot(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(telegram, "TG_COALESCE", 0.01)
+    monkeypatch.setattr(telegram, "TG_CHAT_PER_MIN", 600.0)
+
+    def install(**kwargs) -> _Bot:
+        fake = _Bot(**kwargs)
+        monkeypatch.setattr(telegram, "bot", fake)
+        return fake
+
+    return install
+
+
+def test_merge_fits_exactly_at_the_limit():
+    half = (TG_MAX_LEN - 2) // 2                  # две части + "\n\n" = ровно лимит
+    items = [(1, "a" * half, "api:Binance"), (2, "b" * half, "api:Binance")]
+    assert [(ids, len(text), src) for ids, text, src in _merge(items)] == [([1, 2], TG_MAX_LEN, "api:Binance")]
+
+
+def test_merge_splits_one_char_over_the_limit():
+    half = (TG_MAX_LEN - 2) // 2
+    items = [(1, "a" * half, "api:Binance"), (2, "b" * (half + 1), "cms:OKX"), (3, "c", "cms:OKX")]
+    merged = _merge(items)
+    assert [ids for ids, _, _ in merged] == [[1], [2, 3]]
+    assert [src for _, _, src in merged] == ["api:Binance", "cms:OKX"]
+    assert all(len(text) <= TG_MAX_LEN for _, text, _ in merged)
+
+
+def test_merge_mixed_sources():
+    assert _merge([(1, "x", "api:Binance"), (2, "y", "cms:OKX")]) == [([1, 2], "x\n\ny", "mixed")]
+
+
+def test_retry_after_pauses_only_that_chat(fake_bot):
+    fake = fake_bot(flood=("slow",))
+
+    async def scenario():
+        db = await dbmod.connect()
+        delivery = _Delivery(db)
+        try:
+            await delivery.start()
+            start = time.monotonic()
+            await delivery.put(["slow", "fast"], "hello")
+            for _ in range(300):
+                if len(fake.sent) == 2:
+                    break
+                await asyncio.sleep(0.01)
+            assert delivery.chat_buckets["slow"]._paused_until > start
+            assert delivery.chat_buckets["fast"]._paused_until == 0.0
+            return start
+        finally:
+            await delivery.stop()
+            await dbmod.close(db)
+
+    start = asyncio.run(scenario())
+    when = {chat: at - start for chat, _, at in fake.sent}
+    assert when["fast"] < 0.5 and when["slow"] >= 1.0
+
+
+def test_outbox_row_deleted_only_after_send(fake_bot):
+    fake = fake_bot(hold=("1",))
+
+    async def scenario():
+        db = await dbmod.connect()
+        delivery = _Delivery(db)
+        try:
+            await delivery.start()
+            await delivery.put(["1"], "listing")
+            await asyncio.sleep(0.1)                  # отправка висит
+            assert [row[1:3] for row in await dbmod.outbox_pending(db)] == [("1", "listing")]
+            fake.gate.set()
+            for _ in range(100):
+                if not await dbmod.outbox_pending(db):
+                    break
+                await asyncio.sleep(0.01)
+            assert await dbmod.outbox_pending(db) == []
+        finally:
+            await delivery.stop()
+            await dbmod.close(db)
+
+    asyncio.run(scenario())
+    assert [chat for chat, _, _ in fake.sent] == ["1"]
+
+
+def test_undelivered_rows_survive_stop(fake_bot):
+    fake_bot(hold=("1",))                             # не отпустим до остановки
+
+    async def scenario():
+        db = await dbmod.connect()
+        delivery = _Delivery(db)
+        try:
+            await delivery.start()
+            await delivery.put(["1"], "listing")
+            await asyncio.sleep(0.1)
+            await delivery.stop()
+            assert len(await dbmod.outbox_pending(db)) == 1
+        finally:
+            await dbmod.close(db)
+
+    asyncio.run(scenario())
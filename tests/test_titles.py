@@ -0,0 +1,59 @@
+"""TitleRules.tickers() на настоящих заголовках бирж; listing_time() на тексте статей."""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import pytest
+
+from bot.ann_cms.binance import RULES as BINANCE
+from bot.ann_cms.bitget import RULES as BITGET
+from bot.ann_cms.bybit import RULES as BYBIT
+from bot.ann_cms.okx import RULES as OKX
+from bot.ann_cms.titles import listing_time
+
+
+@pytest.mark.parametrize("rules, title, expected", [
+    (BINANCE, "Binance Will List Bubblemaps (BMT) with Seed Tag Applied", ("BMT",)),
+    (BINANCE, "Binance Will List Kaito (KAITO) and Bubblemaps (BMT)", ("KAITO", "BMT")),
+    (BINANCE, "Binance Will List Walrus (WAL) (2025-03-27)", ("WAL",)),
+    (BINANCE, "Binance Will Add Bio Protocol (BIO) on Earn, Convert & Margin (Updated)", ("BIO",)),
+    (BINANCE, "Binance Will List 1000CHEEMS (1000CHEEMS) with Seed Tag Applied", ("1000CHEEMS",)),
+    (BINANCE, "Binance Will List ACT and PNUT with Seed Tag Applied", ("ACT", "PNUT")),
+    (BINANCE, "Binance Will List FIO, ONE & ROSE (Updated)", ("FIO", "ONE", "ROSE")),
+    (BINANCE, "Binance Will List Hooked Protocol", ()),
+    (BINANCE, "Binance Will Delist BETA, VIB (2024-12-03)", ()),
+    (OKX, "OKX Will List Zeta (ZETA) (Spot)", ("ZETA",)),
+    (OKX, "OKX Will List PEPE, FLOKI and BONK for spot trading", ("PEPE", "FLOKI", "BONK")),
+    (OKX, "OKX to delist LOOKS (LOOKS) (2025-06-03)", ()),
+    (BYBIT, "New Listing: ZZZUSDT Perpetual Contract, with up to 25x leverage", ("ZZZ",)),
+    (BYBIT, "New Listing: BTCUSDC Perpetual Contract", ("BTC",)),
+    (BYBIT, "New Listing: BMT/USDT", ("BMT",)),
+    (BITGET, "Bitget Will List Sign (SIGN). Come and grab a share of 2,500,000 SIGN!", ("SIGN",)),
+    (BITGET, "Bitget Will List ACT and PNUT in the Innovation Zone", ("ACT", "PNUT")),
+    (BITGET, "Bitget Launchpool: Stake BGB to get a share of 1,000,000 SIGN", ()),
+])
+def test_tickers(rules, title, expected):
+    assert rules.tickers(title) == expected
+
+
+@pytest.mark.parametrize("title", [
+    "Binance Will List Foo (2025-06-03)",
+    "Binance Will List Foo (Spot)",
+    "Binance Will List Foo (USDT)",
+    "Binance Will List Foo (13JUN25)",
+    "Binance Will List Foo (100)",
+])
+def test_brackets_without_ticker(title):
+    assert BINANCE.tickers(title) == ()
+
+
+def test_listing_time_prefers_trading():
+    text = ("Deposits will open at 2025-06-03 08:00 (UTC). "
+            "Spot trading for the FOO/USDT pair will open at 2025-06-03 10:00 (UTC).")
+    assert listing_time(text) == datetime(2025, 6, 3, 10, 0, tzinfo=timezone.utc)
+
+
+def test_listing_time_without_trading_hint():
+    # время депозитов или выводов — не старт торгов
+    assert listing_time("Deposits will open at 2025-06-03 08:00 (UTC).") is None
@@ -0,0 +1,75 @@
+"""run_feed против локального tools/ws_replay.py: ресинк, переподключение, запись фреймов."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+
+from aiohttp import web
+
+import ws_replay
+from bot.ann_api import ws
+
+FRAMES = [
+    (0.0, json.dumps([{"s": "BTCUSDT"}])),
+    (0.05, json.dumps([{"s": "BTCUSDT"}, {"s": "NEWUSDT"}])),
+    (0.1, json.dumps([{"s": "NEWUSDT"}])),
+]
+
+
+async def _drive(feed: ws.WsFeed, seconds: float, drop_after: int | None = None) -> list[str]:
+    """Поднять replay-сервер, держать run_feed seconds секунд; вернуть журнал ресинков."""
+    runner = web.AppRunner(ws_replay.make_app(FRAMES, 1.0, drop_after))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    host, port = runner.addresses[0][:2]
+    feed.url = f"ws://{host}:{port}/"
+    resyncs: list[str] = []
+    task = asyncio.create_task(ws.run_feed(feed, lambda sym, market: sym == "BTCUSDT",
+                                           lambda: resyncs.append("resync")))
+    try:
+        await asyncio.sleep(seconds)
+        assert not task.done(), task.exception()
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await runner.cleanup()
+    return resyncs
+
+
+def test_unknown_symbol_triggers_single_resync():
+    resyncs = asyncio.run(_drive(ws.BinanceSpotFeed(), 0.5))
+    # один ресинк на подключение и один на NEWUSDT: повтор глушит WS_RESYNC_COOLDOWN
+    assert len(resyncs) == 2
+
+
+def test_reconnects_after_server_drop():
+    resyncs = asyncio.run(_drive(ws.BinanceSpotFeed(), 1.6, drop_after=1))
+    # два подключения (пауза 1 с между ними) — ресинк после каждого
+    assert len(resyncs) == 2
+
+
+def test_parse_error_does_not_kill_feed():
+    class Broken(ws.BinanceSpotFeed):
+        calls = 0
+
+        def parse(self, frame):
+            Broken.calls += 1
+            raise KeyError("s")
+
+    feed = Broken()
+    resyncs = asyncio.run(_drive(feed, 1.6))
+    assert Broken.calls >= 2      # после ошибки поток переподключился и читал дальше
+    assert len(resyncs) == 2
+
+
+def test_recorder_is_closed(tmp_path, monkeypatch):
+    monkeypatch.setattr(ws, "WS_RECORD_DIR", str(tmp_path))
+    opened = []
+    recorder = ws._recorder
+    monkeypatch.setattr(ws, "_recorder", lambda feed: opened.append(recorder(feed)) or opened[-1])
+    asyncio.run(_drive(ws.BinanceSpotFeed(), 0.5))
+    assert opened and opened[0].closed
+    lines = (tmp_path / "binance_spot.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["frame"] for line in lines] == [frame for _, frame in FRAMES]
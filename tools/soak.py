@@ -0,0 +1,162 @@
+"""
+soak.py — нагрузочный прогон бота без сети и без Telegram.
+
+Запускает main.main() поверх HTTP_TRANSPORT=synthetic (bot/transport.py)
+на временной БД, перехватывает исходящие алерты и меряет:
+• задержку детекции: время «листинга» в синтетическом мире → алерт,
+  отдельно для REST (⚡️, от старта торгов) и CMS (📰, от анонса);
+  --lead N — анонс выходит за N сек до старта торгов (учащённый опрос);
+• память процесса (RSS) по ходу прогона.
+
+    python tools/soak.py --symbols 30000 --new-every 5 --duration 300
+    python tools/soak.py --symbols 300000 --interval 10 --out soak.json
+
+Интервалы опроса и лимиты хостов задаются обычными переменными
+окружения; ключи --interval/--symbols/--new-every — лишь удобные умолчания.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+TICKER_RX = re.compile(r"<code>(S[A-Z]+?)(?:USDT)?</code>")
+
+
+def _rss_mb() -> float:
+    try:  # Linux: текущий RSS
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:  # иначе — пиковый
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _summary(values: list[float]) -> dict:
+    if not values:
+        return {"count": 0}
+    # inclusive: перцентили не выходят за min..max выборки (p99 ≤ max)
+    q = statistics.quantiles(values, n=100, method="inclusive") if len(values) > 1 else values * 99
+    return {
+        "count": len(values),
+        "p50": round(q[49], 3),
+        "p90": round(q[89], 3),
+        "p99": round(q[98], 3),
+        "max": round(max(values), 3),
+    }
+
+
+async def soak(duration: float) -> dict:
+    import main as app
+    from bot import transport
+
+    detected: dict[str, dict[str, float]] = {"api": {}, "cms": {}}
+
+    async def capture(text: str, **route) -> None:
+        kind = "api" if text.startswith("⚡") else "cms" if text.startswith("📰") else None
+        m = TICKER_RX.search(text)
+        if kind and m:
+            detected[kind].setdefault(m.group(1), time.time())
+
+    app.send = capture
+    rss: list[float] = [_rss_mb()]
+
+    async def sample_memory() -> None:
+        while True:
+            await asyncio.sleep(1)
+            rss.append(_rss_mb())
+
+    sampler = asyncio.create_task(sample_memory())
+    runner = asyncio.create_task(app.main())
+    started = time.monotonic()
+    try:
+        await asyncio.wait_for(asyncio.shield(runner), duration)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        runner.cancel()
+        sampler.cancel()
+        await asyncio.gather(runner, sampler, return_exceptions=True)
+
+    world = transport.WORLD
+    injected = world.injected if world is not None else {}
+    live = world.live if world is not None else {}
+    starts = {"api": live, "cms": {b: at for b, (_, at) in injected.items()}}
+    latency = {
+        kind: [hits[b] - starts[kind][b] for b in injected if b in hits]
+        for kind, hits in detected.items()
+    }
+    return {
+        "config": {
+            "duration": round(time.monotonic() - started, 1),
+            "symbols_per_market": transport.SYNTH_SYMBOLS,
+            "new_every": transport.SYNTH_NEW_EVERY,
+            "listing_lead": transport.SYNTH_LISTING_LEAD,
+            "poll_interval_api": app.POLL_INTERVAL_API,
+            "poll_interval_cms": app.POLL_INTERVAL_CMS,
+        },
+        "injected": len(injected),
+        "missed": {k: len(injected) - len(v) for k, v in latency.items()},
+        "latency_seconds": {k: _summary(v) for k, v in latency.items()},
+        "rss_mb": {
+            "start": round(rss[0], 1),
+            "max": round(max(rss), 1),
+            "end": round(rss[-1], 1),
+        },
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--duration", type=float, default=120, help="длительность прогона, сек")
+    ap.add_argument("--symbols", type=int, default=30000, help="инструментов на рынок (SYNTH_SYMBOLS)")
+    ap.add_argument("--new-every", type=float, default=5, help="новый листинг раз в N сек")
+    ap.add_argument("--interval", type=int, default=5, help="интервал опроса API и CMS, сек")
+    ap.add_argument("--lead", type=float, default=0, help="анонс за N сек до старта торгов")
+    ap.add_argument("--out", type=Path, help="куда записать JSON (по умолчанию stdout)")
+    args = ap.parse_args()
+
+    # всё до импорта main: модули читают окружение при загрузке
+    os.environ["HTTP_TRANSPORT"] = "synthetic"
+    os.environ.setdefault("SYNTH_SYMBOLS", str(args.symbols))
+    os.environ.setdefault("SYNTH_NEW_EVERY", str(args.new_every))
+    os.environ.setdefault("SYNTH_LISTING_LEAD", str(args.lead))
+    os.environ.setdefault("POLL_INTERVAL_API", str(args.interval))
+    os.environ.setdefault("POLL_INTERVAL_CMS", str(args.interval))
+    os.environ.setdefault("HTTP_HOST_BUDGET", "0")
+    os.environ.setdefault("METRICS_PORT", "0")
+    os.environ.setdefault("TG_TOKEN", "123456:SOAK")
+    os.environ.setdefault("CHAT_ID", "0")
+    os.environ.setdefault("TG_COMMANDS", "0")  # токен фиктивный — без polling
+
+    logging.disable(logging.INFO)  # по строке на каждый запрос и алерт
+    cwd = Path.cwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # data/listings.db — во временном каталоге
+        try:
+            report = asyncio.run(soak(args.duration))
+        finally:
+            os.chdir(cwd)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        args.out.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
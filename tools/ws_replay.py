@@ -0,0 +1,76 @@
+"""
+ws_replay.py — локальная подмена биржевого WebSocket.
+
+Проигрывает фреймы, записанные ботом с WS_RECORD_DIR, каждому
+подключившемуся клиенту, соблюдая исходные паузы между ними.
+
+    python tools/ws_replay.py logs/ws/binance_spot.jsonl --port 8765
+    WS_URL_BINANCE_SPOT=ws://127.0.0.1:8765/ API_WS=1 python main.py
+
+--drop-after N закрывает соединение после N фреймов — так проверяется
+переподключение и REST-ресинк после разрыва.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+from pathlib import Path
+
+from aiohttp import WSMsgType, web
+
+
+def load_frames(path: Path) -> list[tuple[float, str]]:
+    frames = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if line.strip():
+            rec = json.loads(line)
+            frames.append((float(rec["t"]), rec["frame"]))
+    return frames
+
+
+def make_app(frames: list[tuple[float, str]], speed: float, drop_after: int | None) -> web.Application:
+    async def handler(request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+
+        async def drain() -> None:  # подписки и ping'и клиента просто читаем
+            async for msg in ws:
+                if msg.type == WSMsgType.TEXT and msg.data == "ping":
+                    await ws.send_str("pong")
+
+        reader = asyncio.create_task(drain())
+        prev = frames[0][0] if frames else 0.0
+        for sent, (t, frame) in enumerate(frames, 1):
+            await asyncio.sleep(max(0.0, t - prev) / speed)
+            prev = t
+            await ws.send_str(frame)
+            if drop_after is not None and sent >= drop_after:
+                break
+        if drop_after is None:
+            await reader  # держим соединение, пока клиент не уйдёт
+        reader.cancel()
+        await ws.close()
+        return ws
+
+    app = web.Application()
+    app.router.add_get("/", handler)
+    app.router.add_get("/{tail:.*}", handler)
+    return app
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("frames", type=Path, help="jsonl из WS_RECORD_DIR")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--speed", type=float, default=1.0, help="ускорение воспроизведения")
+    ap.add_argument("--drop-after", type=int, default=None, help="разорвать после N фреймов")
+    args = ap.parse_args()
+    web.run_app(make_app(load_frames(args.frames), args.speed, args.drop_after),
+                host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()